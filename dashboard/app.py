@@ -5,59 +5,52 @@ import os
 # Add project root to path so 'scripts' is importable when running from any subdirectory
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Data is refreshed out of process by scripts/refresh_worker.py; the app just
+# follows the live database generation.
+# Query results come back as NumPy columns with dates, times and rounding
+# already done in SQL (see charts.columns), so no DataFrames on the request path.
+# pandas loads on first use so workers boot fast; under gunicorn --preload,
+# warm() loads it in the master before forking (see gunicorn.conf.py).
+import io
+import csv
+import json
+import importlib
 import dash
-from dash import dcc, html, Input, Output, State, dash_table
 import duckdb
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
-import pytz
+import flask
+from dash import dcc, html, Input, Output, State, dash_table
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
-##from scripts.ingest_forecast import run_forecast_ingest
+from dashboard.db import get_cursor
+from dashboard.cache import cached
+from dashboard.metrics import init_app, instrumented, timed_query
+from dashboard import charts
+from dashboard.charts import (
+    COLORS, columns, n_rows, seasonal_figure, with_today_marker, temp_precip_figure,
+    forecast_figure, gantt_figure, empty_gantt_figure,
+)
+
+class GardenDash(dash.Dash):
+    """Dash app that serializes its static layout once, not on every page load."""
+    _layout_body = None
+
+    def serve_layout(self):
+        if callable(self.layout):
+            return super().serve_layout()
+        if self._layout_body is None:
+            self._layout_body = super().serve_layout().get_data()
+        return flask.Response(self._layout_body, mimetype="application/json")
+
 
 # Initialize the app
-app = dash.Dash(__name__)
+app = GardenDash(__name__)
 server = app.server
-
-# ── Earthy PNW palette ───────────────────────────────────────────────────────
-COLORS = {
-    "bg":           "#f5f0e8",
-    "panel":        "#ede8dc",
-    "border":       "#c8b89a",
-    "forest":       "#3a5c3a",
-    "moss":         "#6b8f5e",
-    "bark":         "#7a5c3a",
-    "terracotta":   "#c4622d",
-    "slate":        "#4a7a9b",
-    "sage":         "#8aab7a",
-    "gold":         "#c9a84c",
-    "text":         "#2c2416",
-    "muted":        "#7a6a54",
-}
-
-GANTT_COLORS = {
-    "Cool Season": COLORS["slate"],
-    "Warm Season": COLORS["terracotta"],
-    "Perennial":   COLORS["sage"],
-}
-
-CHART_LAYOUT = dict(
-    paper_bgcolor="white",
-    plot_bgcolor="#faf8f4",
-    font=dict(family="Lato, sans-serif", color=COLORS["text"], size=11),
-    title_font=dict(family="Playfair Display, serif", size=15, color=COLORS["text"]),
-    margin=dict(l=20, r=20, t=40, b=20),
-    legend=dict(
-        bgcolor="rgba(245,240,232,0.8)",
-        bordercolor=COLORS["border"],
-        borderwidth=1,
-        font=dict(size=11),
-    )
-)
+init_app(server)   # /metrics (see dashboard/metrics.py)
 
 # ── CSS ──────────────────────────────────────────────────────────────────────
+# Static rules live in dashboard/assets/garden.css (served, fingerprinted and
+# browser-cached by Dash); only the palette is injected, as CSS variables.
+_PALETTE = "".join(f"--{name}: {value}; " for name, value in COLORS.items())
+
 app.index_string = f"""
 <!DOCTYPE html>
 <html>
@@ -67,272 +60,7 @@ app.index_string = f"""
     {{%favicon%}}
     {{%css%}}
     <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:ital,wght@0,600;1,400&family=DM+Mono:wght@400;500&family=Lato:wght@300;400;700&display=swap" rel="stylesheet">
-    <style>
-        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-
-        body {{
-            background: {COLORS["bg"]};
-            font-family: 'Lato', sans-serif;
-            color: {COLORS["text"]};
-        }}
-
-        /* ── Magazine header ── */
-        .mag-header {{
-            display: flex;
-            align-items: stretch;
-            background: {COLORS["forest"]};
-        }}
-        .mag-flag {{
-            background: {COLORS["terracotta"]};
-            padding: 18px 28px;
-            flex-shrink: 0;
-        }}
-        .mag-flag-title {{
-            font-family: 'Playfair Display', serif;
-            font-size: 1.5rem;
-            color: {COLORS["bg"]};
-            line-height: 1.1;
-        }}
-        .mag-flag-sub {{
-            font-size: 0.6rem;
-            letter-spacing: 0.16em;
-            text-transform: uppercase;
-            color: rgba(245,240,232,0.55);
-            margin-top: 4px;
-        }}
-        .mag-city-block {{
-            display: flex;
-            align-items: center;
-            padding: 0 28px;
-            border-left: 1px solid rgba(255,255,255,0.1);
-            gap: 14px;
-            margin-left: auto;
-        }}
-        .mag-city-label {{
-            font-size: 0.62rem;
-            letter-spacing: 0.12em;
-            text-transform: uppercase;
-            color: rgba(245,240,232,0.5);
-        }}
-        .mag-date-block {{
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            padding: 0 28px;
-            border-left: 1px solid rgba(255,255,255,0.1);
-        }}
-        .mag-date-dow {{
-            font-size: 0.6rem;
-            letter-spacing: 0.14em;
-            text-transform: uppercase;
-            color: rgba(245,240,232,0.5);
-        }}
-        .mag-date-full {{
-            font-family: 'Playfair Display', serif;
-            font-size: 1.05rem;
-            color: rgba(245,240,232,0.9);
-            line-height: 1.2;
-        }}
-
-        /* ── Body layout ── */
-        .mag-body {{
-            display: flex;
-            min-height: 100vh;
-            max-width: 1400px;
-            margin: 0 auto;
-        }}
-        .mag-main {{
-            flex: 1;
-            padding: 24px 24px 24px 28px;
-            border-right: 1px solid {COLORS["border"]};
-            min-width: 0;
-        }}
-        .mag-sidebar {{
-            width: 290px;
-            flex-shrink: 0;
-            padding: 24px 20px;
-            background: {COLORS["panel"]};
-        }}
-
-        /* ── Section headers ── */
-        .sec-hed {{
-            font-family: 'Playfair Display', serif;
-            font-size: 0.95rem;
-            color: {COLORS["text"]};
-            border-bottom: 2px solid {COLORS["text"]};
-            padding-bottom: 6px;
-            margin-bottom: 14px;
-            display: flex;
-            justify-content: space-between;
-            align-items: baseline;
-        }}
-        .sec-hed span {{
-            font-family: 'Lato', sans-serif;
-            font-size: 0.62rem;
-            letter-spacing: 0.12em;
-            text-transform: uppercase;
-            color: {COLORS["muted"]};
-            font-style: normal;
-        }}
-        .sec-divider {{
-            border: none;
-            border-top: 1px solid {COLORS["border"]};
-            margin: 20px 0;
-        }}
-
-        /* ── Today stats bar ── */
-        .today-bar {{
-            display: flex;
-            border: 1px solid {COLORS["border"]};
-            border-radius: 3px;
-            overflow: hidden;
-            background: white;
-            margin-bottom: 20px;
-        }}
-        .today-stat {{
-            flex: 1;
-            padding: 12px 16px;
-            border-right: 1px solid {COLORS["border"]};
-            text-align: center;
-        }}
-        .today-stat:last-child {{ border-right: none; }}
-        .today-stat-label {{
-            font-size: 0.58rem;
-            letter-spacing: 0.14em;
-            text-transform: uppercase;
-            color: {COLORS["muted"]};
-            margin-bottom: 4px;
-        }}
-        .today-stat-value {{
-            font-family: 'DM Mono', monospace;
-            font-size: 1.6rem;
-            line-height: 1;
-            font-weight: 500;
-        }}
-
-        /* ── Chart panels ── */
-        .chart-panel {{
-            background: white;
-            border: 1px solid {COLORS["border"]};
-            margin-bottom: 20px;
-            border-radius: 2px;
-            padding: 16px 16px 8px;
-        }}
-
-        /* ── Sidebar blocks ── */
-        .sb-freeze {{
-            background: white;
-            border: 1px solid {COLORS["border"]};
-            border-left: 3px solid {COLORS["terracotta"]};
-            padding: 14px;
-            margin-bottom: 18px;
-            border-radius: 0 2px 2px 0;
-        }}
-        .sb-freeze-label {{
-            font-size: 0.62rem;
-            letter-spacing: 0.14em;
-            text-transform: uppercase;
-            color: {COLORS["terracotta"]};
-            font-weight: 700;
-            margin-bottom: 6px;
-        }}
-        .sb-freeze-date {{
-            font-family: 'Playfair Display', serif;
-            font-size: 1.45rem;
-            color: {COLORS["text"]};
-        }}
-        .sb-freeze-sub {{
-            font-size: 0.63rem;
-            color: {COLORS["muted"]};
-            margin-top: 2px;
-        }}
-        .sb-sec-hed {{
-            font-family: 'Playfair Display', serif;
-            font-size: 0.88rem;
-            color: {COLORS["text"]};
-            border-bottom: 1px solid {COLORS["border"]};
-            padding-bottom: 6px;
-            margin-bottom: 12px;
-        }}
-
-        /* ── Plant cards (sidebar) ── */
-        .plant-card {{
-            background: white;
-            border: 1px solid {COLORS["border"]};
-            border-radius: 2px;
-            padding: 9px 10px;
-        }}
-        .plant-card-name {{
-            font-family: 'Playfair Display', serif;
-            font-size: 0.78rem;
-            color: {COLORS["text"]};
-            display: block;
-        }}
-        .plant-card-family {{
-            font-size: 0.6rem;
-            color: {COLORS["muted"]};
-            font-style: italic;
-            display: block;
-            margin-top: 1px;
-        }}
-        .plant-card-sow {{
-            font-size: 0.65rem;
-            color: {COLORS["bark"]};
-            display: block;
-            margin-top: 3px;
-        }}
-        .plant-card-viable-good {{
-            font-size: 0.65rem;
-            font-weight: 700;
-            color: {COLORS["forest"]};
-            display: block;
-            margin-top: 4px;
-        }}
-        .plant-card-viable-bad {{
-            font-size: 0.65rem;
-            font-weight: 700;
-            color: {COLORS["terracotta"]};
-            display: block;
-            margin-top: 4px;
-        }}
-
-        /* ── Buttons ── */
-        .btn-export {{
-            background: {COLORS["forest"]};
-            color: {COLORS["bg"]};
-            border: none;
-            padding: 8px 14px;
-            font-family: 'Lato', sans-serif;
-            font-size: 0.68rem;
-            font-weight: 700;
-            letter-spacing: 0.1em;
-            text-transform: uppercase;
-            border-radius: 2px;
-            cursor: pointer;
-        }}
-        .btn-export:hover {{ background: {COLORS["moss"]}; }}
-        .btn-clear {{
-            background: transparent;
-            color: {COLORS["muted"]};
-            border: 1px solid {COLORS["border"]};
-            padding: 8px 12px;
-            font-family: 'Lato', sans-serif;
-            font-size: 0.68rem;
-            letter-spacing: 0.1em;
-            text-transform: uppercase;
-            border-radius: 2px;
-            cursor: pointer;
-            margin-left: 6px;
-        }}
-        .btn-clear:hover {{ border-color: {COLORS["bark"]}; color: {COLORS["bark"]}; }}
-
-        /* ── Dropdown overrides ── */
-        .Select-control {{
-            border-color: {COLORS["border"]} !important;
-            background-color: white !important;
-            font-size: 0.8rem !important;
-        }}
-    </style>
+    <style>:root {{ {_PALETTE}}}</style>
 </head>
 <body>
     {{%app_entry%}}
@@ -434,6 +162,9 @@ app.layout = html.Div([
                 html.Div("❄ Average Last Freeze", className="sb-freeze-label"),
                 html.Div(id="freeze-date-display", className="sb-freeze-date"),
                 html.Div(id="freeze-date-sub", className="sb-freeze-sub"),
+                html.Div("Normals · Years", className="sb-range-label"),
+                dcc.RangeSlider(id="year-range", step=1, allowCross=False,
+                                tooltip={"placement": "bottom"}, className="sb-range"),
             ], className="sb-freeze"),
 
             # What to plant this week
@@ -534,18 +265,8 @@ app.layout = html.Div([
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
 def get_con():
-    return duckdb.connect("data/weather.db", read_only=True)
-
-
-def time_to_decimal(t):
-    """Convert a time/timedelta to decimal hours (e.g. 06:30 → 6.5)."""
-    if t is None:
-        return None
-    if isinstance(t, timedelta):
-        return t.total_seconds() / 3600.0
-    if hasattr(t, "hour"):
-        return t.hour + t.minute / 60.0 + t.second / 3600.0
-    return None
+    """Thread-local cursor on the worker's shared read-only connection."""
+    return get_cursor()
 
 
 def fmt_time(t):
@@ -565,6 +286,331 @@ def fmt_time(t):
     return f"{h12}:{m:02d} {suffix}"
 
 
+# ── Queries ──────────────────────────────────────────────────────────────────
+# Data only changes once per model build, so every query is memoized per
+# city/parameters and database generation (see dashboard/cache.py).
+
+@cached
+@timed_query
+def query_cities():
+    con = get_con()
+    return con.execute(
+        "SELECT DISTINCT city FROM planting_gantt ORDER BY city"
+    ).fetchall()
+
+
+@cached
+@timed_query
+def query_today(city):
+    con = get_con()
+    today_row = con.execute("""
+        SELECT temp_max, temp_min FROM six_weeks_weather
+        WHERE city = ? AND date = CAST(CURRENT_DATE AS DATE)
+        LIMIT 1
+    """, [city]).fetchone()
+
+    sun_row = con.execute("""
+        SELECT sunrise, sunset FROM sun_times
+        WHERE city = ? AND date = CAST(CURRENT_DATE AS DATE)
+        LIMIT 1
+    """, [city]).fetchone()
+    return today_row, sun_row
+
+
+@cached
+@timed_query
+def query_temp_precip(city):
+    con = get_con()
+    # Weekly avg temps from six_weeks_weather (last 30 days), with rainfall
+    # and irrigation status from irrigation_tracker's latest weeks where it
+    # has them; without any tracker rows, the status comes from the precip
+    return columns(con.execute("""
+        WITH temps AS (
+            SELECT
+                DATE_TRUNC('week', date) AS week_start,
+                ROUND_EVEN(AVG(temp_max), 1) AS avg_high,
+                ROUND_EVEN(AVG(temp_min), 1) AS avg_low,
+                ROUND_EVEN(SUM(precipitation), 2) AS total_precip
+            FROM six_weeks_weather
+            WHERE city = ? AND date >= CURRENT_DATE - 30 AND date < CURRENT_DATE
+            GROUP BY week_start
+        ),
+        irr AS (
+            SELECT week_start, total_rainfall, irrigation_status
+            FROM irrigation_tracker
+            WHERE city = ?
+            ORDER BY week_start DESC LIMIT 5
+        ),
+        weeks AS (
+            SELECT
+                t.week_start,
+                t.avg_high,
+                t.avg_low,
+                COALESCE(i.total_rainfall, t.total_precip) AS total_precip,
+                CASE
+                    WHEN i.irrigation_status IS NOT NULL THEN i.irrigation_status
+                    WHEN EXISTS (SELECT 1 FROM irr) THEN 'Unknown'
+                    WHEN t.total_precip >= 0.5 THEN 'No irrigation needed'
+                    ELSE 'Irrigation needed'
+                END AS irrigation_status
+            FROM temps t
+            LEFT JOIN irr i ON i.week_start = t.week_start
+        )
+        SELECT
+            STRFTIME(week_start, '%b %d') AS week_label,
+            avg_high, avg_low, total_precip, irrigation_status,
+            CONTAINS(LOWER(irrigation_status), 'needed')
+                AND NOT CONTAINS(LOWER(irrigation_status), 'no') AS irrigation_needed
+        FROM weeks
+        ORDER BY week_start
+    """, [city, city]))
+
+
+@cached
+@timed_query
+def query_forecast(city):
+    con = get_con()
+    return columns(con.execute("""
+        SELECT
+            STRFTIME(date, '%b %d') AS day_label,
+            ROUND_EVEN(temp_max, 0) AS temp_max,
+            ROUND_EVEN(temp_min, 0) AS temp_min,
+            ROUND_EVEN(COALESCE(precipitation, 0), 2) AS precipitation
+        FROM six_weeks_weather
+        WHERE city = ? AND date >= CURRENT_DATE
+        ORDER BY date
+        LIMIT 10
+    """, [city]))
+
+
+@cached
+@timed_query
+def query_seasonal(city):
+    con = get_con()
+
+    # Times of day as decimal hours (06:30 → 6.5)
+    sun = columns(con.execute("""
+        SELECT
+            date,
+            EPOCH(sunrise) / 3600          AS sunrise,
+            EPOCH(sunset) / 3600           AS sunset,
+            EPOCH(morning_twilight) / 3600 AS morning_twilight,
+            EPOCH(evening_twilight) / 3600 AS evening_twilight
+        FROM sun_times
+        WHERE city = ?
+        ORDER BY date
+    """, [city]))
+
+    soil = columns(con.execute("""
+        SELECT date, avg_shallow_soil_temp, avg_min_temp, avg_max_temp
+        FROM daily_data
+        WHERE city = ?
+        ORDER BY date
+    """, [city]))
+
+    return sun, soil, query_freeze(city)
+
+
+@cached
+@timed_query
+def query_seasonal_figure(city):
+    """Pre-rendered seasonal figure dict, or None if this generation has none."""
+    con = get_con()
+    try:
+        row = con.execute("""
+            SELECT figure_json FROM seasonal_figures WHERE city = ?
+        """, [city]).fetchone()
+    except duckdb.CatalogException:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+@cached
+@timed_query
+def query_freeze(city):
+    con = get_con()
+    return con.execute("""
+        SELECT avg_last_freeze_all_time FROM avg_freeze_dates WHERE city = ?
+    """, [city]).fetchone()
+
+
+# Normals for a chosen year range [first, last] come from the prefix-sum cubes
+# (climate_cube, freeze_cube): the sums up to `last` minus the sums up to
+# first - 1, so any range costs two row lookups per day. Years past a city's
+# history are clamped to it.
+
+@cached
+@timed_query
+def query_year_bounds(city=None):
+    """(first, last) year of the climatology, or None if there is no cube (or city)."""
+    con = get_con()
+    where, params = ("WHERE city = ?", [city]) if city else ("", [])
+    try:
+        row = con.execute(f"SELECT MIN(year), MAX(year) FROM climate_cube {where}", params).fetchone()
+    except duckdb.CatalogException:
+        return None
+    return row if row and row[0] is not None else None
+
+
+def lookup_years(city, first, last):
+    """Cube years to subtract for [first, last]: (first - 1, last), clamped to the city."""
+    bounds = query_year_bounds(city)
+    if not bounds:
+        return None, None
+    hi = min(last, bounds[1])
+    return min(first, hi + 1) - 1, hi
+
+
+@cached
+@timed_query
+def query_normals(city, first, last):
+    con = get_con()
+    lo_year, hi_year = lookup_years(city, first, last)
+    diff = lambda c: (f"(hi.cum_sum_{c} - COALESCE(lo.cum_sum_{c}, 0))"
+                      f" / NULLIF(hi.cum_n_{c} - COALESCE(lo.cum_n_{c}, 0), 0)")
+    # Same days as daily_data: this year's calendar, from Jan 1
+    return columns(con.execute(f"""
+        WITH hi AS (SELECT * FROM climate_cube WHERE city = ? AND year = ?),
+             lo AS (SELECT * FROM climate_cube WHERE city = ? AND year = ?)
+        SELECT
+            MAKE_DATE(YEAR(current_date), 1, 1) + CAST(hi.doy - 1 AS INTEGER) AS date,
+            {diff("soil_temp_0_7cm")} AS avg_shallow_soil_temp,
+            {diff("temp_min")}        AS avg_min_temp,
+            {diff("temp_max")}        AS avg_max_temp
+        FROM hi
+        LEFT JOIN lo ON lo.doy = hi.doy
+        WHERE hi.doy <= DAYOFYEAR(MAKE_DATE(YEAR(current_date), 12, 31))
+        ORDER BY hi.doy
+    """, [city, hi_year, city, lo_year]))
+
+
+@cached
+@timed_query
+def query_freeze_range(city, first, last):
+    """Average last freeze over [first, last] as a (date,) row, like query_freeze."""
+    con = get_con()
+    lo_year, hi_year = lookup_years(city, first, last)
+    row = con.execute("""
+        WITH hi AS (SELECT * FROM freeze_cube WHERE city = ? AND year = ?),
+             lo AS (SELECT * FROM freeze_cube WHERE city = ? AND year = ?)
+        SELECT
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND((hi.cum_last_doy - COALESCE(lo.cum_last_doy, 0))
+                       / NULLIF(hi.cum_years - COALESCE(lo.cum_years, 0), 0)) - 1 AS INTEGER)
+        FROM hi
+        LEFT JOIN lo ON TRUE
+    """, [city, hi_year, city, lo_year]).fetchone()
+    return row if row and row[0] is not None else None
+
+
+@cached
+def seasonal_range_figure(city, first, last):
+    """Seasonal figure dict with normals over [first, last], or None without sun times."""
+    sun, _, _ = query_seasonal(city)
+    if not n_rows(sun):
+        return None
+    return seasonal_figure(sun, query_normals(city, first, last),
+                           query_freeze_range(city, first, last)).to_dict()
+
+
+def normals_range(years):
+    """(first, last) of a year-range selection, or None for the all-time view."""
+    bounds = query_year_bounds()
+    if not years or not bounds or tuple(years) == tuple(bounds):
+        return None
+    return int(years[0]), int(years[1])
+
+
+@cached
+@timed_query
+def query_plant_options():
+    con = get_con()
+    season_opts = [{"label": r[0], "value": r[0]} for r in
+        con.execute("SELECT DISTINCT growing_season FROM plants ORDER BY growing_season").fetchall()]
+    type_opts = [{"label": r[0], "value": r[0]} for r in
+        con.execute("SELECT DISTINCT harvest_type FROM plants ORDER BY harvest_type").fetchall()]
+    return season_opts, type_opts
+
+
+@cached
+@timed_query
+def query_plant_table(growing_season, harvest_type, pollinator):
+    con = get_con()
+    query = """
+        SELECT
+            common_name AS "Plant",
+            plant_family AS "Family",
+            growing_season AS "Season",
+            harvest_type AS "Type",
+            CASE WHEN direct_sow THEN 'Direct'
+                 ELSE CAST(weeks_indoor_before_transplant AS VARCHAR) || 'wk'
+            END AS "Sow",
+            CASE WHEN attracts_bees        THEN '🐝' ELSE '' END ||
+            CASE WHEN attracts_butterflies THEN '🦋' ELSE '' END ||
+            CASE WHEN attracts_hummingbirds THEN '🌺' ELSE '' END AS "Pollinators"
+        FROM plants WHERE 1=1
+    """
+    params = []
+    if growing_season:
+        query += " AND growing_season = ?"; params.append(growing_season)
+    if harvest_type:
+        query += " AND harvest_type = ?"; params.append(harvest_type)
+    if pollinator == "bees":
+        query += " AND attracts_bees = true"
+    elif pollinator == "butterflies":
+        query += " AND attracts_butterflies = true"
+    elif pollinator == "hummingbirds":
+        query += " AND attracts_hummingbirds = true"
+    query += " ORDER BY common_name"
+    rows = con.execute(query, params).fetchall()
+    return [d[0] for d in con.description], rows
+
+
+@cached
+@timed_query
+def query_week_forecast(city):
+    con = get_con()
+    return columns(con.execute("""
+        SELECT date, temp_max, temp_min FROM six_weeks_weather
+        WHERE city = ? AND date >= CURRENT_DATE AND date < CURRENT_DATE + 7
+        ORDER BY date
+    """, [city]))
+
+
+@cached
+@timed_query
+def query_plant_details(plants):
+    con = get_con()
+    ph = ",".join(["?"] * len(plants))
+    return columns(con.execute(f"""
+        SELECT common_name, plant_family, min_viable_temp_f, max_viable_temp_f,
+               attracts_bees, attracts_butterflies, attracts_hummingbirds,
+               CASE WHEN direct_sow THEN 'Direct Sow'
+                    ELSE CAST(weeks_indoor_before_transplant AS VARCHAR) || ' wks indoor'
+               END AS sow_method
+        FROM plants WHERE common_name IN ({ph})
+        ORDER BY common_name
+    """, list(plants)))
+
+
+@cached
+@timed_query
+def query_gantt(city, plants):
+    con = get_con()
+    ph = ",".join(["?"] * len(plants))
+    return columns(con.execute(f"""
+        SELECT p.common_name, p.growing_season,
+               pg.planting_start, pg.outdoor_start, pg.planting_end,
+               p.attracts_bees, p.attracts_butterflies, p.attracts_hummingbirds
+        FROM plants p
+        JOIN planting_gantt pg
+          ON p.growing_season = pg.growing_season
+         AND p.harvest_type   = pg.harvest_type
+        WHERE pg.city = ? AND p.common_name IN ({ph})
+        ORDER BY p.growing_season, p.common_name
+    """, [city] + list(plants)))
+
+
 # ── Callbacks ─────────────────────────────────────────────────────────────────
 
 @app.callback(
@@ -572,12 +618,9 @@ def fmt_time(t):
     Output("city-dropdown", "value"),
     Input("city-dropdown", "id")
 )
+@instrumented
 def populate_city_dropdown(_):
-    con = get_con()
-    cities = con.execute(
-        "SELECT DISTINCT city FROM planting_gantt ORDER BY city"
-    ).fetchall()
-    con.close()
+    cities = query_cities()
     return [{"label": r[0], "value": r[0]} for r in cities], "Portland"
 
 
@@ -586,6 +629,7 @@ def populate_city_dropdown(_):
     Output("header-date", "children"),
     Input("city-dropdown", "id"),
 )
+@instrumented
 def update_header_date(_):
     now = datetime.now()
     return [
@@ -599,23 +643,12 @@ def update_header_date(_):
     Output("today-stats-bar", "children"),
     Input("city-dropdown", "value")
 )
+@instrumented
 def update_today_bar(selected_city):
     if not selected_city:
         return []
 
-    con = get_con()
-    today_row = con.execute("""
-        SELECT temp_max, temp_min FROM six_weeks_weather
-        WHERE city = ? AND date = CAST(CURRENT_DATE AS DATE)
-        LIMIT 1
-    """, [selected_city]).fetchone()
-
-    sun_row = con.execute("""
-        SELECT sunrise, sunset FROM sun_times
-        WHERE city = ? AND date = CAST(CURRENT_DATE AS DATE)
-        LIMIT 1
-    """, [selected_city]).fetchone()
-    con.close()
+    today_row, sun_row = query_today(selected_city)
 
     high_str = f"{int(today_row[0])}°F" if today_row else "—"
     low_str  = f"{int(today_row[1])}°F" if today_row else "—"
@@ -641,144 +674,17 @@ def update_today_bar(selected_city):
     Output("temp-precip-chart", "figure"),
     Input("city-dropdown", "value")
 )
+@instrumented
 def update_temp_precip(selected_city):
     if not selected_city:
         return {}
 
-    con = get_con()
-    # Try irrigation_tracker first for clean weekly data
-    irr = con.execute("""
-        SELECT week_start, total_rainfall, irrigation_status
-        FROM irrigation_tracker
-        WHERE city = ?
-        ORDER BY week_start DESC LIMIT 5
-    """, [selected_city]).df()
-
-    # Weekly avg temps from six_weeks_weather (last 30 days)
-    temps = con.execute("""
-        SELECT
-            DATE_TRUNC('week', date) AS week_start,
-            AVG(temp_max) AS avg_high,
-            AVG(temp_min) AS avg_low,
-            SUM(precipitation) AS total_precip
-        FROM six_weeks_weather
-        WHERE city = ? AND date >= CURRENT_DATE - 30 AND date < CURRENT_DATE
-        GROUP BY week_start
-        ORDER BY week_start
-    """, [selected_city]).df()
-    con.close()
+    temps = query_temp_precip(selected_city)
 
-    if temps.empty:
+    if not n_rows(temps):
         return {}
 
-    temps["week_start"] = pd.to_datetime(temps["week_start"])
-    temps["avg_high"]   = temps["avg_high"].round(1)
-    temps["avg_low"]    = temps["avg_low"].round(1)
-    temps["total_precip"] = temps["total_precip"].round(2)
-
-    # Merge irrigation status
-    if not irr.empty:
-        irr["week_start"] = pd.to_datetime(irr["week_start"])
-        temps = temps.merge(irr[["week_start", "total_rainfall", "irrigation_status"]],
-                            on="week_start", how="left")
-        temps["total_precip"] = temps["total_rainfall"].combine_first(temps["total_precip"])
-        temps["irrigation_status"] = temps["irrigation_status"].fillna("Unknown")
-    else:
-        temps["irrigation_status"] = temps["total_precip"].apply(
-            lambda x: "No irrigation needed" if x >= 0.5 else "Irrigation needed"
-        )
-
-    week_labels = temps["week_start"].dt.strftime("%b %d")
-
-    # Subplots: temp on top (row 1), precip on bottom (row 2)
-    fig = make_subplots(
-        rows=2, cols=1,
-        row_heights=[0.60, 0.40],
-        shared_xaxes=True,
-        vertical_spacing=0.03,
-        subplot_titles=("", ""),
-    )
-
-    # Avg high
-    fig.add_trace(go.Scatter(
-        x=week_labels, y=temps["avg_high"],
-        mode="lines+markers+text",
-        name="Avg High",
-        line=dict(color=COLORS["terracotta"], width=2),
-        marker=dict(color=COLORS["terracotta"], size=9),
-        text=[f"{v:.0f}°" for v in temps["avg_high"]],
-        textposition="top center",
-        textfont=dict(color=COLORS["terracotta"], size=11, family="DM Mono"),
-    ), row=1, col=1)
-
-    # Avg low
-    fig.add_trace(go.Scatter(
-        x=week_labels, y=temps["avg_low"],
-        mode="lines+markers+text",
-        name="Avg Low",
-        line=dict(color=COLORS["slate"], width=2),
-        marker=dict(color=COLORS["slate"], size=9),
-        text=[f"{v:.0f}°" for v in temps["avg_low"]],
-        textposition="bottom center",
-        textfont=dict(color=COLORS["slate"], size=11, family="DM Mono"),
-    ), row=1, col=1)
-
-    # Precip bars — color by irrigation status
-    bar_colors = []
-    for _, row in temps.iterrows():
-        s = str(row["irrigation_status"]).lower()
-        is_needed = "needed" in s and "no" not in s
-        bar_colors.append(COLORS["terracotta"] if is_needed else COLORS["moss"])
-
-    fig.add_trace(go.Bar(
-        x=week_labels,
-        y=temps["total_precip"],
-        name="Weekly Precip (in)",
-        marker_color=COLORS["slate"],
-        marker_opacity=0.8,
-        # Label inside bar if tall enough, handled via texttemplate
-        texttemplate="%{y:.1f}\"",
-        textposition="inside",
-        insidetextanchor="middle",
-        textfont=dict(size=10, family="DM Mono", color="white"),
-        constraintext="none",
-    ), row=2, col=1)
-
-    # Irrigation status as colored annotations under each precip bar
-    for i, (_, row) in enumerate(temps.iterrows()):
-        s = str(row["irrigation_status"]).lower()
-        is_needed = "needed" in s and "no" not in s
-        fig.add_annotation(
-            x=week_labels.iloc[i],
-            y=-0.25,
-            yref="y2",
-            text="Needed" if is_needed else "OK ✓",
-            showarrow=False,
-            font=dict(
-                size=9, family="Lato",
-                color=COLORS["terracotta"] if is_needed else COLORS["forest"],
-            ),
-            bgcolor="#fff3ee" if is_needed else "#eef6ee",
-            borderpad=2,
-        )
-
-    fig.update_layout(**CHART_LAYOUT)
-    fig.update_layout(
-        height=300,
-        showlegend=True,
-        legend=dict(orientation="h", y=1.05, x=0, font=dict(size=10)),
-        margin=dict(l=10, r=10, t=20, b=50),
-        bargap=0.3,
-    )
-    fig.update_yaxes(title_text="°F", row=1, col=1, gridcolor="#f0e8d8", zeroline=False)
-    fig.update_yaxes(
-        title_text="in", row=2, col=1,
-        gridcolor="#f0e8d8", zeroline=False, rangemode="tozero",
-        range=[0, temps["total_precip"].max() * 1.5] if temps["total_precip"].max() > 0 else [0, 1],
-    )
-    fig.update_xaxes(showgrid=False)
-
-    return fig
+    return temp_precip_figure(temps)
 
 
 # ── 10-day forecast ───────────────────────────────────────────────────────────
@@ -786,327 +692,81 @@ def update_temp_precip(selected_city):
     Output("forecast-chart", "figure"),
     Input("city-dropdown", "value")
 )
+@instrumented
 def update_forecast_chart(selected_city):
     if not selected_city:
         return {}
 
-    con = get_con()
-    df = con.execute("""
-        SELECT date, temp_max, temp_min, precipitation
-        FROM six_weeks_weather
-        WHERE city = ? AND date >= CURRENT_DATE
-        ORDER BY date
-        LIMIT 10
-    """, [selected_city]).df()
-    con.close()
+    df = query_forecast(selected_city)
 
-    if df.empty:
+    if not n_rows(df):
         return {}
 
-    df["date_str"]     = pd.to_datetime(df["date"]).dt.strftime("%b %d")
-    df["temp_max"]     = df["temp_max"].round(0)
-    df["temp_min"]     = df["temp_min"].round(0)
-    df["precipitation"]= df["precipitation"].fillna(0).round(2)
-
-    y_min = df["temp_min"].min()
-    y_max = df["temp_max"].max()
-
-    fig = go.Figure()
-
-    # Alternating column background shading
-    for i in range(len(df)):
-        if i % 2 == 0:
-            fig.add_vrect(
-                x0=i - 0.5, x1=i + 0.5,
-                fillcolor="#f8f4ec", opacity=0.6, line_width=0,
-                layer="below",
-            )
-
-    # Dashed connecting lines (behind text)
-    fig.add_trace(go.Scatter(
-        x=df["date_str"], y=df["temp_max"],
-        mode="lines", showlegend=False,
-        line=dict(color=COLORS["terracotta"], width=1, dash="dot"),
-        opacity=0.35,
-    ))
-    fig.add_trace(go.Scatter(
-        x=df["date_str"], y=df["temp_min"],
-        mode="lines", showlegend=False,
-        line=dict(color=COLORS["slate"], width=1, dash="dot"),
-        opacity=0.35,
-    ))
-
-    # High temps
-    fig.add_trace(go.Scatter(
-        x=df["date_str"], y=df["temp_max"],
-        mode="text", name="High",
-        text=[f"{int(v)}°" for v in df["temp_max"]],
-        textposition="top center",
-        textfont=dict(color=COLORS["terracotta"], size=14, family="DM Mono"),
-    ))
-
-    # Low temps
-    fig.add_trace(go.Scatter(
-        x=df["date_str"], y=df["temp_min"],
-        mode="text", name="Low",
-        text=[f"{int(v)}°" for v in df["temp_min"]],
-        textposition="bottom center",
-        textfont=dict(color=COLORS["slate"], size=14, family="DM Mono"),
-    ))
-
-    # Precip annotations below x-axis
-    for _, row in df.iterrows():
-        p = row["precipitation"]
-        label = f"🌧 {p:.2f}\"" if p > 0.01 else "☁ —"
-        color = COLORS["slate"] if p > 0.01 else COLORS["muted"]
-        fig.add_annotation(
-            x=row["date_str"],
-            y=y_min - 5,
-            text=label, showarrow=False,
-            font=dict(size=9, color=color, family="Lato"),
-        )
+    return forecast_figure(df)
 
-    fig.update_layout(**CHART_LAYOUT)
-    fig.update_layout(
-        height=190,
-        showlegend=True,
-        legend=dict(orientation="h", y=1.1, x=0, font=dict(size=10)),
-        margin=dict(l=10, r=10, t=20, b=40),
-        xaxis=dict(showgrid=False, zeroline=False),
-        yaxis=dict(
-            showgrid=True, gridcolor="#f0e8d8", zeroline=False,
-            range=[y_min - 10, y_max + 10],
-            tickfont=dict(size=9),
-        ),
-    )
 
-    return fig
+# ── Normals year range ────────────────────────────────────────────────────────
+@app.callback(
+    Output("year-range", "min"),
+    Output("year-range", "max"),
+    Output("year-range", "value"),
+    Output("year-range", "marks"),
+    Output("year-range", "disabled"),
+    Input("year-range", "id")
+)
+@instrumented
+def populate_year_range(_):
+    bounds = query_year_bounds()
+    if not bounds:
+        return 0, 0, None, {}, True
+    first, last = bounds
+    return first, last, [first, last], {first: str(first), last: str(last)}, False
 
 
 # ── Seasonal conditions ───────────────────────────────────────────────────────
 @app.callback(
     Output("seasonal-chart", "figure"),
-    Input("city-dropdown", "value")
+    Input("city-dropdown", "value"),
+    Input("year-range", "value")
 )
-def update_seasonal_chart(selected_city):
+@instrumented
+def update_seasonal_chart(selected_city, years=None):
     if not selected_city:
         return {}
 
-    con = get_con()
+    span = normals_range(years)
+    if span:
+        fig = seasonal_range_figure(selected_city, *span)
+        return with_today_marker(fig) if fig else {}
 
-    sun = con.execute("""
-        SELECT date, sunrise, sunset, morning_twilight, evening_twilight
-        FROM sun_times
-        WHERE city = ?
-        ORDER BY date
-    """, [selected_city]).df()
+    # Pre-rendered at model build time; only the "today" marker is per request
+    fig = query_seasonal_figure(selected_city)
+    if fig is None:
+        sun, soil, freeze = query_seasonal(selected_city)
+        if not n_rows(sun):
+            return {}
+        fig = seasonal_figure(sun, soil, freeze).to_dict()
 
-    soil = con.execute("""
-        SELECT date, avg_shallow_soil_temp, avg_min_temp, avg_max_temp
-        FROM daily_data
-        WHERE city = ?
-        ORDER BY date
-    """, [selected_city]).df()
-
-    freeze = con.execute("""
-        SELECT avg_last_freeze_all_time FROM avg_freeze_dates WHERE city = ?
-    """, [selected_city]).fetchone()
-
-    con.close()
-
-    if sun.empty:
-        return {}
-
-    sun["date"] = pd.to_datetime(sun["date"])
-    for col in ["sunrise", "sunset", "morning_twilight", "evening_twilight"]:
-        if col in sun.columns:
-            sun[col] = sun[col].apply(time_to_decimal)
-
-    fig = go.Figure()
-
-    # Shaded daylight band between morning and evening twilight
-    if "morning_twilight" in sun.columns and "evening_twilight" in sun.columns:
-        mt = sun["morning_twilight"].dropna()
-        et = sun["evening_twilight"].dropna()
-        if not mt.empty and not et.empty:
-            fig.add_trace(go.Scatter(
-                x=pd.concat([sun["date"], sun["date"][::-1]]),
-                y=pd.concat([sun["morning_twilight"], sun["evening_twilight"][::-1]]),
-                fill="toself",
-                fillcolor="rgba(201,168,76,0.08)",
-                line=dict(width=0),
-                showlegend=False,
-                hoverinfo="skip",
-            ))
-
-    # Morning twilight
-    if "morning_twilight" in sun.columns:
-        fig.add_trace(go.Scatter(
-            x=sun["date"], y=sun["morning_twilight"],
-            mode="lines", name="Morning Twilight",
-            line=dict(color=COLORS["gold"], width=1.2, dash="dash"),
-            opacity=0.85,
-        ))
-
-    # Sunrise
-    if "sunrise" in sun.columns:
-        fig.add_trace(go.Scatter(
-            x=sun["date"], y=sun["sunrise"],
-            mode="lines", name="Sunrise",
-            line=dict(color="#e07b39", width=2),
-            opacity=0.9,
-        ))
-
-    # Sunset
-    if "sunset" in sun.columns:
-        fig.add_trace(go.Scatter(
-            x=sun["date"], y=sun["sunset"],
-            mode="lines", name="Sunset",
-            line=dict(color="#e07b39", width=2),
-            opacity=0.9,
-        ))
-
-    # Evening twilight
-    if "evening_twilight" in sun.columns:
-        fig.add_trace(go.Scatter(
-            x=sun["date"], y=sun["evening_twilight"],
-            mode="lines", name="Evening Twilight",
-            line=dict(color=COLORS["gold"], width=1.2, dash="dash"),
-            opacity=0.85,
-        ))
-
-    # Avg temp band + soil temp — secondary Y axis (0–100°F)
-    if not soil.empty:
-        soil["date"] = pd.to_datetime(soil["date"])
-        # Shaded avg temp band (high/low)
-        fig.add_trace(go.Scatter(
-            x=pd.concat([soil["date"], soil["date"][::-1]]),
-            y=pd.concat([soil["avg_max_temp"], soil["avg_min_temp"][::-1]]),
-            fill="toself",
-            fillcolor="rgba(196,98,45,0.08)",
-            line=dict(width=0),
-            name="Avg Temp Range",
-            showlegend=True,
-            hoverinfo="skip",
-            yaxis="y2",
-        ))
-        # Avg high
-        fig.add_trace(go.Scatter(
-            x=soil["date"], y=soil["avg_max_temp"],
-            mode="lines", name="Avg High °F",
-            line=dict(color=COLORS["terracotta"], width=1.5, dash="dot"),
-            opacity=0.7,
-            yaxis="y2",
-        ))
-        # Avg low
-        fig.add_trace(go.Scatter(
-            x=soil["date"], y=soil["avg_min_temp"],
-            mode="lines", name="Avg Low °F",
-            line=dict(color=COLORS["slate"], width=1.5, dash="dot"),
-            opacity=0.7,
-            yaxis="y2",
-        ))
-        # Shallow soil temp
-        fig.add_trace(go.Scatter(
-            x=soil["date"], y=soil["avg_shallow_soil_temp"],
-            mode="lines", name="Shallow Soil °F",
-            line=dict(color=COLORS["moss"], width=2),
-            opacity=0.9,
-            yaxis="y2",
-        ))
-
-    # Today line — use add_shape to avoid plotly annotation mean bug
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    fig.add_shape(
-        type="line", xref="x", yref="paper",
-        x0=today_str, x1=today_str, y0=0, y1=1,
-        line=dict(color=COLORS["forest"], width=1.5, dash="dot"),
-        opacity=0.7,
-    )
-    fig.add_annotation(
-        x=today_str, xref="x", yref="paper", y=1.02,
-        text="Today", showarrow=False,
-        font=dict(size=9, color=COLORS["forest"]),
-        xanchor="left",
-    )
-
-    # Last freeze — quieter, muted
-    if freeze:
-        freeze_date = pd.Timestamp(freeze[0])
-        fig.add_shape(
-            type="rect", xref="x", yref="paper",
-            x0=(freeze_date - timedelta(days=5)).strftime("%Y-%m-%d"),
-            x1=(freeze_date + timedelta(days=5)).strftime("%Y-%m-%d"),
-            y0=0, y1=1,
-            fillcolor=COLORS["muted"], opacity=0.06,
-            line_width=0,
-        )
-        fig.add_shape(
-            type="line", xref="x", yref="paper",
-            x0=freeze_date.strftime("%Y-%m-%d"),
-            x1=freeze_date.strftime("%Y-%m-%d"),
-            y0=0, y1=1,
-            line=dict(color=COLORS["muted"], width=1, dash="dot"),
-            opacity=0.5,
-        )
-        fig.add_annotation(
-            x=freeze_date.strftime("%Y-%m-%d"), xref="x", yref="paper", y=1.02,
-            text=f"Avg Last Freeze · {freeze_date.strftime('%b %d')}",
-            showarrow=False,
-            font=dict(size=9, color=COLORS["muted"]),
-            xanchor="right",
-        )
-
-    # Left Y axis: time of day (0–24h), midnight at top
-    tick_vals = [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24]
-    tick_text = ["12am", "2am", "4am", "6am", "8am", "10am",
-                 "12pm", "2pm", "4pm", "6pm", "8pm", "10pm", "12am"]
-
-    fig.update_layout(**CHART_LAYOUT)
-    fig.update_layout(
-        height=420,
-        margin=dict(l=10, r=60, t=20, b=20),
-        xaxis=dict(showgrid=False, zeroline=False),
-        yaxis=dict(
-            tickvals=tick_vals,
-            ticktext=tick_text,
-            gridcolor="#f0e8d8",
-            zeroline=False,
-            title="Time of Day",
-            range=[24, 0],
-        ),
-        yaxis2=dict(
-            title="°F",
-            overlaying="y",
-            side="right",
-            showgrid=False,
-            range=[0, 100],
-            tickvals=[0, 20, 40, 60, 80, 100],
-            color=COLORS["muted"],
-        ),
-        legend=dict(orientation="h", y=1.08, x=0, font=dict(size=10)),
-    )
-
-    return fig
+    return with_today_marker(fig)
 
 
 # ── Freeze date sidebar ───────────────────────────────────────────────────────
 @app.callback(
     Output("freeze-date-display", "children"),
     Output("freeze-date-sub", "children"),
-    Input("city-dropdown", "value")
+    Input("city-dropdown", "value"),
+    Input("year-range", "value")
 )
-def update_freeze_date(selected_city):
+@instrumented
+def update_freeze_date(selected_city, years=None):
     if not selected_city:
         return "—", ""
-    con = get_con()
-    row = con.execute("""
-        SELECT avg_last_freeze_all_time FROM avg_freeze_dates WHERE city = ?
-    """, [selected_city]).fetchone()
-    con.close()
+    span = normals_range(years)
+    row  = query_freeze_range(selected_city, *span) if span else query_freeze(selected_city)
     if not row:
         return "—", ""
-    return pd.Timestamp(row[0]).strftime("%B %d"), f"{selected_city} · All-time historical avg"
+    label = f"{span[0]}–{span[1]} avg" if span else "All-time historical avg"
+    return row[0].strftime("%B %d"), f"{selected_city} · {label}"
 
 
 # ── Plant table ───────────────────────────────────────────────────────────────
@@ -1120,43 +780,14 @@ def update_freeze_date(selected_city):
     Input("harvest-type-filter", "value"),
     Input("pollinator-filter", "value"),
 )
+@instrumented
 def update_plant_table(selected_city, growing_season, harvest_type, pollinator):
     if not selected_city:
         return [], [], [], []
-    con = get_con()
-    season_opts = [{"label": r[0], "value": r[0]} for r in
-        con.execute("SELECT DISTINCT growing_season FROM plants ORDER BY growing_season").fetchall()]
-    type_opts = [{"label": r[0], "value": r[0]} for r in
-        con.execute("SELECT DISTINCT harvest_type FROM plants ORDER BY harvest_type").fetchall()]
-    query = """
-        SELECT
-            common_name AS "Plant",
-            plant_family AS "Family",
-            growing_season AS "Season",
-            harvest_type AS "Type",
-            CASE WHEN direct_sow THEN 'Direct'
-                 ELSE CAST(weeks_indoor_before_transplant AS VARCHAR) || 'wk'
-            END AS "Sow",
-            CASE WHEN attracts_bees        THEN '🐝' ELSE '' END ||
-            CASE WHEN attracts_butterflies THEN '🦋' ELSE '' END ||
-            CASE WHEN attracts_hummingbirds THEN '🌺' ELSE '' END AS "Pollinators"
-        FROM plants WHERE 1=1
-    """
-    params = []
-    if growing_season:
-        query += " AND growing_season = ?"; params.append(growing_season)
-    if harvest_type:
-        query += " AND harvest_type = ?"; params.append(harvest_type)
-    if pollinator == "bees":
-        query += " AND attracts_bees = true"
-    elif pollinator == "butterflies":
-        query += " AND attracts_butterflies = true"
-    elif pollinator == "hummingbirds":
-        query += " AND attracts_hummingbirds = true"
-    query += " ORDER BY common_name"
-    df = con.execute(query, params).df()
-    con.close()
-    return df.to_dict("records"), [{"name": c, "id": c} for c in df.columns], season_opts, type_opts
+    season_opts, type_opts = query_plant_options()
+    names, rows = query_plant_table(growing_season, harvest_type, pollinator)
+    data = [dict(zip(names, row)) for row in rows]
+    return data, [{"name": c, "id": c} for c in names], season_opts, type_opts
 
 
 # ── Store selected plants ─────────────────────────────────────────────────────
@@ -1165,6 +796,7 @@ def update_plant_table(selected_city, growing_season, harvest_type, pollinator):
     Input("plant-table", "selected_rows"),
     State("plant-table", "data"),
 )
+@instrumented
 def store_selected_plants(selected_rows, table_data):
     if not selected_rows or not table_data:
         return []
@@ -1177,6 +809,7 @@ def store_selected_plants(selected_rows, table_data):
     Input("clear-button", "n_clicks"),
     prevent_initial_call=True,
 )
+@instrumented
 def clear_selection(_):
     return []
 
@@ -1187,6 +820,7 @@ def clear_selection(_):
     Input("city-dropdown", "value"),
     Input("selected-plants-store", "data"),
 )
+@instrumented
 def update_plant_cards(selected_city, selected_plants):
     if not selected_city:
         return []
@@ -1199,32 +833,23 @@ def update_plant_cards(selected_city, selected_plants):
             },
         )]
 
-    con = get_con()
-    forecast = con.execute("""
-        SELECT date, temp_max, temp_min FROM six_weeks_weather
-        WHERE city = ? AND date >= CURRENT_DATE AND date < CURRENT_DATE + 7
-        ORDER BY date
-    """, [selected_city]).df()
-    ph = ",".join(["?"] * len(selected_plants))
-    plants = con.execute(f"""
-        SELECT common_name, plant_family, min_viable_temp_f, max_viable_temp_f,
-               attracts_bees, attracts_butterflies, attracts_hummingbirds,
-               CASE WHEN direct_sow THEN 'Direct Sow'
-                    ELSE CAST(weeks_indoor_before_transplant AS VARCHAR) || ' wks indoor'
-               END AS sow_method
-        FROM plants WHERE common_name IN ({ph})
-    """, selected_plants).df()
-    con.close()
+    forecast = query_week_forecast(selected_city)
+    plants = query_plant_details(selected_plants)
 
-    if forecast.empty:
+    if not n_rows(forecast):
         return [html.P("No forecast data.", style={"color": COLORS["muted"]})]
 
+    # Viable days for every plant at once: plants × forecast days
+    highs  = forecast["temp_max"].astype(float)
+    lows   = plants["min_viable_temp_f"].astype(float)[:, None]
+    tops   = plants["max_viable_temp_f"].astype(float)[:, None]
+    plants["viable_days"] = ((highs >= lows) & (highs <= tops)).sum(axis=1)
+
     cards = []
-    for _, plant in plants.sort_values("common_name").iterrows():
-        viable_days = forecast[
-            (forecast["temp_max"] >= plant["min_viable_temp_f"]) &
-            (forecast["temp_max"] <= plant["max_viable_temp_f"])
-        ].shape[0]
+    names = list(plants)
+    for row in zip(*(plants[c].tolist() for c in names)):
+        plant = dict(zip(names, row))
+        viable_days = plant["viable_days"]
         good = viable_days >= 4
         cards.append(html.Div([
             html.Span(plant["common_name"], className="plant-card-name"),
@@ -1253,154 +878,19 @@ def update_plant_cards(selected_city, selected_plants):
     Input("city-dropdown", "value"),
     Input("selected-plants-store", "data"),
 )
+@instrumented
 def update_gantt(selected_city, selected_plants):
     if not selected_city:
         return {}
     if not selected_plants:
-        year = datetime.now().year
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        # Dummy invisible scatter to force datetime x-axis type
-        fig = go.Figure(go.Scatter(
-            x=[f"{year}-01-01", f"{year}-12-31"],
-            y=[0, 0],
-            mode="markers",
-            marker=dict(opacity=0),
-            showlegend=False,
-            hoverinfo="skip",
-        ))
-        fig.update_layout(**CHART_LAYOUT)
-        fig.update_layout(
-            height=120,
-            xaxis=dict(
-                range=[f"{year}-01-01", f"{year}-12-31"],
-                tickformat="%b",
-                dtick="M1",
-                ticklabelmode="period",
-                showgrid=True,
-                gridcolor="#f0e8d8",
-                zeroline=False,
-            ),
-            yaxis=dict(visible=False, range=[-1, 1]),
-            annotations=[dict(
-                text="Select plants from the sidebar to see planting windows",
-                xref="paper", yref="paper", x=0.5, y=0.5,
-                showarrow=False,
-                font=dict(size=12, color=COLORS["muted"], family="Lato"),
-            )],
-        )
-        fig.add_shape(
-            type="line", xref="x", yref="paper",
-            x0=today_str, x1=today_str, y0=0, y1=1,
-            line=dict(color=COLORS["terracotta"], width=1.5, dash="dash"),
-            opacity=0.8,
-        )
-        fig.add_annotation(
-            x=today_str, xref="x", yref="paper", y=1.02,
-            text="Today", showarrow=False,
-            font=dict(size=9, color=COLORS["terracotta"]),
-            xanchor="center",
-        )
-        return fig
+        return empty_gantt_figure()
 
-    con = get_con()
-    ph = ",".join(["?"] * len(selected_plants))
-    df = con.execute(f"""
-        SELECT p.common_name, p.growing_season,
-               pg.planting_start, pg.outdoor_start, pg.planting_end,
-               p.attracts_bees, p.attracts_butterflies, p.attracts_hummingbirds
-        FROM plants p
-        JOIN planting_gantt pg
-          ON p.growing_season = pg.growing_season
-         AND p.harvest_type   = pg.harvest_type
-        WHERE pg.city = ? AND p.common_name IN ({ph})
-        ORDER BY p.growing_season, p.common_name
-    """, [selected_city] + selected_plants).df()
-    con.close()
+    df = query_gantt(selected_city, selected_plants)
 
-    if df.empty:
+    if not n_rows(df):
         return {}
 
-    for col in ["planting_start", "outdoor_start", "planting_end"]:
-        df[col] = pd.to_datetime(df[col])
-
-    rows = []
-    pollinator_labels = {}  # common_name -> emoji string
-    for _, row in df.iterrows():
-        if row["planting_start"] < row["outdoor_start"]:
-            rows.append({
-                "Task": row["common_name"], "Season": row["growing_season"],
-                "Start": row["planting_start"], "Finish": row["outdoor_start"],
-                "Segment": "Indoor start",
-            })
-        rows.append({
-            "Task": row["common_name"], "Season": row["growing_season"],
-            "Start": row["outdoor_start"], "Finish": row["planting_end"],
-            "Segment": "Outdoor",
-        })
-        icons = "".join(filter(None, [
-            "🐝" if row.get("attracts_bees") else "",
-            "🦋" if row.get("attracts_butterflies") else "",
-            "🌺" if row.get("attracts_hummingbirds") else "",
-        ]))
-        if icons:
-            pollinator_labels[row["common_name"]] = {"icons": icons}
-
-    tdf = pd.DataFrame(rows)
-    fig = px.timeline(
-        tdf, x_start="Start", x_end="Finish", y="Task",
-        color="Season", color_discrete_map=GANTT_COLORS,
-        pattern_shape="Segment",
-        pattern_shape_map={"Indoor start": "/", "Outdoor": ""},
-        labels={"Task": ""},
-    )
-    fig.update_yaxes(autorange="reversed")
-
-    # Static full-year x-axis — always Jan 1 to Dec 31 of current year
-    year = datetime.now().year
-    fig.update_xaxes(
-        range=[f"{year}-01-01", f"{year}-12-31"],
-        tickformat="%b",
-        dtick="M1",
-        ticklabelmode="period",
-        showgrid=True,
-        gridcolor="#f0e8d8",
-        zeroline=False,
-    )
-
-    # Pollinator icons — fixed just right of y-axis labels, one per plant row
-    for plant_name, info in pollinator_labels.items():
-        fig.add_annotation(
-            x=0, xref="paper",
-            y=plant_name, yref="y",
-            text=info["icons"],
-            showarrow=False,
-            font=dict(size=11),
-            xanchor="right",
-            yanchor="middle",
-            xshift=-90,
-        )
-
-    # Today marker
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    fig.add_shape(
-        type="line", xref="x", yref="paper",
-        x0=today_str, x1=today_str, y0=0, y1=1,
-        line=dict(color=COLORS["terracotta"], width=1.5, dash="dash"),
-        opacity=0.8,
-    )
-    fig.add_annotation(
-        x=today_str, xref="x", yref="paper", y=1.02,
-        text="Today", showarrow=False,
-        font=dict(size=9, color=COLORS["terracotta"]),
-        xanchor="center",
-    )
-
-    fig.update_layout(**CHART_LAYOUT)
-    fig.update_layout(
-        height=max(160, len(selected_plants) * 46),
-        margin=dict(l=120, r=10, t=30, b=20),
-    )
-    return fig
+    return gantt_figure(df, len(selected_plants))
 
 
 # ── Export CSV ────────────────────────────────────────────────────────────────
@@ -1411,12 +901,13 @@ def update_gantt(selected_city, selected_plants):
     State("city-dropdown", "value"),
     prevent_initial_call=True,
 )
+@instrumented
 def export_selected_plants(_, selected_plants, selected_city):
     if not selected_plants:
         return None
     con = get_con()
     ph = ",".join(["?"] * len(selected_plants))
-    df = con.execute(f"""
+    rows = con.execute(f"""
         SELECT p.common_name AS "Plant", p.plant_family AS "Family",
                p.growing_season AS "Season", p.harvest_type AS "Type",
                p.ideal_temp_min_f AS "Ideal Min", p.ideal_temp_max_f AS "Ideal Max",
@@ -1435,32 +926,27 @@ def export_selected_plants(_, selected_plants, selected_city):
          AND p.harvest_type   = pg.harvest_type
         WHERE pg.city = ? AND p.common_name IN ({ph})
         ORDER BY p.common_name
-    """, [selected_city] + selected_plants).df()
-    con.close()
-    return dcc.send_data_frame(df.to_csv, "selected_plants.csv", index=False)
-
-
-# ── Scheduler ─────────────────────────────────────────────────────────────────
-def refresh_forecast():
-    try:
-        print("Starting scheduled forecast ingest...")
-        run_forecast_ingest()
-        print("Scheduled ingest complete")
-    except Exception as e:
-        print(f"Ingest failed safely: {e}")
+    """, [selected_city] + selected_plants).fetchall()
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(d[0] for d in con.description)
+    writer.writerows(rows)
+    return dcc.send_string(out.getvalue(), "selected_plants.csv")
 
 
-if os.environ.get("WEB_CONCURRENCY", "1") == "1":
-    try:
-        scheduler = BackgroundScheduler(
-            daemon=True,
-            timezone=pytz.timezone("America/Los_Angeles"),
-        )
-        scheduler.add_job(refresh_forecast, "cron", hour=6, minute=0)
-        scheduler.start()
-        print("Scheduler started — daily at 6am Pacific")
-    except Exception as e:
-        print(f"Scheduler failed to start: {e}")
+# ── Warm-up ──────────────────────────────────────────────────────────────────
+def warm():
+    """
+    Pay first-use costs (pandas, subplot axes, layout JSON) now. Called by
+    gunicorn.conf.py in the master under --preload, so forked workers start warm.
+    Opens no database connection: those are per process (see db.py).
+    """
+    # DuckDB's client imports pandas (when installed) the first time it binds
+    # query parameters, so callbacks still pay for it once per process
+    importlib.import_module("pandas")
+    charts.warm()
+    with server.test_request_context():
+        app.serve_layout()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+# cache.py
+# Memoization layer for dashboard queries
+# Results are keyed by query name + parameters + database generation + today's
+# date (queries use CURRENT_DATE). Entries are evicted least-recently-used past
+# MAX_ENTRIES / MAX_BYTES, and the whole cache drops when a new generation lands.
+# db.py's watcher calls rewarm() on a publish, so the entries users were
+# hitting are recomputed in the background rather than on their next click.
+# Cached column dicts share their arrays with every caller: add or replace
+# keys on the copy you get, never write into the arrays.
+
+import sys
+import threading
+import functools
+import numpy as np
+from collections import OrderedDict
+from datetime import date
+from dashboard.db import generation, on_reload
+
+MAX_ENTRIES    = 512
+MAX_BYTES      = 64 * 1024 * 1024
+REWARM_ENTRIES = 64   # most recently used entries recomputed after a reload
+
+_lock       = threading.Lock()
+_entries    = OrderedDict()   # key → (value, nbytes)
+_bytes      = 0
+_generation = None
+_functions  = {}              # name → memoized function, for rewarm()
+
+stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "rewarms": 0}
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+def _freeze(value):
+    """Make list arguments (e.g. selected plants) usable in a cache key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _is_frame(value):
+    # pandas may not be loaded yet (the dashboard imports it lazily); if it
+    # isn't, value can't be a DataFrame
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
+def _sizeof(value):
+    if _is_frame(value):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(sys.getsizeof(v) for v in value.tolist())
+        return value.nbytes
+    if isinstance(value, dict):
+        # Column dicts (charts.columns); figure dicts are counted shallowly
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value.values() if isinstance(v, np.ndarray))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Hand out cheap copies so callers can add/replace columns freely."""
+    if _is_frame(value):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+def _evict():
+    global _bytes
+    while _entries and (len(_entries) > MAX_ENTRIES or _bytes > MAX_BYTES):
+        _, (_, nbytes) = _entries.popitem(last=False)
+        _bytes -= nbytes
+        stats["evictions"] += 1
+
+
+def _sync_generation(gen):
+    """Drop everything when the database generation changes."""
+    global _generation, _bytes
+    if gen != _generation:
+        if _entries:
+            stats["invalidations"] += 1
+        _entries.clear()
+        _bytes      = 0
+        _generation = gen
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+def cached(fn):
+    """Memoize a query function on (name, args, generation, today)."""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        global _bytes
+        gen = generation()
+        key = (fn.__name__, _freeze(args), date.today())
+
+        with _lock:
+            _sync_generation(gen)
+            if key in _entries:
+                _entries.move_to_end(key)
+                stats["hits"] += 1
+                return _copy(_entries[key][0])
+            stats["misses"] += 1
+
+        value  = fn(*args)
+        nbytes = _sizeof(value)
+
+        with _lock:
+            # Don't store a result computed against a generation that has
+            # since been replaced
+            if gen == _generation and nbytes <= MAX_BYTES:
+                if key in _entries:
+                    _bytes -= _entries[key][1]
+                _entries[key] = (value, nbytes)
+                _bytes += nbytes
+                _evict()
+        return _copy(value)
+
+    _functions[fn.__name__] = wrapper
+    return wrapper
+
+
+def clear():
+    global _bytes
+    with _lock:
+        _entries.clear()
+        _bytes = 0
+
+
+def size():
+    """(entries, estimated bytes) currently held."""
+    with _lock:
+        return len(_entries), _bytes
+
+
+@on_reload
+def rewarm(limit=REWARM_ENTRIES):
+    """Drop every entry, then recompute the `limit` most recently used ones."""
+    global _bytes
+    with _lock:
+        hot = [(name, args) for name, args, day in reversed(_entries) if day == date.today()]
+        _entries.clear()
+        _bytes = 0
+        stats["invalidations"] += 1
+    for name, args in hot[:limit]:
+        _functions[name](*args)
+        stats["rewarms"] += 1
@@ -0,0 +1,611 @@
+# charts.py
+# Figure builders shared by the dashboard and the model build
+# (model.py pre-renders the seasonal figure per city with these)
+# Builders take whole query results as {column: NumPy array} (see columns())
+# and return figure dicts: traces, annotations and shapes are built from
+# columns in one pass, and the shared look lives in the registered "garden"
+# template instead of being reapplied with update_layout on every call.
+# Dates, times of day and rounding are done in the SQL, so the arrays are
+# plot-ready; no DataFrames on the request path.
+
+import functools
+import numpy as np
+import plotly.io as pio
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
+from dashboard.timing import timed
+
+# ── Earthy PNW palette ───────────────────────────────────────────────────────
+COLORS = {
+    "bg":           "#f5f0e8",
+    "panel":        "#ede8dc",
+    "border":       "#c8b89a",
+    "forest":       "#3a5c3a",
+    "moss":         "#6b8f5e",
+    "bark":         "#7a5c3a",
+    "terracotta":   "#c4622d",
+    "slate":        "#4a7a9b",
+    "sage":         "#8aab7a",
+    "gold":         "#c9a84c",
+    "text":         "#2c2416",
+    "muted":        "#7a6a54",
+}
+
+GANTT_COLORS = {
+    "Cool Season": COLORS["slate"],
+    "Warm Season": COLORS["terracotta"],
+    "Perennial":   COLORS["sage"],
+}
+
+CHART_LAYOUT = dict(
+    paper_bgcolor="white",
+    plot_bgcolor="#faf8f4",
+    font=dict(family="Lato, sans-serif", color=COLORS["text"], size=11),
+    title_font=dict(family="Playfair Display, serif", size=15, color=COLORS["text"]),
+    margin=dict(l=20, r=20, t=40, b=20),
+    legend=dict(
+        bgcolor="rgba(245,240,232,0.8)",
+        bordercolor=COLORS["border"],
+        borderwidth=1,
+        font=dict(size=11),
+    )
+)
+
+# ── Template ─────────────────────────────────────────────────────────────────
+# Plotly's default look + CHART_LAYOUT, registered once at import. Figure
+# dicts carry it as JSON (TEMPLATE_JSON); the browser has no named templates.
+TEMPLATE = "garden"
+
+pio.templates[TEMPLATE] = go.layout.Template(pio.templates["plotly"])
+pio.templates[TEMPLATE].layout.update(CHART_LAYOUT)
+TEMPLATE_JSON = pio.templates[TEMPLATE].to_plotly_json()
+
+
+GRID_COLOR = "#f0e8d8"
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+def columns(result):
+    """
+    Fetch a DuckDB result as {column: NumPy array}, the form the builders
+    take. fetchnumpy() returns masked arrays where there are NULLs; those
+    are filled (NaN, NaT, None, False) so plotly gets plain arrays.
+    """
+    return {name: _filled(values) for name, values in result.fetchnumpy().items()}
+
+
+_FILL = {"f": np.nan, "M": np.datetime64("NaT"), "m": np.timedelta64("NaT"), "b": False, "O": None}
+
+
+def _filled(values):
+    if not np.ma.isMaskedArray(values):
+        return values
+    if values.dtype.kind in "iu":
+        values = values.astype("float64")
+    return values.filled(_FILL.get(values.dtype.kind))
+
+
+def n_rows(cols):
+    """Row count of a columns() result."""
+    return len(next(iter(cols.values()), ()))
+
+
+def _year_axis(year):
+    """Static Jan 1 – Dec 31 date axis used by the Gantt charts."""
+    return dict(
+        range=[f"{year}-01-01", f"{year}-12-31"],
+        tickformat="%b",
+        dtick="M1",
+        ticklabelmode="period",
+        showgrid=True,
+        gridcolor=GRID_COLOR,
+        zeroline=False,
+    )
+
+
+def _today_marker(color, dash, opacity, xanchor):
+    """Vertical 'Today' line + label as a (shape, annotation) pair."""
+    # Shape + annotation rather than add_vline, to avoid plotly's annotation mean bug
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    shape = dict(
+        type="line", xref="x", yref="paper",
+        x0=today_str, x1=today_str, y0=0, y1=1,
+        line=dict(color=color, width=1.5, dash=dash),
+        opacity=opacity,
+    )
+    annotation = dict(
+        x=today_str, xref="x", yref="paper", y=1.02,
+        text="Today", showarrow=False,
+        font=dict(size=9, color=color),
+        xanchor=xanchor,
+    )
+    return shape, annotation
+
+
+@functools.lru_cache(maxsize=None)
+def _temp_precip_axes():
+    """Axis layout of the 2-row temp/precip subplot grid (computed once)."""
+    from plotly.subplots import make_subplots
+    layout = make_subplots(
+        rows=2, cols=1,
+        row_heights=[0.60, 0.40],
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=("", ""),
+    ).to_plotly_json()["layout"]
+    return {k: v for k, v in layout.items() if k.startswith(("xaxis", "yaxis"))}
+
+
+# ── Temp + Precip + Irrigation ────────────────────────────────────────────────
+@timed("figure")
+def temp_precip_figure(temps):
+    """Weekly avg high/low over weekly precip bars with irrigation badges."""
+    week_labels = temps["week_label"].tolist()
+    needed      = temps["irrigation_needed"]
+    precip      = temps["total_precip"]
+    precip_max  = np.nanmax(precip, initial=0)
+
+    data = [
+        dict(
+            type="scatter", x=week_labels, y=temps["avg_high"],
+            mode="lines+markers+text",
+            name="Avg High",
+            line=dict(color=COLORS["terracotta"], width=2),
+            marker=dict(color=COLORS["terracotta"], size=9),
+            text=[f"{v:.0f}°" for v in temps["avg_high"].tolist()],
+            textposition="top center",
+            textfont=dict(color=COLORS["terracotta"], size=11, family="DM Mono"),
+            xaxis="x", yaxis="y",
+        ),
+        dict(
+            type="scatter", x=week_labels, y=temps["avg_low"],
+            mode="lines+markers+text",
+            name="Avg Low",
+            line=dict(color=COLORS["slate"], width=2),
+            marker=dict(color=COLORS["slate"], size=9),
+            text=[f"{v:.0f}°" for v in temps["avg_low"].tolist()],
+            textposition="bottom center",
+            textfont=dict(color=COLORS["slate"], size=11, family="DM Mono"),
+            xaxis="x", yaxis="y",
+        ),
+        dict(
+            type="bar", x=week_labels, y=precip,
+            name="Weekly Precip (in)",
+            marker=dict(color=COLORS["slate"], opacity=0.8),
+            # Label inside bar if tall enough, handled via texttemplate
+            texttemplate="%{y:.1f}\"",
+            textposition="inside",
+            insidetextanchor="middle",
+            textfont=dict(size=10, family="DM Mono", color="white"),
+            constraintext="none",
+            xaxis="x2", yaxis="y2",
+        ),
+    ]
+
+    # Irrigation status as colored annotations under each precip bar
+    text    = np.where(needed, "Needed", "OK ✓")
+    color   = np.where(needed, COLORS["terracotta"], COLORS["forest"])
+    bgcolor = np.where(needed, "#fff3ee", "#eef6ee")
+    annotations = [
+        dict(
+            x=x, y=-0.25, yref="y2", text=t, showarrow=False,
+            font=dict(size=9, family="Lato", color=c),
+            bgcolor=bg, borderpad=2,
+        )
+        for x, t, c, bg in zip(week_labels, text.tolist(), color.tolist(), bgcolor.tolist())
+    ]
+
+    axes = _temp_precip_axes()
+    layout = dict(
+        template=TEMPLATE_JSON,
+        height=300,
+        showlegend=True,
+        legend=dict(orientation="h", y=1.05, x=0, font=dict(size=10)),
+        margin=dict(l=10, r=10, t=20, b=50),
+        bargap=0.3,
+        xaxis={**axes["xaxis"], "showgrid": False},
+        xaxis2={**axes["xaxis2"], "showgrid": False},
+        yaxis={
+            **axes["yaxis"],
+            "title": {"text": "°F"}, "gridcolor": GRID_COLOR, "zeroline": False,
+        },
+        yaxis2={
+            **axes["yaxis2"],
+            "title": {"text": "in"}, "gridcolor": GRID_COLOR, "zeroline": False,
+            "rangemode": "tozero",
+            "range": [0, precip_max * 1.5] if precip_max > 0 else [0, 1],
+        },
+        annotations=annotations,
+    )
+    return dict(data=data, layout=layout)
+
+
+# ── 10-day forecast ───────────────────────────────────────────────────────────
+@timed("figure")
+def forecast_figure(df):
+    """Daily high/low labels on shaded columns with precip underneath."""
+    date_str = df["day_label"].tolist()
+    temp_max = df["temp_max"]
+    temp_min = df["temp_min"]
+    precip   = df["precipitation"]
+
+    y_min = np.nanmin(temp_min)
+    y_max = np.nanmax(temp_max)
+
+    data = [
+        # Dashed connecting lines (behind text)
+        dict(
+            type="scatter", x=date_str, y=temp_max,
+            mode="lines", showlegend=False,
+            line=dict(color=COLORS["terracotta"], width=1, dash="dot"),
+            opacity=0.35,
+        ),
+        dict(
+            type="scatter", x=date_str, y=temp_min,
+            mode="lines", showlegend=False,
+            line=dict(color=COLORS["slate"], width=1, dash="dot"),
+            opacity=0.35,
+        ),
+        # High temps
+        dict(
+            type="scatter", x=date_str, y=temp_max,
+            mode="text", name="High",
+            text=[f"{int(v)}°" for v in temp_max.tolist()],
+            textposition="top center",
+            textfont=dict(color=COLORS["terracotta"], size=14, family="DM Mono"),
+        ),
+        # Low temps
+        dict(
+            type="scatter", x=date_str, y=temp_min,
+            mode="text", name="Low",
+            text=[f"{int(v)}°" for v in temp_min.tolist()],
+            textposition="bottom center",
+            textfont=dict(color=COLORS["slate"], size=14, family="DM Mono"),
+        ),
+    ]
+
+    # Alternating column background shading
+    shapes = [
+        dict(
+            type="rect", xref="x", yref="y domain",
+            x0=i - 0.5, x1=i + 0.5, y0=0, y1=1,
+            fillcolor="#f8f4ec", opacity=0.6, line=dict(width=0),
+            layer="below",
+        )
+        for i in range(0, len(date_str), 2)
+    ]
+
+    # Precip annotations below x-axis
+    wet    = precip > 0.01
+    labels = np.where(wet, [f"🌧 {p:.2f}\"" for p in precip.tolist()], "☁ —")
+    colors = np.where(wet, COLORS["slate"], COLORS["muted"])
+    annotations = [
+        dict(
+            x=x, y=y_min - 5, text=t, showarrow=False,
+            font=dict(size=9, color=c, family="Lato"),
+        )
+        for x, t, c in zip(date_str, labels.tolist(), colors.tolist())
+    ]
+
+    layout = dict(
+        template=TEMPLATE_JSON,
+        height=190,
+        showlegend=True,
+        legend=dict(orientation="h", y=1.1, x=0, font=dict(size=10)),
+        margin=dict(l=10, r=10, t=20, b=40),
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(
+            showgrid=True, gridcolor=GRID_COLOR, zeroline=False,
+            range=[y_min - 10, y_max + 10],
+            tickfont=dict(size=9),
+        ),
+        shapes=shapes,
+        annotations=annotations,
+    )
+    return dict(data=data, layout=layout)
+
+
+# ── Seasonal conditions ───────────────────────────────────────────────────────
+@timed("figure")
+def seasonal_figure(sun, soil, freeze):
+    """
+    Sun times, twilight, avg temps and soil temp for a year — no 'today' marker.
+    Sun times come in as decimal hours (e.g. 06:30 → 6.5).
+    """
+
+    fig = go.Figure()
+
+    # Shaded daylight band between morning and evening twilight
+    if "morning_twilight" in sun and "evening_twilight" in sun:
+        mt = sun["morning_twilight"]
+        et = sun["evening_twilight"]
+        if not np.isnan(mt).all() and not np.isnan(et).all():
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([sun["date"], sun["date"][::-1]]),
+                y=np.concatenate([mt, et[::-1]]),
+                fill="toself",
+                fillcolor="rgba(201,168,76,0.08)",
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo="skip",
+            ))
+
+    # Morning twilight
+    if "morning_twilight" in sun:
+        fig.add_trace(go.Scatter(
+            x=sun["date"], y=sun["morning_twilight"],
+            mode="lines", name="Morning Twilight",
+            line=dict(color=COLORS["gold"], width=1.2, dash="dash"),
+            opacity=0.85,
+        ))
+
+    # Sunrise
+    if "sunrise" in sun:
+        fig.add_trace(go.Scatter(
+            x=sun["date"], y=sun["sunrise"],
+            mode="lines", name="Sunrise",
+            line=dict(color="#e07b39", width=2),
+            opacity=0.9,
+        ))
+
+    # Sunset
+    if "sunset" in sun:
+        fig.add_trace(go.Scatter(
+            x=sun["date"], y=sun["sunset"],
+            mode="lines", name="Sunset",
+            line=dict(color="#e07b39", width=2),
+            opacity=0.9,
+        ))
+
+    # Evening twilight
+    if "evening_twilight" in sun:
+        fig.add_trace(go.Scatter(
+            x=sun["date"], y=sun["evening_twilight"],
+            mode="lines", name="Evening Twilight",
+            line=dict(color=COLORS["gold"], width=1.2, dash="dash"),
+            opacity=0.85,
+        ))
+
+    # Avg temp band + soil temp — secondary Y axis (0–100°F)
+    if n_rows(soil):
+        # Shaded avg temp band (high/low)
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([soil["date"], soil["date"][::-1]]),
+            y=np.concatenate([soil["avg_max_temp"], soil["avg_min_temp"][::-1]]),
+            fill="toself",
+            fillcolor="rgba(196,98,45,0.08)",
+            line=dict(width=0),
+            name="Avg Temp Range",
+            showlegend=True,
+            hoverinfo="skip",
+            yaxis="y2",
+        ))
+        # Avg high
+        fig.add_trace(go.Scatter(
+            x=soil["date"], y=soil["avg_max_temp"],
+            mode="lines", name="Avg High °F",
+            line=dict(color=COLORS["terracotta"], width=1.5, dash="dot"),
+            opacity=0.7,
+            yaxis="y2",
+        ))
+        # Avg low
+        fig.add_trace(go.Scatter(
+            x=soil["date"], y=soil["avg_min_temp"],
+            mode="lines", name="Avg Low °F",
+            line=dict(color=COLORS["slate"], width=1.5, dash="dot"),
+            opacity=0.7,
+            yaxis="y2",
+        ))
+        # Shallow soil temp
+        fig.add_trace(go.Scatter(
+            x=soil["date"], y=soil["avg_shallow_soil_temp"],
+            mode="lines", name="Shallow Soil °F",
+            line=dict(color=COLORS["moss"], width=2),
+            opacity=0.9,
+            yaxis="y2",
+        ))
+
+    # Last freeze — quieter, muted
+    if freeze:
+        freeze_date = freeze[0]
+        fig.add_shape(
+            type="rect", xref="x", yref="paper",
+            x0=(freeze_date - timedelta(days=5)).strftime("%Y-%m-%d"),
+            x1=(freeze_date + timedelta(days=5)).strftime("%Y-%m-%d"),
+            y0=0, y1=1,
+            fillcolor=COLORS["muted"], opacity=0.06,
+            line_width=0,
+        )
+        fig.add_shape(
+            type="line", xref="x", yref="paper",
+            x0=freeze_date.strftime("%Y-%m-%d"),
+            x1=freeze_date.strftime("%Y-%m-%d"),
+            y0=0, y1=1,
+            line=dict(color=COLORS["muted"], width=1, dash="dot"),
+            opacity=0.5,
+        )
+        fig.add_annotation(
+            x=freeze_date.strftime("%Y-%m-%d"), xref="x", yref="paper", y=1.02,
+            text=f"Avg Last Freeze · {freeze_date.strftime('%b %d')}",
+            showarrow=False,
+            font=dict(size=9, color=COLORS["muted"]),
+            xanchor="right",
+        )
+
+    # Left Y axis: time of day (0–24h), midnight at top
+    tick_vals = [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24]
+    tick_text = ["12am", "2am", "4am", "6am", "8am", "10am",
+                 "12pm", "2pm", "4pm", "6pm", "8pm", "10pm", "12am"]
+
+    fig.update_layout(
+        template=TEMPLATE,
+        height=420,
+        margin=dict(l=10, r=60, t=20, b=20),
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(
+            tickvals=tick_vals,
+            ticktext=tick_text,
+            gridcolor=GRID_COLOR,
+            zeroline=False,
+            title="Time of Day",
+            range=[24, 0],
+        ),
+        yaxis2=dict(
+            title="°F",
+            overlaying="y",
+            side="right",
+            showgrid=False,
+            range=[0, 100],
+            tickvals=[0, 20, 40, 60, 80, 100],
+            color=COLORS["muted"],
+        ),
+        legend=dict(orientation="h", y=1.08, x=0, font=dict(size=10)),
+    )
+
+    return fig
+
+
+@timed("figure")
+def with_today_marker(fig):
+    """Copy of a seasonal figure dict with the dotted 'Today' line added."""
+    layout = fig.get("layout", {})
+    shape, annotation = _today_marker(COLORS["forest"], "dot", 0.7, "left")
+    return {
+        **fig,
+        "layout": {
+            **layout,
+            "shapes":      [shape] + list(layout.get("shapes", [])),
+            "annotations": [annotation] + list(layout.get("annotations", [])),
+        },
+    }
+
+
+# ── Gantt ─────────────────────────────────────────────────────────────────────
+SEGMENT_PATTERNS = {"Indoor start": "/", "Outdoor": ""}
+
+
+@timed("figure")
+def empty_gantt_figure():
+    """Blank full-year axis with a hint, shown before any plant is selected."""
+    year = datetime.now().year
+    shape, today = _today_marker(COLORS["terracotta"], "dash", 0.8, "center")
+    # Dummy invisible scatter to force datetime x-axis type
+    data = [dict(
+        type="scatter",
+        x=[f"{year}-01-01", f"{year}-12-31"],
+        y=[0, 0],
+        mode="markers",
+        marker=dict(opacity=0),
+        showlegend=False,
+        hoverinfo="skip",
+    )]
+    layout = dict(
+        template=TEMPLATE_JSON,
+        height=120,
+        xaxis=_year_axis(year),
+        yaxis=dict(visible=False, range=[-1, 1]),
+        annotations=[
+            dict(
+                text="Select plants from the sidebar to see planting windows",
+                xref="paper", yref="paper", x=0.5, y=0.5,
+                showarrow=False,
+                font=dict(size=12, color=COLORS["muted"], family="Lato"),
+            ),
+            today,
+        ],
+        shapes=[shape],
+    )
+    return dict(data=data, layout=layout)
+
+
+def _gantt_segments(df):
+    """
+    One row per bar: an optional indoor-start segment followed by the outdoor
+    segment for each plant, in plant order (what px.timeline was fed).
+    """
+    plant  = np.arange(n_rows(df))
+    indoor = np.flatnonzero(df["planting_start"] < df["outdoor_start"])
+    rows   = np.concatenate([indoor, plant])
+    order  = np.argsort(np.concatenate([indoor * 2, plant * 2 + 1]), kind="stable")
+    return {
+        "Task":    df["common_name"][rows][order],
+        "Season":  df["growing_season"][rows][order],
+        "Start":   np.concatenate([df["planting_start"][indoor], df["outdoor_start"]])[order],
+        "Finish":  np.concatenate([df["outdoor_start"][indoor], df["planting_end"]])[order],
+        "Segment": np.array(["Indoor start"] * len(indoor) + ["Outdoor"] * len(plant), dtype=object)[order],
+    }
+
+
+@timed("figure")
+def gantt_figure(df, n_plants):
+    """Planting windows per plant, colored by season, hatched while indoors."""
+    seg = _gantt_segments(df)
+
+    # Trace order matches px.timeline: seasons, then segments, by first appearance
+    season_rank  = {v: i for i, v in enumerate(dict.fromkeys(seg["Season"].tolist()))}
+    segment_rank = {v: i for i, v in enumerate(dict.fromkeys(seg["Segment"].tolist()))}
+    keys = sorted(
+        dict.fromkeys(zip(seg["Season"].tolist(), seg["Segment"].tolist())),
+        key=lambda k: (season_rank[k[0]], segment_rank[k[1]]),
+    )
+    groups = [
+        (key, (seg["Season"] == key[0]) & (seg["Segment"] == key[1]))
+        for key in keys
+    ]
+    data = [
+        dict(
+            type="bar",
+            base=seg["Start"][rows],
+            x=(seg["Finish"][rows] - seg["Start"][rows]) // np.timedelta64(1, "ms"),
+            y=seg["Task"][rows],
+            orientation="h",
+            name=f"{season}, {segment}",
+            legendgroup=f"{season}, {segment}",
+            marker=dict(color=GANTT_COLORS.get(season), pattern=dict(shape=SEGMENT_PATTERNS[segment])),
+            hovertemplate=(
+                f"Season={season}<br>Segment={segment}"
+                "<br>Start=%{base}<br>Finish=%{x}<br>=%{y}<extra></extra>"
+            ),
+            showlegend=True,
+            textposition="auto",
+            xaxis="x", yaxis="y",
+        )
+        for (season, segment), rows in groups
+    ]
+
+    # Pollinator icons — fixed just right of y-axis labels, one per plant row
+    first  = np.sort(np.unique(df["common_name"], return_index=True)[1])
+    icons  = np.full(len(first), "", dtype=object)
+    for col, icon in (("attracts_bees", "🐝"), ("attracts_butterflies", "🦋"), ("attracts_hummingbirds", "🌺")):
+        if col in df:
+            icons = icons + np.where(df[col][first].astype(bool), icon, "")
+    annotations = [
+        dict(
+            x=0, xref="paper", y=name, yref="y", text=text,
+            showarrow=False, font=dict(size=11),
+            xanchor="right", yanchor="middle", xshift=-90,
+        )
+        for name, text in zip(df["common_name"][first].tolist(), icons.tolist())
+        if text
+    ]
+
+    shape, today = _today_marker(COLORS["terracotta"], "dash", 0.8, "center")
+    layout = dict(
+        template=TEMPLATE_JSON,
+        xaxis=dict(anchor="y", domain=[0.0, 1.0], type="date", **_year_axis(datetime.now().year)),
+        yaxis=dict(anchor="x", domain=[0.0, 1.0], title=dict(text=""), autorange="reversed"),
+        legend=dict(title=dict(text="Season, Segment"), tracegroupgap=0),
+        barmode="overlay",
+        height=max(160, n_plants * 46),
+        margin=dict(l=120, r=10, t=30, b=20),
+        shapes=[shape],
+        annotations=annotations + [today],
+    )
+    return dict(data=data, layout=layout)
+
+
+# ── Warm-up ──────────────────────────────────────────────────────────────────
+def warm():
+    """Pay the first-use cost of the subplot axes now."""
+    _temp_precip_axes()
@@ -0,0 +1,131 @@
+# db.py
+# Process-wide DuckDB access for the dashboard
+# Opens the live database generation once per worker process and hands each
+# thread its own cursor, so gthread workers can run callbacks concurrently.
+# A watcher thread per process polls the generation pointer (see
+# scripts/generations.py) every RELOAD_POLL_S seconds; when a refresh
+# publishes, new cursors move to the new file and the on_reload() hooks run
+# (cache.py drops and rewarms its entries). In-flight queries finish on the
+# old connection. Cursors are wrapped for phase timing (see timing.py) and
+# slow-query capture (scripts/slowlog.py).
+
+import os
+import time
+import threading
+import duckdb
+from scripts.generations import current_path
+from scripts.slowlog import SlowQueryCursor
+from dashboard.timing import TimedCursor
+
+RELOAD_POLL_S = float(os.environ.get("RELOAD_POLL_S", "1"))
+
+_lock     = threading.Lock()
+_local    = threading.local()
+_conn     = None
+_conn_key = None
+_override = None    # fixed database file instead of the live generation
+_key      = None    # live database identity, kept current by the watcher
+_watching = False   # watcher thread running in this process
+_hooks    = []      # called (on the watcher thread) after a generation change
+
+
+def use_database(path=None):
+    """Read `path` instead of the live generation (benchmarks); None to reset."""
+    global _override, _key
+    _override = path
+    if _watching:
+        try:
+            _key = _file_key()
+        except OSError:
+            _key = None   # nothing built yet; the watcher picks it up later
+
+
+def _file_key():
+    """Identity of the live database: process (fork safety), path + file identity."""
+    path = _override or current_path()
+    st = os.stat(path)
+    return (os.getpid(), path, st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+# ── Generation watcher ───────────────────────────────────────────────────────
+def on_reload(fn):
+    """Register fn() to run in the background whenever the generation changes."""
+    _hooks.append(fn)
+    return fn
+
+
+def _poll():
+    global _key
+    while True:
+        time.sleep(RELOAD_POLL_S)
+        try:
+            key = _file_key()
+        except OSError:
+            continue   # between a publish and a prune; look again next tick
+        if key == _key:
+            continue
+        _key = key
+        print(f"db: new database generation {os.path.basename(key[1])}")
+        for fn in _hooks:
+            try:
+                fn()
+            except Exception as e:
+                print(f"db: reload hook {fn.__name__} failed: {e}")
+
+
+def _live_key():
+    """Current database identity; starts this process's watcher on first use."""
+    global _key, _watching
+    if not _watching:
+        with _lock:
+            if not _watching:
+                _key      = _file_key()
+                _watching = True
+                threading.Thread(target=_poll, name="db-reload", daemon=True).start()
+    if _key is None:
+        _key = _file_key()   # reset while nothing was built; raises until there is
+    return _key
+
+
+def _after_fork():
+    # Threads don't survive fork: a preloaded master's watcher isn't ours
+    global _watching, _key
+    _watching = False
+    _key      = None
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+# ── Connections ──────────────────────────────────────────────────────────────
+def _connection(key):
+    """Return the shared connection, reopening it if the file has changed."""
+    global _conn, _conn_key
+    with _lock:
+        if _conn is None or _conn_key != key:
+            # Don't close the old connection: other threads may still be
+            # mid-query on cursors from it. It is freed with its last cursor.
+            # Except when the same path was replaced in place (the legacy
+            # single file, a use_database() override): DuckDB keeps one
+            # instance per path and would hand back the old file's, so that
+            # one is closed first, cursors and in-flight queries with it.
+            if _conn is not None and _conn_key[1] == key[1]:
+                _conn.close()
+            _conn     = duckdb.connect(key[1], read_only=True)
+            _conn_key = key
+        return _conn, _conn_key
+
+
+def get_cursor():
+    """Thread-local read-only cursor on the current database file."""
+    key = _live_key()
+    if getattr(_local, "key", None) != key:
+        conn, conn_key = _connection(key)
+        _local.cursor = TimedCursor(SlowQueryCursor(conn.cursor(), "app"))
+        _local.key    = conn_key
+    return _local.cursor
+
+
+def generation():
+    """Opaque ID of the live database generation; changes on every publish."""
+    return _live_key()[1:]
@@ -0,0 +1,200 @@
+# metrics.py
+# In-process request metrics for the dashboard, served as Prometheus text
+# Callbacks are wrapped with instrumented() and query functions with
+# timed_query(); the Flask server gets a /metrics route and an after_request
+# hook for payload sizes via init_app(). Each worker process keeps its own
+# counters, so scrape every worker (or run one) for complete numbers. The
+# refresh metrics come from the refresh worker's status file instead.
+# Recording a sample is a lock, a bisect and a few dict updates (~µs).
+
+import time
+import bisect
+import threading
+import functools
+from flask import Response, g, has_request_context
+from dashboard import cache
+from dashboard.timing import recording
+from scripts.refresh_worker import read_status
+
+# Prometheus' default latency buckets (seconds) and payload buckets (bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS   = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+PHASES          = ("query", "dataframe", "figure")
+
+_lock       = threading.Lock()
+_counters   = {}   # (metric, labels) → value
+_histograms = {}   # (metric, labels) → [bucket counts..., sum, count]
+
+_HELP = {
+    "dashboard_callback_requests_total":  ("counter",   "Callback invocations"),
+    "dashboard_callback_errors_total":    ("counter",   "Callbacks that raised"),
+    "dashboard_callback_seconds":         ("histogram", "Callback latency"),
+    "dashboard_callback_phase_seconds_total":
+                                          ("counter",   "Callback time by phase (query, dataframe, figure)"),
+    "dashboard_query_seconds":            ("histogram", "DuckDB time per named query (cache misses only)"),
+    "dashboard_response_bytes":           ("histogram", "Callback response payload size"),
+}
+
+
+# ── Recording ────────────────────────────────────────────────────────────────
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def _inc(metric, value=1, **labels):
+    key = (metric, _labels(**labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _observe(metric, value, buckets, **labels):
+    key = (metric, _labels(**labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(buckets) + 3)
+        h[bisect.bisect_left(buckets, value)] += 1
+        h[-2] += value
+        h[-1] += 1
+
+
+def instrumented(fn):
+    """Count, time and phase-split a Dash callback."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if has_request_context():
+            g.callback = name
+        start = time.perf_counter()
+        try:
+            with recording() as phases:
+                return fn(*args, **kwargs)
+        except Exception:
+            _inc("dashboard_callback_errors_total", callback=name)
+            raise
+        finally:
+            _inc("dashboard_callback_requests_total", callback=name)
+            _observe("dashboard_callback_seconds", time.perf_counter() - start,
+                     LATENCY_BUCKETS, callback=name)
+            for ph in PHASES:
+                if ph in phases:
+                    _inc("dashboard_callback_phase_seconds_total", phases[ph],
+                         callback=name, phase=ph)
+
+    return wrapper
+
+
+def timed_query(fn):
+    """Time a query function; put it under @cached so only misses are timed."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            _observe("dashboard_query_seconds", time.perf_counter() - start,
+                     LATENCY_BUCKETS, query=name)
+
+    return wrapper
+
+
+# ── Exposition ───────────────────────────────────────────────────────────────
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _header(lines, metric, kind=None, text=None):
+    kind, text = _HELP.get(metric, (kind, text))
+    lines.append(f"# HELP {metric} {text}")
+    lines.append(f"# TYPE {metric} {kind}")
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters   = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    lines = []
+
+    for metric in sorted({m for m, _ in counters}):
+        _header(lines, metric)
+        for (m, labels), value in sorted(counters.items()):
+            if m == metric:
+                lines.append(f"{metric}{_fmt_labels(labels)} {value:g}")
+
+    for metric in sorted({m for m, _ in histograms}):
+        buckets = BYTES_BUCKETS if metric.endswith("_bytes") else LATENCY_BUCKETS
+        _header(lines, metric)
+        for (m, labels), h in sorted(histograms.items()):
+            if m != metric:
+                continue
+            running = 0
+            for bound, n in zip(buckets + ("+Inf",), h):
+                running += n
+                lines.append(f"{metric}_bucket{_fmt_labels(labels, le=bound)} {running}")
+            lines.append(f"{metric}_sum{_fmt_labels(labels)} {h[-2]:g}")
+            lines.append(f"{metric}_count{_fmt_labels(labels)} {h[-1]}")
+
+    # Query cache (dashboard/cache.py)
+    stats   = dict(cache.stats)
+    lookups = stats["hits"] + stats["misses"]
+    for key, value in stats.items():
+        _header(lines, f"dashboard_cache_{key}_total", "counter", f"Query cache {key}")
+        lines.append(f"dashboard_cache_{key}_total {value}")
+    _header(lines, "dashboard_cache_hit_ratio", "gauge", "Query cache hits / lookups")
+    lines.append(f"dashboard_cache_hit_ratio {stats['hits'] / lookups if lookups else 0:g}")
+    entries, nbytes = cache.size()
+    _header(lines, "dashboard_cache_entries", "gauge", "Query cache entries")
+    lines.append(f"dashboard_cache_entries {entries}")
+    _header(lines, "dashboard_cache_bytes", "gauge", "Query cache size estimate")
+    lines.append(f"dashboard_cache_bytes {nbytes}")
+
+    # Last forecast refresh (scripts/refresh_worker.py status file)
+    status = read_status()
+    _header(lines, "dashboard_refresh_runs_total", "counter", "Refresh runs started")
+    lines.append(f"dashboard_refresh_runs_total {status.get('runs', 0)}")
+    _header(lines, "dashboard_refresh_failures_total", "counter", "Refresh runs that failed")
+    lines.append(f"dashboard_refresh_failures_total {status.get('failures', 0)}")
+    _header(lines, "dashboard_refresh_running", "gauge", "1 while a refresh is in progress")
+    lines.append(f"dashboard_refresh_running {int(status.get('state') == 'running')}")
+    if "last_outcome" in status:
+        _header(lines, "dashboard_refresh_last_success", "gauge", "1 if the last finished refresh succeeded")
+        lines.append(f"dashboard_refresh_last_success {int(status['last_outcome'] == 'ok')}")
+        _header(lines, "dashboard_refresh_last_duration_seconds", "gauge", "Duration of the last finished refresh")
+        lines.append(f"dashboard_refresh_last_duration_seconds {status['duration_s']:g}")
+        _header(lines, "dashboard_refresh_last_timestamp_seconds", "gauge", "Unix time the last refresh finished")
+        lines.append(f"dashboard_refresh_last_timestamp_seconds {status['finished']:.3f}")
+    if "last_success" in status:
+        _header(lines, "dashboard_refresh_last_success_timestamp_seconds", "gauge",
+                "Unix time of the last successful refresh")
+        lines.append(f"dashboard_refresh_last_success_timestamp_seconds {status['last_success']:.3f}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ── Flask wiring ─────────────────────────────────────────────────────────────
+def init_app(server):
+    """Add /metrics and response-size tracking to the Dash app's Flask server."""
+
+    @server.after_request
+    def _payload_bytes(response):
+        name = g.get("callback")
+        if name and not response.direct_passthrough:
+            _observe("dashboard_response_bytes", response.calculate_content_length() or 0,
+                     BYTES_BUCKETS, callback=name)
+        return response
+
+    @server.route("/metrics")
+    def _metrics():
+        return Response(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,87 @@
+# timing.py
+# Thread-local phase timing for dashboard callbacks
+# Code marks its phases ("query", "dataframe", "figure") with phase(); the
+# time is only collected on threads inside a recording() block, so outside
+# benchmarks a phase costs one attribute lookup.
+
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+@contextmanager
+def recording():
+    """
+    Collect phase totals (seconds) for everything run inside the block.
+    Nested blocks also add their totals to the enclosing one.
+    """
+    previous = getattr(_local, "phases", None)
+    _local.phases = phases = {}
+    try:
+        yield phases
+    finally:
+        _local.phases = previous
+        if previous is not None:
+            for name, seconds in phases.items():
+                previous[name] = previous.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name):
+    """Attribute the enclosed time to `name` (outermost phase wins when nested)."""
+    phases = getattr(_local, "phases", None)
+    if phases is None or getattr(_local, "active", False):
+        yield
+        return
+    _local.active = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+        _local.active = False
+
+
+def timed(name):
+    """Decorator form of phase()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TimedCursor:
+    """DuckDB cursor proxy: execute/fetch count as "query", .df()/.fetchnumpy() as "dataframe"."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        with phase("query"):
+            self._cursor.execute(*args, **kwargs)
+        return self
+
+    def fetchone(self):
+        with phase("query"):
+            return self._cursor.fetchone()
+
+    def fetchall(self):
+        with phase("query"):
+            return self._cursor.fetchall()
+
+    def df(self):
+        with phase("dataframe"):
+            return self._cursor.df()
+
+    def fetchnumpy(self):
+        with phase("dataframe"):
+            return self._cursor.fetchnumpy()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,13 @@
+# gunicorn.conf.py
+# Read automatically by gunicorn from the project root (see Procfile).
+# With --preload the app is imported once in the master; when_ready() then
+# pays the remaining first-use costs there (dashboard.app.warm), so every
+# forked worker — including ones started by restarts and scale-ups — shares
+# that warmed memory and serves its first request at full speed.
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from dashboard.app import warm
+        warm()
+        server.log.info("Preloaded app warmed")
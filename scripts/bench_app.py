@@ -0,0 +1,285 @@
+# bench_app.py
+# Callback latency benchmark for dashboard/app.py
+# Builds a synthetic weather database of configurable size (cities, years of
+# history, plant catalog), calls every Dash callback directly and reports
+# p50/p95/p99 latency, split into query / dataframe / figure phases (see
+# dashboard/timing.py). "cold" runs clear the query cache before every call,
+# "warm" runs hit it. Results are saved as JSON; --diff compares two runs.
+#
+#   python scripts/bench_app.py --cities 6 --years 85 --plants 300
+#   python scripts/bench_app.py --diff data/bench/app-A.json data/bench/app-B.json
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+import duckdb
+from datetime import date, datetime, timedelta, timezone
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import solar
+from scripts.fetch import CITIES
+from scripts import model
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE      = os.path.dirname(os.path.abspath(__file__))
+_ROOT      = os.path.dirname(_HERE)
+BENCH_DIR  = os.path.join(_ROOT, "data", "bench")
+CSV_PLANTS = os.path.join(_ROOT, "data", "plants.csv")
+
+SOURCE_TABLES = ["raw_weather", "temp_soil_historical", "sun_times", "plants"]
+PHASES        = ["query", "dataframe", "figure"]
+PERCENTILES   = [50, 95, 99]
+
+
+# ── Synthetic database ───────────────────────────────────────────────────────
+def synthetic_locations(n_cities, rng):
+    """The real cities first, then random points inside Oregon."""
+    locations = dict(list(CITIES.items())[:n_cities])
+    for i in range(len(locations), n_cities):
+        locations[f"Site {i + 1:04d}"] = {
+            "latitude":  round(rng.uniform(42.0, 46.2), 4),
+            "longitude": round(rng.uniform(-124.5, -116.5), 4),
+        }
+    return locations
+
+
+def synthetic_plants(n_plants, rng):
+    """Resample the real catalog, suffixing names so every cultivar is unique."""
+    base = pd.read_csv(CSV_PLANTS)
+    idx  = np.concatenate([np.arange(min(n_plants, len(base))),
+                           rng.integers(0, len(base), max(0, n_plants - len(base)))])
+    plants = base.iloc[idx].reset_index(drop=True)
+    copy_no = plants.groupby("common_name").cumcount()
+    plants["common_name"] = np.where(copy_no == 0, plants["common_name"],
+                                     plants["common_name"] + " #" + (copy_no + 1).astype(str))
+    plants["plant_id"] = np.arange(1, len(plants) + 1)
+    return plants
+
+
+def build_database(path, n_cities, years, n_plants, seed=0):
+    """Write the source tables synthetically, then run the real model nodes on them."""
+    rng       = np.random.default_rng(seed)
+    locations = synthetic_locations(n_cities, rng)
+    loc_df    = pd.DataFrame({
+        "city":   list(locations),
+        "offset": rng.normal(0, 3, len(locations)),   # per-city climate shift (°F)
+    })
+    today = date.today()
+    con   = duckdb.connect(path)
+    con.register("loc_df", loc_df)
+    con.execute(f"SELECT setseed({(seed % 1000) / 1000})")
+
+    # Seasonal cycle: -1 mid-January, +1 mid-July; noise ≈ normal(0, 1)
+    season = "-COS(2 * PI() * (DAYOFYEAR(d.date) - 20) / 365.25)"
+    lagged = "-COS(2 * PI() * (DAYOFYEAR(d.date) - 20 - {lag}) / 365.25)"
+    noise  = "((RANDOM() + RANDOM() + RANDOM() + RANDOM()) - 2) * 1.7"
+
+    con.execute(f"""
+        CREATE TABLE temp_soil_historical AS
+        WITH d AS (
+            SELECT CAST(range AS DATE) AS date
+            FROM range(DATE '{date(today.year - years, 1, 1)}', DATE '{today}', INTERVAL 1 DAY)
+        )
+        SELECT
+            d.date,
+            42 + 12 * {season} + l.offset + 5 * {noise} AS temp_min,
+            62 + 18 * {season} + l.offset + 6 * {noise} AS temp_max,
+            52 + 14 * {lagged.format(lag=10)} + l.offset + 2 * {noise} AS soil_temp_0_7cm,
+            52 + 10 * {lagged.format(lag=25)} + l.offset + 1 * {noise} AS soil_temp_7_to_28cm,
+            l.city
+        FROM d CROSS JOIN loc_df l
+    """)
+    con.execute(f"""
+        CREATE TABLE raw_weather AS
+        WITH d AS (
+            SELECT CAST(range AS DATE) AS date
+            FROM range(DATE '{today - timedelta(days=30)}', DATE '{today + timedelta(days=7)}', INTERVAL 1 DAY)
+        )
+        SELECT
+            d.date,
+            ROUND(62 + 18 * {season} + l.offset + 6 * {noise}, 1) AS temp_max,
+            ROUND(42 + 12 * {season} + l.offset + 5 * {noise}, 1) AS temp_min,
+            CASE WHEN RANDOM() < 0.45 - 0.3 * {season}
+                 THEN ROUND(-LN(RANDOM()) * 0.25, 3) ELSE 0 END AS precipitation,
+            l.city
+        FROM d CROSS JOIN loc_df l
+    """)
+    con.unregister("loc_df")
+
+    con.register("sun_df", solar.sun_times(locations))
+    con.execute("""
+        CREATE TABLE sun_times AS
+        SELECT city, date::DATE AS date, sunrise::TIME AS sunrise, sunset::TIME AS sunset,
+               morning_twilight::TIME AS morning_twilight, evening_twilight::TIME AS evening_twilight,
+               solar_noon::TIME AS solar_noon, day_length::TIME AS day_length
+        FROM sun_df
+    """)
+    con.unregister("sun_df")
+    plants_df = synthetic_plants(n_plants, rng)
+    con.register("plants_df", plants_df)
+    con.execute("CREATE TABLE plants AS SELECT * FROM plants_df")
+    con.unregister("plants_df")
+
+    # Everything downstream is built by the real model SQL
+    for table, spec in model.NODES.items():
+        if table not in SOURCE_TABLES:
+            spec["build"](con)
+    model.validate(con)
+    con.close()
+    return list(locations), list(plants_df["common_name"])
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+def callbacks(app, cities, plants, n_selected):
+    """(name, fn(i)) for every callback; i rotates the city between calls."""
+    selected = sorted(plants)[:n_selected]
+    city = lambda i: cities[i % len(cities)]
+    table_rows = [{"Plant": p} for p in selected]
+    normals = [date.today().year - 30, date.today().year - 1]   # a 30-year normals window
+    return [
+        ("populate_city_dropdown", lambda i: app.populate_city_dropdown(None)),
+        ("populate_year_range",    lambda i: app.populate_year_range(None)),
+        ("update_header_date",     lambda i: app.update_header_date(None)),
+        ("update_today_bar",       lambda i: app.update_today_bar(city(i))),
+        ("update_temp_precip",     lambda i: app.update_temp_precip(city(i))),
+        ("update_forecast_chart",  lambda i: app.update_forecast_chart(city(i))),
+        ("update_seasonal_chart",  lambda i: app.update_seasonal_chart(city(i))),
+        ("update_freeze_date",     lambda i: app.update_freeze_date(city(i))),
+        ("update_seasonal_range",  lambda i: app.update_seasonal_chart(city(i), normals)),
+        ("update_freeze_range",    lambda i: app.update_freeze_date(city(i), normals)),
+        ("update_plant_table",     lambda i: app.update_plant_table(city(i), None, None, None)),
+        ("store_selected_plants",  lambda i: app.store_selected_plants(list(range(len(table_rows))), table_rows)),
+        ("update_plant_cards",     lambda i: app.update_plant_cards(city(i), selected)),
+        ("update_gantt",           lambda i: app.update_gantt(city(i), selected)),
+        ("export_selected_plants", lambda i: app.export_selected_plants(1, selected, city(i))),
+    ]
+
+
+def summarize(totals, phases):
+    ms = np.array(totals) * 1000
+    out = {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in PERCENTILES}
+    out["mean_ms"] = round(float(ms.mean()), 3)
+    out["phases_mean_ms"] = {
+        name: round(float(np.mean([ph.get(name, 0.0) for ph in phases])) * 1000, 3)
+        for name in PHASES
+    }
+    out["phases_mean_ms"]["other"] = round(
+        out["mean_ms"] - sum(out["phases_mean_ms"][name] for name in PHASES), 3
+    )
+    return out
+
+
+def run_callbacks(iterations, cities, plants, n_selected):
+    from dashboard import app, cache
+    from dashboard.timing import recording
+
+    results = {}
+    for name, fn in callbacks(app, cities, plants, n_selected):
+        fn(0)   # warm-up: connection, imports, first-call costs
+        results[name] = {}
+        for mode in ("cold", "warm"):
+            totals, phases = [], []
+            if mode == "warm":
+                for i in range(len(cities)):   # prime the cache for every city
+                    fn(i)
+            for i in range(iterations):
+                if mode == "cold":
+                    cache.clear()
+                with recording() as ph:
+                    start = time.perf_counter()
+                    fn(i)
+                    totals.append(time.perf_counter() - start)
+                phases.append(ph)
+            results[name][mode] = summarize(totals, phases)
+        cold, warm = results[name]["cold"], results[name]["warm"]
+        print(f"  {name:<24} cold p50 {cold['p50_ms']:>9.2f} ms  p99 {cold['p99_ms']:>9.2f} ms"
+              f"   warm p50 {warm['p50_ms']:>9.2f} ms")
+    return results
+
+
+def run(args):
+    from dashboard import db
+
+    config = {k: getattr(args, k) for k in ("cities", "years", "plants", "selected", "iterations", "seed")}
+    with tempfile.TemporaryDirectory() as tmp:
+        path  = os.path.join(tmp, "weather.db")
+        start = time.perf_counter()
+        cities, plants = build_database(path, args.cities, args.years, args.plants, args.seed)
+        build_s = time.perf_counter() - start
+        print(f"Synthetic database built in {build_s:.1f}s "
+              f"({os.path.getsize(path) / 1e6:.1f} MB) — benchmarking {len(cities)} cities")
+
+        db.use_database(path)
+        try:
+            results = run_callbacks(args.iterations, cities, plants, args.selected)
+        finally:
+            db.use_database(None)
+
+    report = {
+        "created":  datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config":   config,
+        "build_s":  round(build_s, 3),
+        "versions": {
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "pandas": pd.__version__,
+            "numpy":  np.__version__,
+        },
+        "callbacks": results,
+    }
+    out = args.out or os.path.join(
+        BENCH_DIR, f"app-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved → {out}")
+
+
+# ── Diff ─────────────────────────────────────────────────────────────────────
+def diff(path_a, path_b):
+    """Print per-callback p50/p99 changes between two saved runs."""
+    with open(path_a) as f:
+        a = json.load(f)
+    with open(path_b) as f:
+        b = json.load(f)
+    if a["config"] != b["config"]:
+        print(f"Note: configs differ\n  A: {a['config']}\n  B: {b['config']}")
+
+    print(f"{'callback':<24} {'mode':<5} {'p50 A':>10} {'p50 B':>10} {'Δ':>8} {'p99 A':>10} {'p99 B':>10} {'Δ':>8}")
+    for name in a["callbacks"]:
+        if name not in b["callbacks"]:
+            continue
+        for mode in ("cold", "warm"):
+            ra, rb = a["callbacks"][name][mode], b["callbacks"][name][mode]
+            cells = []
+            for key in ("p50_ms", "p99_ms"):
+                change = (rb[key] - ra[key]) / ra[key] * 100 if ra[key] else 0.0
+                cells.append(f"{ra[key]:>10.2f} {rb[key]:>10.2f} {change:>+7.0f}%")
+            print(f"{name:<24} {mode:<5} {' '.join(cells)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard callbacks on a synthetic database")
+    parser.add_argument("--cities",     type=int, default=6)
+    parser.add_argument("--years",      type=int, default=85)
+    parser.add_argument("--plants",     type=int, default=300)
+    parser.add_argument("--selected",   type=int, default=20, help="plants selected for cards/gantt/export")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed",       type=int, default=0)
+    parser.add_argument("--out",        help="JSON output path (default: data/bench/app-<timestamp>.json)")
+    parser.add_argument("--diff",       nargs=2, metavar=("A", "B"), help="compare two saved runs")
+    args = parser.parse_args()
+
+    if args.diff:
+        diff(*args.diff)
+    else:
+        run(args)
@@ -0,0 +1,171 @@
+# bench_startup.py
+# Worker boot benchmark for dashboard/app.py
+# Starts fresh interpreters and measures, per run:
+#   process_s        interpreter start → app imported (what a plain worker pays)
+#   import_s         `import dashboard.app` alone
+#   first_request_s  first index page + layout + a chart built from scratch
+# and the same first request in a worker forked from a master that imported
+# and warm()ed the app, as gunicorn --preload does. Also lists the slowest
+# imports (python -X importtime). Results are saved as JSON; --diff compares
+# two runs.
+#
+#   python scripts/bench_startup.py --runs 5
+#   python scripts/bench_startup.py --diff data/bench/startup-A.json data/bench/startup-B.json
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import numpy as np
+from datetime import datetime, timezone
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE     = os.path.dirname(os.path.abspath(__file__))
+_ROOT     = os.path.dirname(_HERE)
+BENCH_DIR = os.path.join(_ROOT, "data", "bench")
+
+METRICS = ["process_s", "import_s", "first_request_s", "preload_first_request_s"]
+
+# Runs in the child interpreter; prints one JSON line of timings
+_CHILD = r"""
+import os, sys, json, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import dashboard.app as app
+t1 = time.perf_counter()
+
+def first_request():
+    start = time.perf_counter()
+    import numpy as np
+    from dashboard import charts
+    client = app.server.test_client()
+    client.get("/")
+    client.get("/_dash-layout")
+    if hasattr(charts, "columns"):   # builders take NumPy columns
+        charts.forecast_figure({{
+            "day_label": np.array([f"Jun {{d:02d}}" for d in range(1, 11)], dtype=object),
+            "temp_max": np.full(10, 70.0), "temp_min": np.full(10, 50.0),
+            "precipitation": np.full(10, 0.1),
+        }})
+    else:                            # older trees: pandas DataFrames
+        import pandas as pd
+        charts.forecast_figure(pd.DataFrame({{
+            "date": pd.date_range("2026-06-01", periods=10),
+            "temp_max": 70.0, "temp_min": 50.0, "precipitation": 0.1,
+        }}))
+    return time.perf_counter() - start
+
+if {preload}:
+    getattr(app, "warm", lambda: None)()   # older trees have no warm()
+    r, w = os.pipe()
+    if os.fork() == 0:
+        os.write(w, repr(first_request()).encode())
+        os._exit(0)
+    os.close(w)
+    os.wait()
+    seconds = float(os.read(r, 64))
+    print(json.dumps({{"preload_first_request_s": seconds}}))
+else:
+    print(json.dumps({{"import_s": t1 - t0, "first_request_s": first_request()}}))
+"""
+
+
+def run_once():
+    """One cold interpreter, then one preload-and-fork interpreter."""
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _CHILD.format(root=_ROOT, preload=False)],
+                         capture_output=True, text=True, check=True)
+    total = time.perf_counter() - start
+    sample = json.loads(out.stdout.strip().splitlines()[-1])
+    sample["process_s"] = total - sample["first_request_s"]
+
+    out = subprocess.run([sys.executable, "-c", _CHILD.format(root=_ROOT, preload=True)],
+                         capture_output=True, text=True, check=True)
+    sample.update(json.loads(out.stdout.strip().splitlines()[-1]))
+    return sample
+
+
+def slowest_imports(n=15):
+    """Top-n modules by cumulative import time for `import dashboard.app`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {_ROOT!r}); import dashboard.app"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module":        name.strip(),
+            "depth":         (len(name) - len(name.lstrip())) // 2,
+            "cumulative_ms": int(cum_us) / 1000,
+            "self_ms":       int(self_us) / 1000,
+        })
+    return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:n]
+
+
+def run(args):
+    samples = [run_once() for _ in range(args.runs)]
+    results = {
+        m: {
+            "median_ms": round(float(np.median([s[m] for s in samples])) * 1000, 1),
+            "min_ms":    round(float(np.min([s[m] for s in samples])) * 1000, 1),
+        }
+        for m in METRICS
+    }
+    for m in METRICS:
+        print(f"  {m:<24} median {results[m]['median_ms']:>8.1f} ms   min {results[m]['min_ms']:>8.1f} ms")
+
+    imports = slowest_imports()
+    print("Slowest imports (cumulative):")
+    for row in imports[:8]:
+        print(f"  {row['cumulative_ms']:>8.1f} ms  {'  ' * row['depth']}{row['module']}")
+
+    report = {
+        "created":  datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config":   {"runs": args.runs},
+        "versions": {"python": platform.python_version()},
+        "startup":  results,
+        "imports":  imports,
+    }
+    out = args.out or os.path.join(
+        BENCH_DIR, f"startup-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved → {out}")
+
+
+# ── Diff ─────────────────────────────────────────────────────────────────────
+def diff(path_a, path_b):
+    """Print median changes per metric between two saved runs."""
+    with open(path_a) as f:
+        a = json.load(f)
+    with open(path_b) as f:
+        b = json.load(f)
+
+    print(f"{'metric':<24} {'A':>10} {'B':>10} {'Δ':>8}")
+    for m in METRICS:
+        if m not in a["startup"] or m not in b["startup"]:
+            continue
+        va, vb = a["startup"][m]["median_ms"], b["startup"][m]["median_ms"]
+        change = (vb - va) / va * 100 if va else 0.0
+        print(f"{m:<24} {va:>10.1f} {vb:>10.1f} {change:>+7.0f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard worker startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="JSON output path (default: data/bench/startup-<timestamp>.json)")
+    parser.add_argument("--diff", nargs=2, metavar=("A", "B"), help="compare two saved runs")
+    args = parser.parse_args()
+
+    if args.diff:
+        diff(*args.diff)
+    else:
+        run(args)
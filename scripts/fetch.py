@@ -0,0 +1,315 @@
+# fetch.py
+# Shared HTTP fetch engine for the ingest scripts
+# One pooled keep-alive session, several cities in flight at once,
+# per-source timeouts/retries, per-host rate limiting (see ratelimit.py),
+# multi-location batching for Open-Meteo, and per-city results + errors.
+# fetch_streamed() parses bodies incrementally (jsonstream.py) and hands
+# each city over as soon as it is read, for payloads too big to hold at once.
+
+import os
+import sys
+import threading
+import logging
+import requests
+from datetime import date
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import ratelimit, jsonstream
+
+# ── Cities (single source of truth for every ingest) ─────────────────────────
+CITIES = {
+    "Portland":   {"latitude": 45.5051, "longitude": -122.6750},
+    "Eugene":     {"latitude": 44.0521, "longitude": -123.0868},
+    "Medford":    {"latitude": 42.3265, "longitude": -122.8756},
+    "Bend":       {"latitude": 44.0582, "longitude": -121.3153},
+    "Astoria":    {"latitude": 46.1879, "longitude": -123.8313},
+    "Hood River": {"latitude": 45.7054, "longitude": -121.5217},
+}
+
+# ── Request cost ─────────────────────────────────────────────────────────────
+def open_meteo_params_cost(params):
+    """Rate-limit tokens an Open-Meteo request will be charged."""
+    if "start_date" in params:
+        n_days = (date.fromisoformat(params["end_date"])
+                  - date.fromisoformat(params["start_date"])).days + 1
+    else:
+        n_days = params.get("past_days", 0) + params.get("forecast_days", 7)
+    n_vars = len(params.get("daily", "").split(","))
+    n_locations = len(str(params.get("latitude", "")).split(","))
+    return ratelimit.open_meteo_cost(n_days, n_vars, n_locations)
+
+
+# ── Sources ──────────────────────────────────────────────────────────────────
+# timeout  — seconds per request
+# retries  — urllib3 retries on transient 5xx status codes
+# backoff  — urllib3 backoff_factor
+# workers  — max requests in flight at once for this source
+# cost     — params → rate-limit tokens (None = 1 token per request)
+# batch    — max locations per request (comma-separated latitude/longitude);
+#            1 = one location per request
+# Request pacing comes from the per-host token buckets in ratelimit.py
+SOURCES = {
+    "forecast": {
+        "url":     "https://api.open-meteo.com/v1/forecast",
+        "timeout": 15,
+        "retries": 3,
+        "backoff": 1,
+        "workers": 6,
+        "cost":    open_meteo_params_cost,
+        "batch":   50,
+    },
+    "archive": {
+        "url":     "https://archive-api.open-meteo.com/v1/archive",
+        "timeout": 30,   # longer timeout — large historical payload
+        "retries": 3,
+        "backoff": 2,
+        "workers": 6,
+        "cost":    open_meteo_params_cost,
+        "batch":   10,   # keeps full-archive backfill payloads within the timeout
+    },
+}
+
+STREAM_CHUNK = 64 * 1024   # bytes read per step by fetch_streamed
+
+# 429s are handled here (not by urllib3) so Retry-After feeds the limiter
+MAX_RATE_LIMITED = 5
+
+MAX_POOL = max(cfg["workers"] for cfg in SOURCES.values())
+
+_session      = None
+_session_lock = threading.Lock()
+
+
+# ── Session ──────────────────────────────────────────────────────────────────
+def get_session():
+    """Return the process-wide pooled session, one retrying adapter per source."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            for cfg in SOURCES.values():
+                retries = Retry(
+                    total=cfg["retries"],
+                    backoff_factor=cfg["backoff"],
+                    status_forcelist=[500, 502, 503, 504],
+                    allowed_methods=["GET"],
+                )
+                session.mount(cfg["url"], HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=MAX_POOL,
+                    max_retries=retries,
+                ))
+            _session = session
+    return _session
+
+
+def _get(session, source, params, stream=False):
+    """GET with rate limiting and Retry-After handling; raises on HTTP errors."""
+    cfg  = SOURCES[source]
+    host = urlparse(cfg["url"]).hostname
+    cost = cfg["cost"](params) if cfg["cost"] else 1.0
+
+    for attempt in range(MAX_RATE_LIMITED + 1):
+        ratelimit.acquire(host, cost)
+        response = session.get(cfg["url"], params=params, timeout=cfg["timeout"], stream=stream)
+        if response.status_code != 429 or attempt == MAX_RATE_LIMITED:
+            break
+        response.close()
+        wait = ratelimit.parse_retry_after(
+            response.headers.get("Retry-After"), default=2 ** (attempt + 2)
+        )
+        logging.warning(f"{host} rate limited — waiting {wait:.0f}s")
+        ratelimit.penalize(host, wait)
+
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+
+def _fetch_one(session, source, params):
+    return _get(session, source, params).json()
+
+
+# ── Fetch ────────────────────────────────────────────────────────────────────
+def fetch_all(source, params_by_city, max_workers=None):
+    """
+    Fetch one request per city from `source` concurrently.
+    Returns (results, errors): {city: parsed JSON} and {city: error message}.
+    """
+    session = get_session()
+    workers = max(1, min(max_workers or SOURCES[source]["workers"], len(params_by_city)))
+    results, errors = {}, {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_fetch_one, session, source, params): city
+            for city, params in params_by_city.items()
+        }
+        for future in as_completed(futures):
+            city = futures[future]
+            try:
+                results[city] = future.result()
+            except requests.RequestException as e:
+                errors[city] = f"request failed: {e}"
+                logging.error(f"{city} request failed: {e}")
+            except ValueError as e:
+                errors[city] = f"malformed response: {e}"
+                logging.error(f"{city} malformed response: {e}")
+
+    return results, errors
+
+
+# ── Batched fetch (multi-location) ───────────────────────────────────────────
+COORD_KEYS = ("latitude", "longitude")
+
+
+def plan_batches(params_by_city, batch_size):
+    """
+    Group cities whose requests differ only by coordinates, then split each
+    group into batches of at most `batch_size`: [(cities, params), ...].
+    """
+    groups = {}
+    for city, params in params_by_city.items():
+        shared = tuple(sorted((k, v) for k, v in params.items() if k not in COORD_KEYS))
+        groups.setdefault(shared, []).append(city)
+
+    batches = []
+    for shared, cities in groups.items():
+        for i in range(0, len(cities), batch_size):
+            chunk  = cities[i:i + batch_size]
+            params = dict(shared)
+            for key in COORD_KEYS:
+                params[key] = ",".join(str(params_by_city[c][key]) for c in chunk)
+            batches.append((chunk, params))
+    return batches
+
+
+def split_batch(cities, payload):
+    """Multi-location response (a JSON list, one entry per location) → {city: JSON}."""
+    if len(cities) == 1 and isinstance(payload, dict):
+        return {cities[0]: payload}
+    if not isinstance(payload, list) or len(payload) != len(cities):
+        raise ValueError(f"expected {len(cities)} locations, got "
+                         f"{len(payload) if isinstance(payload, list) else type(payload).__name__}")
+    # location_id is the index of the coordinate pair in the request
+    return {cities[item.get("location_id", i)]: item for i, item in enumerate(payload)}
+
+
+def fetch_batched(source, params_by_city, batch_size=None, max_workers=None):
+    """
+    Like fetch_all, but packs cities into multi-location requests of up to
+    `batch_size` (default: the source's "batch"). A batch that fails as a
+    whole is retried one city at a time, so one bad location only costs
+    itself. Returns (results, errors) keyed by city.
+    """
+    batch_size = batch_size or SOURCES[source]["batch"]
+    if batch_size <= 1:
+        return fetch_all(source, params_by_city, max_workers)
+
+    session = get_session()
+    batches = plan_batches(params_by_city, batch_size)
+    workers = max(1, min(max_workers or SOURCES[source]["workers"], len(batches)))
+    results, fallback = {}, {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_fetch_one, session, source, params): cities
+            for cities, params in batches
+        }
+        for future in as_completed(futures):
+            cities = futures[future]
+            try:
+                results.update(split_batch(cities, future.result()))
+            except (requests.RequestException, ValueError) as e:
+                if len(cities) > 1:
+                    logging.warning(f"Batch of {len(cities)} failed ({e}) — retrying per city")
+                fallback.update({c: params_by_city[c] for c in cities})
+
+    errors = {}
+    if fallback:
+        retried, errors = fetch_all(source, fallback, max_workers)
+        results.update(retried)
+
+    logging.info(f"{source}: {len(params_by_city)} cities in {len(batches)} batched requests"
+                 f"{f', {len(fallback)} retried per city' if fallback else ''}")
+    return results, errors
+
+
+# ── Streamed fetch ───────────────────────────────────────────────────────────
+def _stream_batch(session, source, cities, params, deliver):
+    """Read one (multi-location) response, delivering each location as it ends."""
+    seen = 0
+    with _get(session, source, params, stream=True) as response:
+        for item in jsonstream.iter_items(response.iter_content(STREAM_CHUNK)):
+            if not isinstance(item, dict):
+                raise ValueError(f"expected a location object, got {type(item).__name__}")
+            index = item.get("location_id", seen) if len(cities) > 1 else seen
+            if index >= len(cities):
+                raise ValueError(f"expected {len(cities)} locations, got more")
+            deliver(cities[index], item)
+            seen += 1
+    if seen != len(cities):
+        raise ValueError(f"expected {len(cities)} locations, got {seen}")
+
+
+def fetch_streamed(source, params_by_city, on_city, batch_size=None, max_workers=None):
+    """
+    Like fetch_batched, but each response is parsed as it downloads and every
+    city's payload goes to on_city(city, payload) as soon as it is complete,
+    instead of being collected. Numeric arrays arrive as float64 NumPy arrays
+    (null → NaN). on_city calls are serialized, so it may write to the store;
+    it should handle its own errors. A batch that breaks off is retried one
+    city at a time for the cities it had not delivered yet.
+    Returns (delivered, errors): the set of cities handed over and
+    {city: error message}.
+    """
+    batch_size = batch_size or SOURCES[source]["batch"]
+    session    = get_session()
+    batches    = plan_batches(params_by_city, batch_size)
+    workers    = max(1, min(max_workers or SOURCES[source]["workers"], len(batches)))
+    lock       = threading.Lock()
+    delivered  = set()
+
+    def deliver(city, payload):
+        with lock:
+            if city not in delivered:
+                delivered.add(city)
+                on_city(city, payload)
+
+    def run(pool, batches):
+        futures = {
+            pool.submit(_stream_batch, session, source, cities, params, deliver): cities
+            for cities, params in batches
+        }
+        failed = {}
+        for future in as_completed(futures):
+            cities = futures[future]
+            try:
+                future.result()
+            except (requests.RequestException, ValueError) as e:
+                failed.update({c: e for c in cities if c not in delivered})
+        return failed
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        failed = run(pool, batches)
+        if failed and batch_size > 1:
+            logging.warning(f"{len(failed)} cities missing from batched responses — retrying per city")
+            failed = run(pool, plan_batches({c: params_by_city[c] for c in failed}, 1))
+
+    errors = {}
+    for city, e in failed.items():
+        kind = "request failed" if isinstance(e, requests.RequestException) else "malformed response"
+        errors[city] = f"{kind}: {e}"
+        logging.error(f"{city} {kind}: {e}")
+
+    logging.info(f"{source}: {len(delivered)} of {len(params_by_city)} cities streamed"
+                 f" in {len(batches)} requests")
+    return delivered, errors
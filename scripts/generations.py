@@ -0,0 +1,95 @@
+# generations.py
+# Versioned ("blue/green") database files with an atomic pointer
+#   data/weather-<UTC timestamp>.db   one file per build, never modified after publish
+#   data/weather.current              name of the live generation
+# Builders write and validate a new file, then publish() it with an atomic
+# rename of the pointer. Readers resolve current_path() on each request and
+# move to the new generation on their own; nobody writes to a live file.
+
+import os
+import shutil
+import fcntl
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE          = os.path.dirname(os.path.abspath(__file__))
+_ROOT          = os.path.dirname(_HERE)
+DATA_DIR       = os.path.join(_ROOT, "data")
+POINTER_PATH   = os.path.join(DATA_DIR, "weather.current")
+LOCK_PATH      = os.path.join(DATA_DIR, "weather.build.lock")
+LEGACY_DB_PATH = os.path.join(DATA_DIR, "weather.db")   # pre-generation single file
+
+PREFIX           = "weather-"
+KEEP_GENERATIONS = 3   # live one + two previous, for readers still finishing
+
+
+def current_generation():
+    """Name of the live generation file, or None before the first publish."""
+    try:
+        with open(POINTER_PATH) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_path():
+    """Path readers should open: the live generation, else the legacy file."""
+    name = current_generation()
+    return os.path.join(DATA_DIR, name) if name else LEGACY_DB_PATH
+
+
+def new_path():
+    """Fresh, unpublished generation path."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return os.path.join(DATA_DIR, f"{PREFIX}{stamp}.db")
+
+
+def clone_current():
+    """Copy the live database to a new generation for an incremental rebuild."""
+    path = new_path()
+    if os.path.exists(current_path()):
+        shutil.copyfile(current_path(), path)
+    return path
+
+
+@contextmanager
+def build_lock():
+    """Serialize builders so two rebuilds never publish over each other."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(LOCK_PATH, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def publish(path):
+    """Atomically make `path` the live generation, then prune old ones."""
+    tmp = POINTER_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(os.path.basename(path))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, POINTER_PATH)
+    prune()
+
+
+def discard(path):
+    """Remove an unpublished generation (failed build)."""
+    for p in (path, path + ".wal"):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def prune():
+    """Delete all but the newest KEEP_GENERATIONS files (never the live one)."""
+    live  = current_generation()
+    names = sorted(
+        (n for n in os.listdir(DATA_DIR) if n.startswith(PREFIX) and n.endswith(".db")),
+        reverse=True,
+    )
+    for name in names[KEEP_GENERATIONS:]:
+        if name != live:
+            discard(os.path.join(DATA_DIR, name))
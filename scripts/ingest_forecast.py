@@ -1,32 +1,27 @@
 # ingest_forecast.py
 # Pulls 30 days historical + 7 day forecast weather data
-# for 6 Oregon cities from the Open-Meteo API
-# saves to data/weather_raw.csv and rebuilds affected DB tables
+# for 6 Oregon cities from the Open-Meteo API,
+# upserts it straight into raw_weather in a new database generation
+# and updates the affected rows downstream (see model.run_model)
+# Each run's batch is also archived as a forecast vintage
+# (data/parquet/forecast_vintages, by issue date) for later accuracy checks;
+# FORECAST_ARCHIVE=0 or --no-archive skips it. raw_weather itself is the
+# table of record (a --full build copies it from the live generation), so
+# without the archive the database generations are the only copy of past days.
 
 import os
-import requests
+import sys
 import pandas as pd
-import duckdb
 import logging
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-# ── Paths (always relative to this file, not the working directory) ──────────
-_HERE    = os.path.dirname(os.path.abspath(__file__))
-_ROOT    = os.path.dirname(_HERE)           # project root (one level up from scripts/)
-DB_PATH  = os.path.join(_ROOT, "data", "weather.db")
-CSV_PATH = os.path.join(_ROOT, "data", "weather_raw.csv")
-TIMEOUT  = 15
-
-# ── Cities ───────────────────────────────────────────────────────────────────
-cities = {
-    "Portland":   {"latitude": 45.5051, "longitude": -122.6750},
-    "Eugene":     {"latitude": 44.0521, "longitude": -123.0868},
-    "Medford":    {"latitude": 42.3265, "longitude": -122.8756},
-    "Bend":       {"latitude": 44.0582, "longitude": -121.3153},
-    "Astoria":    {"latitude": 46.1879, "longitude": -123.8313},
-    "Hood River": {"latitude": 45.7054, "longitude": -121.5217},
-}
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.fetch import CITIES, fetch_batched
+from scripts import store
+from scripts.model import run_model
+
+FORECAST_ARCHIVE = os.environ.get("FORECAST_ARCHIVE", "1") != "0"
+TIMEZONE         = "America/Los_Angeles"
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -34,51 +29,38 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-# ── Session with retry ────────────────────────────────────────────────────────
-def get_session():
-    session = requests.Session()
-    retries = Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    return session
-
 
-def run_forecast_ingest():
+def run_forecast_ingest(archive=FORECAST_ARCHIVE):
+    """
+    Fetch, load and rebuild. Returns the published generation path (None if
+    no table was stale); raises if every fetch or the model build failed.
+    """
     logging.info("Starting forecast ingest")
 
-    session = get_session()
+    params = {
+        city: {
+            "latitude":           coords["latitude"],
+            "longitude":          coords["longitude"],
+            "daily":              "temperature_2m_max,temperature_2m_min,precipitation_sum",
+            "temperature_unit":   "fahrenheit",
+            "precipitation_unit": "inch",
+            "timezone":           TIMEZONE,
+            "past_days":          30,
+            "forecast_days":      7,
+        }
+        for city, coords in CITIES.items()
+    }
+
+    # ── Fetch from API (cities batched into multi-location requests) ─────────
+    results, _ = fetch_batched("forecast", params)
     all_cities = []
 
-    # ── Fetch from API ────────────────────────────────────────────────────────
-    for city, coords in cities.items():
-        lat = coords["latitude"]
-        lon = coords["longitude"]
-
-        url = (
-            f"https://api.open-meteo.com/v1/forecast"
-            f"?latitude={lat}&longitude={lon}"
-            f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum"
-            f"&temperature_unit=fahrenheit"
-            f"&precipitation_unit=inch"
-            f"&timezone=America/Los_Angeles"
-            f"&past_days=30"
-            f"&forecast_days=7"
-        )
-
-        try:
-            response = session.get(url, timeout=TIMEOUT)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logging.error(f"{city} request failed: {e}")
+    for city in CITIES:
+        if city not in results:
             continue
 
         try:
-            data = response.json()
-            daily = data["daily"]
+            daily = results[city]["daily"]
         except Exception as e:
             logging.error(f"{city} malformed response: {e}")
             continue
@@ -99,71 +81,36 @@ def run_forecast_ingest():
 
     if not all_cities:
         logging.error("All city fetches failed — aborting ingest safely")
-        return
+        raise RuntimeError("all city fetches failed")
 
     final_df = pd.concat(all_cities, ignore_index=True)
 
-    # ── Write CSV atomically ──────────────────────────────────────────────────
-    temp_csv = CSV_PATH + ".tmp"
-    final_df.to_csv(temp_csv, index=False)
-    os.replace(temp_csv, CSV_PATH)
-    logging.info(f"weather_raw.csv updated -> {CSV_PATH}")
-
-    # ── Rebuild DB tables ─────────────────────────────────────────────────────
+    # ── Load into a new generation and update the forecast-fed tables ────────
+    # Fetched days are upserted by (city, date) in one transaction; older days
+    # and failed cities keep their rows, and the historical aggregates are
+    # carried over untouched
     try:
-        con = duckdb.connect(DB_PATH)
-
-        con.execute("""
-            CREATE OR REPLACE TABLE raw_weather AS
-            SELECT * FROM read_csv_auto(?)
-        """, [CSV_PATH])
-
-        con.execute("""
-            CREATE OR REPLACE TABLE six_weeks_weather AS
-            SELECT
-                city,
-                date,
-                ROUND((temp_max + temp_min) / 2, 1) AS temp_avg,
-                temp_max,
-                temp_min,
-                precipitation
-            FROM raw_weather
-        """)
-
-        con.execute("""
-            CREATE OR REPLACE TABLE irrigation_tracker AS
-            WITH weekly_rain AS (
-                SELECT
-                    city,
-                    DATE_TRUNC('week', date::DATE) AS week_start,
-                    ROUND(SUM(precipitation), 3)   AS total_rainfall,
-                    1.0                             AS rainfall_needed
-                FROM six_weeks_weather
-                GROUP BY city, DATE_TRUNC('week', date::DATE)
-            )
-            SELECT
-                city,
-                week_start,
-                total_rainfall,
-                rainfall_needed,
-                ROUND(total_rainfall - rainfall_needed, 3) AS surplus_deficit,
-                CASE
-                    WHEN total_rainfall >= rainfall_needed THEN 'No irrigation needed'
-                    WHEN total_rainfall >= 0.5             THEN 'Light irrigation needed'
-                    ELSE                                        'Irrigation needed'
-                END AS irrigation_status
-            FROM weekly_rain
-            ORDER BY city, week_start
-        """)
-
-        con.close()
-        logging.info("DuckDB tables rebuilt successfully")
-
+        path = run_model(loads={"raw_weather": final_df})
     except Exception as e:
         logging.error(f"DuckDB update failed: {e}")
-        return
+        raise
+    if path:
+        logging.info(f"DuckDB tables rebuilt successfully → {os.path.basename(path)}")
+
+    # ── Vintage archive (append-only; read back only to seed a --full build) ─
+    # One vintage per local issue date: a rerun the same day replaces it
+    if archive:
+        try:
+            issue_date = pd.Timestamp.now(tz=TIMEZONE).date()
+            store.replace_partitions("forecast_vintages", final_df.assign(issue_date=issue_date))
+            logging.info(f"Forecast vintage {issue_date} archived -> {store.dataset_dir('forecast_vintages')}")
+        except Exception as e:
+            logging.warning(f"Forecast archive write failed: {e}")
+    else:
+        logging.warning("Forecast archive off: past forecast days are kept only in the database generations")
 
     logging.info("Forecast ingest complete")
+    return path
 
 if __name__ == "__main__":
-    run_forecast_ingest()
+    run_forecast_ingest(archive=FORECAST_ARCHIVE and "--no-archive" not in sys.argv[1:])
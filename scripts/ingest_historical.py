@@ -1,31 +1,44 @@
 # ingest_historical.py
 # Pulls 85 year historical air and soil temp
-# for 6 Oregon cities from the Open-Meteo API
-# and saves to data/temp_soil_historical.csv
+# for 6 Oregon cities from the Open-Meteo API,
+# saves to the Parquet store (data/parquet/historical, by city and year)
+# and brings the model up to date (see model.run_model)
+#
+# Runs in delta mode by default: only the days after each city's newest
+# stored date are requested and appended. New cities and cities with a
+# gap in their stored history get a full 1940 → today backfill.
+# Pass --full to force a backfill for every city.
+#
+# Responses are parsed as they stream in (see fetch_streamed) into one
+# NumPy array per variable, and each city is written to the store as soon
+# as its payload is complete, so memory stays around one city's columns.
+#
+# Delta rows are also loaded straight into temp_soil_historical, so the
+# climatology aggregates only fold in the new days. A backfill (or a model
+# that wasn't current with the store) rebuilds them from the store instead.
 
 import os
-import requests
-import pandas as pd
+import sys
+import duckdb
 import logging
-from datetime import date
-import time
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-# ── Paths (always relative to this file) ─────────────────────────────────────
-_HERE    = os.path.dirname(os.path.abspath(__file__))
-_ROOT    = os.path.dirname(_HERE)
-CSV_PATH = os.path.join(_ROOT, "data", "temp_soil_historical.csv")
-TIMEOUT  = 30  # longer timeout — large historical payload
-
-# ── Cities ────────────────────────────────────────────────────────────────────
-cities = {
-    "Portland":   {"latitude": 45.5051, "longitude": -122.6750},
-    "Eugene":     {"latitude": 44.0521, "longitude": -123.0868},
-    "Medford":    {"latitude": 42.3265, "longitude": -122.8756},
-    "Bend":       {"latitude": 44.0582, "longitude": -121.3153},
-    "Astoria":    {"latitude": 46.1879, "longitude": -123.8313},
-    "Hood River": {"latitude": 45.7054, "longitude": -121.5217},
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.fetch import CITIES, fetch_streamed
+from scripts import store
+from scripts.model import run_model, up_to_date
+
+ARCHIVE_START = date(1940, 1, 1)
+
+# Store column → Open-Meteo daily variable
+VARIABLES = {
+    "temp_min":            "temperature_2m_min",
+    "temp_max":            "temperature_2m_max",
+    "soil_temp_0_7cm":     "soil_temperature_0_to_7cm_mean",
+    "soil_temp_7_to_28cm": "soil_temperature_7_to_28cm_mean",
 }
 
 # ── Logging ───────────────────────────────────────────────────────────────────
@@ -34,81 +47,142 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-# ── Session with retry ────────────────────────────────────────────────────────
-def get_session():
-    session = requests.Session()
-    retries = Retry(
-        total=3,
-        backoff_factor=2,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    return session
 
+# ── Stored extents ────────────────────────────────────────────────────────────
+def stored_extents():
+    """Return {city: (first_date, last_date, n_days)} for the historical store."""
+    store.import_legacy_csv("historical")
+    if not store.exists("historical"):
+        return {}
+    con = duckdb.connect()
+    rows = con.execute(f"""
+        SELECT city, MIN(date), MAX(date), COUNT(DISTINCT date)
+        FROM {store.scan("historical")}
+        GROUP BY city
+    """).fetchall()
+    con.close()
+    return {city: (first, last, n_days) for city, first, last, n_days in rows}
+
+
+def plan_requests(extents, today, full=False):
+    """
+    Decide what each city needs: {city: (start_date, is_backfill)}.
+    Cities that are already up to date are left out.
+    """
+    plan = {}
+    for city in CITIES:
+        if full or city not in extents:
+            plan[city] = (ARCHIVE_START, True)
+            continue
 
-def run_historical_ingest():
+        first, last, n_days = extents[city]
+        if first > ARCHIVE_START or n_days != (last - first).days + 1:
+            logging.warning(f"{city} has a gap in stored history — backfilling")
+            plan[city] = (ARCHIVE_START, True)
+        elif last < today:
+            plan[city] = (last + timedelta(days=1), False)
+
+    return plan
+
+
+def to_columns(city, payload):
+    """
+    One city's archive payload → {column: NumPy array} in the store schema,
+    trailing unobserved days dropped. None if no day has been observed yet.
+    """
+    daily = payload["daily"]
+    # timeformat=unixtime: local midnight as UTC seconds. Rounding to the
+    # nearest day absorbs DST (utc_offset_seconds is today's offset).
+    seconds = daily["time"] + payload.get("utc_offset_seconds", 0)
+    days    = np.floor((seconds + 43200) / 86400).astype("int64")
+    columns = {"date": (days * 86400).astype("datetime64[s]")}
+    for col, var in VARIABLES.items():
+        columns[col] = np.asarray(daily[var], dtype="float64")
+
+    # The archive lags real time by a few days and returns nulls for the
+    # newest dates. Drop that trailing tail so the next run asks again.
+    observed = np.flatnonzero(~np.isnan(np.vstack([columns[c] for c in VARIABLES])).all(axis=0))
+    if not observed.size:
+        return None
+    n = observed[-1] + 1
+    columns = {col: values[:n] for col, values in columns.items()}
+    columns["city"] = np.full(n, city)
+    return columns
+
+
+def run_historical_ingest(full=False):
     logging.info("Starting historical ingest")
 
-    session = get_session()
-    all_cities = []
-
-    for city, coords in cities.items():
-        lat = coords["latitude"]
-        lon = coords["longitude"]
-
-        url = (
-            f"https://archive-api.open-meteo.com/v1/archive"
-            f"?latitude={lat}&longitude={lon}"
-            f"&start_date=1940-01-01&end_date={date.today()}"
-            f"&daily=temperature_2m_min,temperature_2m_max"
-            f",soil_temperature_0_to_7cm_mean,soil_temperature_7_to_28cm_mean"
-            f"&timezone=America%2FLos_Angeles"
-            f"&temperature_unit=fahrenheit"
-        )
-
-        try:
-            response = session.get(url, timeout=TIMEOUT)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logging.error(f"{city} request failed: {e}")
-            continue
+    today = date.today()
+    plan  = plan_requests(stored_extents(), today, full=full)
+    if not plan:
+        logging.info("Historical store already up to date")
+        return
 
+    params = {
+        city: {
+            "latitude":         CITIES[city]["latitude"],
+            "longitude":        CITIES[city]["longitude"],
+            "start_date":       start.isoformat(),
+            "end_date":         today.isoformat(),
+            "daily":            ",".join(VARIABLES.values()),
+            "timezone":         "America/Los_Angeles",
+            "timeformat":       "unixtime",
+            "temperature_unit": "fahrenheit",
+        }
+        for city, (start, _) in plan.items()
+    }
+    written = {"cities": 0, "rows": 0, "backfills": 0}
+    deltas  = []    # delta cities' columns, loaded into the model afterwards
+    in_sync = up_to_date("temp_soil_historical")   # before this run writes
+
+    def write_city(city, payload):
         try:
-            data = response.json()
-            daily = data["daily"]
+            columns = to_columns(city, payload)
         except Exception as e:
             logging.error(f"{city} malformed response: {e}")
-            continue
-
-        try:
-            df = pd.DataFrame({
-                "date":                data["daily"]["time"],
-                "temp_min":            data["daily"]["temperature_2m_min"],
-                "temp_max":            data["daily"]["temperature_2m_max"],
-                "soil_temp_0_7cm":     data["daily"]["soil_temperature_0_to_7cm_mean"],
-                "soil_temp_7_to_28cm": data["daily"]["soil_temperature_7_to_28cm_mean"],
-            })
-            df["city"] = city
-            all_cities.append(df)
-            logging.info(f"{city} success — {len(df)} rows")
-        except Exception as e:
-            logging.error(f"{city} dataframe build failed: {e}")
-            continue
-
-        time.sleep(60)  # API rate limit
-
-    if not all_cities:
+            return
+        if columns is None:
+            logging.info(f"{city} no new observed days yet")
+            return
+
+        # Backfilled cities replace their partitions; deltas append to them
+        is_backfill = plan[city][1]
+        if is_backfill:
+            store.replace_partitions("historical", columns)
+            written["backfills"] += 1
+        else:
+            store.append("historical", columns)
+            deltas.append(columns)
+        written["cities"] += 1
+        written["rows"]   += len(columns["date"])
+        logging.info(f"{city} success — {len(columns['date'])} rows ({'backfill' if is_backfill else 'delta'})")
+
+    # Cities sharing a date range go out together as multi-location requests;
+    # pacing against the archive quota is handled by the rate limiter
+    delivered, _ = fetch_streamed("archive", params, write_city)
+
+    if not delivered:
         logging.error("All city fetches failed — aborting")
         return
+    if not written["cities"]:
+        logging.info("No new observed days — historical store unchanged")
+        return
 
-    final_df = pd.concat(all_cities, ignore_index=True)
+    logging.info(f"Historical store updated → {store.dataset_dir('historical')} "
+                 f"({written['rows']} rows written for {written['cities']} cities)")
 
-    temp_csv = CSV_PATH + ".tmp"
-    final_df.to_csv(temp_csv, index=False)
-    os.replace(temp_csv, CSV_PATH)
-    logging.info(f"temp_soil_historical.csv saved → {CSV_PATH} ({len(final_df)} rows)")
+    # ── Update the model in a new generation ─────────────────────────────────
+    # If this fails, the store is still ahead of the model, and the next
+    # model run rebuilds temp_soil_historical from it
+    if in_sync and not written["backfills"]:
+        batch = pd.DataFrame({col: np.concatenate([d[col] for d in deltas]) for col in deltas[0]})
+        path  = run_model(loads={"temp_soil_historical": batch})
+    else:
+        path = run_model()
+    if path:
+        logging.info(f"DuckDB tables updated → {os.path.basename(path)}")
 
 
 if __name__ == "__main__":
-    run_historical_ingest()
+    run_historical_ingest(full="--full" in sys.argv[1:])
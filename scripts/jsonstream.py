@@ -0,0 +1,191 @@
+# jsonstream.py
+# Incremental JSON reader for large API responses
+# Reads a response body chunk by chunk and builds values as it goes, with one
+# shortcut: an array of plain numbers (and nulls) is parsed straight from the
+# text into a float64 NumPy array (null → NaN) by np.fromstring, so a 31k-day
+# column never exists as Python floats or as a list. Everything else (keys,
+# metadata, string arrays) comes out as ordinary Python values.
+#
+#   for item in iter_items(response.iter_content(STREAM_CHUNK)):
+#       item["daily"]["temperature_2m_max"]   → np.ndarray
+#
+# A top-level array yields one element at a time (Open-Meteo multi-location
+# responses), so only the location being read is held in memory.
+
+import re
+import codecs
+import numpy as np
+from json.decoder import scanstring
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_TOKEN      = re.compile(r"[-+.0-9a-zA-Z]+")   # extent of a number or literal
+_NUMBER     = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_NUMERIC    = re.compile(r"[-0-9n]")   # first character of a number or null
+_NUMBERS    = re.compile(r"[-+.0-9eEnul, \t\n\r]*")   # body of a flat numeric array
+
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class _Reader:
+    """Text buffer over an iterator of byte chunks; consumed text is dropped."""
+
+    def __init__(self, chunks):
+        self._chunks  = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append the next chunk; False once the body is exhausted."""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self._decoder.decode(b"", final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or '' at end of input."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}, got {self.peek()!r}")
+        self.pos += 1
+
+    def find(self, char):
+        """Index of the next `char`, reading more of the body as needed."""
+        start = self.pos
+        while True:
+            end = self.buf.find(char, start)
+            if end >= 0:
+                return end
+            start = len(self.buf) - self.pos   # fill() rebases the buffer to pos
+            if not self.fill():
+                raise ValueError(f"unexpected end of input looking for {char!r}")
+
+
+# ── Values ───────────────────────────────────────────────────────────────────
+def _string(r):
+    r.expect('"')
+    while True:
+        try:
+            value, end = scanstring(r.buf, r.pos)
+        except ValueError:
+            # Unterminated in this buffer; step back to the quote and read on
+            r.pos -= 1
+            if not r.fill():
+                raise
+            r.pos += 1
+            continue
+        r.pos = end
+        return value
+
+
+def _scalar(r):
+    # A token running to the end of the buffer may continue in the next chunk
+    m = _TOKEN.match(r.buf, r.pos)
+    while m and m.end() == len(r.buf) and r.fill():
+        m = _TOKEN.match(r.buf, r.pos)
+    text = m.group() if m else ""
+    if text in _LITERALS:
+        value = _LITERALS[text]
+    elif _NUMBER.fullmatch(text):
+        value = float(text) if any(c in text for c in ".eE") else int(text)
+    else:
+        raise ValueError(f"invalid JSON value at offset {r.pos}")
+    r.pos = m.end()
+    return value
+
+
+def _numeric_array(r):
+    """[number|null, ...] → float64 array, parsed without Python objects."""
+    end  = r.find("]")
+    text = r.buf[r.pos:end]
+    if not _NUMBERS.fullmatch(text):
+        return None   # nested or mixed; take the general path
+    values = np.fromstring(text.replace("null", "nan"), sep=",")
+    if values.size != text.count(",") + 1:
+        raise ValueError(f"invalid number in array at offset {r.pos}")
+    r.pos = end + 1
+    return values
+
+
+def _array(r):
+    r.expect("[")
+    if r.peek() == "]":
+        r.pos += 1
+        return []
+    if _NUMERIC.match(r.peek()):
+        values = _numeric_array(r)
+        if values is not None:
+            return values
+    items = []
+    while True:
+        items.append(_value(r))
+        if r.peek() == "]":
+            r.pos += 1
+            return items
+        r.expect(",")
+
+
+def _object(r):
+    r.expect("{")
+    obj = {}
+    if r.peek() == "}":
+        r.pos += 1
+        return obj
+    while True:
+        key = _string(r)
+        r.expect(":")
+        obj[key] = _value(r)
+        if r.peek() == "}":
+            r.pos += 1
+            return obj
+        r.expect(",")
+
+
+def _value(r):
+    char = r.peek()
+    if char == "{":
+        return _object(r)
+    if char == "[":
+        return _array(r)
+    if char == '"':
+        return _string(r)
+    return _scalar(r)
+
+
+# ── Entry point ──────────────────────────────────────────────────────────────
+def iter_items(chunks):
+    """
+    Parse a JSON body from an iterator of byte chunks. Yields each element of
+    a top-level array as soon as it is complete, or the single top-level value.
+    """
+    r = _Reader(chunks)
+    if r.peek() != "[":
+        yield _value(r)
+    else:
+        r.pos += 1
+        if r.peek() == "]":
+            r.pos += 1
+        else:
+            while True:
+                yield _value(r)
+                if r.peek() == "]":
+                    r.pos += 1
+                    break
+                r.expect(",")
+    if r.peek():
+        raise ValueError(f"trailing data at offset {r.pos}")
@@ -1,283 +1,971 @@
 # model.py
 # Loads weather data into DuckDB and builds analytical models
+# The model is a DAG of table builds ("nodes") with declared inputs. Each run
+# fingerprints every node (its code, external sources, upstream fingerprints
+# and, for CURRENT_DATE-based tables, the year) and rebuilds only the nodes
+# whose fingerprint changed since the live generation was built, plus their
+# downstream tables. Tables fed by an ingest can also be loaded directly
+# (run_model(loads=...)): the batch is written into the new generation in one
+# transaction, and the load's version stands in for the table's sources.
+# Loads upsert by (city, date) and record the rows they changed in
+# model_changes; downstream nodes with an updater then patch just those rows
+# instead of rebuilding (as long as their own code and sources are
+# unchanged). A forecast refresh therefore upserts raw_weather and updates
+# the changed days of six_weeks_weather and weeks of irrigation_tracker; a
+# historical delta folds its new days into the climatology prefix-sum cube
+# (climate_cube), from which normals for any year range are two lookups.
+#
+#   python scripts/model.py          incremental (copy of the live generation)
+#   python scripts/model.py --full   rebuild every table from scratch
 
 import os
+import sys
+import json
+import time
+import hashlib
+import inspect
 import duckdb
 import pandas as pd
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import store, generations, solar, slowlog
+from scripts.fetch import CITIES
+from dashboard import charts
+from dashboard.charts import seasonal_figure
 
 # ── Paths (always relative to this file, not the working directory) ──────────
-_HERE    = os.path.dirname(os.path.abspath(__file__))
-_ROOT    = os.path.dirname(_HERE)           # project root (one level up from scripts/)
-DB_PATH  = os.path.join(_ROOT, "data", "weather.db")
-
-CSV_WEATHER     = os.path.join(_ROOT, "data", "weather_raw.csv")
-CSV_HISTORICAL  = os.path.join(_ROOT, "data", "temp_soil_historical.csv")
-CSV_SUN         = os.path.join(_ROOT, "data", "sun_times.csv")
-CSV_PLANTS      = os.path.join(_ROOT, "data", "plants.csv")
-
-# Connect to database
-con = duckdb.connect(DB_PATH)
-
-# ── Raw forecast weather ──────────────────────────────────────────────────────
-con.execute(f"""
-    CREATE OR REPLACE TABLE raw_weather AS
-    SELECT * FROM read_csv_auto('{CSV_WEATHER}')
-""")
-
-# ── Historical air + soil temps ───────────────────────────────────────────────
-con.execute(f"""
-    CREATE OR REPLACE TABLE temp_soil_historical AS
-    SELECT * FROM read_csv_auto('{CSV_HISTORICAL}')
-""")
-
-# ── Sun times ─────────────────────────────────────────────────────────────────
-# sunrisesunset.io returns dates as M/D/YYYY and times as "6:45:32 AM"
-# Parse to proper DATE and TIME types so joins and app queries work correctly
-con.execute(f"""
-    CREATE OR REPLACE TABLE sun_times AS
-    SELECT
-        city,
-        date::DATE               AS date,
-        sunrise::TIME            AS sunrise,
-        sunset::TIME             AS sunset,
-        morning_twilight::TIME   AS morning_twilight,
-        evening_twilight::TIME   AS evening_twilight,
-        solar_noon,
-        day_length
-    FROM read_csv_auto('{CSV_SUN}')
-""")
-
-# ── Plants ────────────────────────────────────────────────────────────────────
-con.execute(f"""
-    CREATE OR REPLACE TABLE plants AS
-    SELECT * FROM read_csv_auto('{CSV_PLANTS}')
-""")
-
-# ── 6-week weather (forecast + recent history) ────────────────────────────────
-con.execute("""
-    CREATE OR REPLACE TABLE six_weeks_weather AS
-    SELECT
-        city,
-        date,
-        ROUND((temp_max + temp_min) / 2, 1) AS temp_avg,
-        temp_max,
-        temp_min,
-        precipitation
-    FROM raw_weather
-""")
-
-# ── Irrigation tracker ────────────────────────────────────────────────────────
-con.execute("""
-    CREATE OR REPLACE TABLE irrigation_tracker AS
-    WITH weekly_rain AS (
-        SELECT
-            city,
-            DATE_TRUNC('week', date::DATE) AS week_start,
-            ROUND(SUM(precipitation), 3)   AS total_rainfall,
-            1.0                             AS rainfall_needed
-        FROM six_weeks_weather
-        GROUP BY city, DATE_TRUNC('week', date::DATE)
-    )
-    SELECT
-        city,
-        week_start,
-        total_rainfall,
-        rainfall_needed,
-        ROUND(total_rainfall - rainfall_needed, 3) AS surplus_deficit,
-        CASE
-            WHEN total_rainfall >= rainfall_needed THEN 'No irrigation needed'
-            WHEN total_rainfall >= 0.5             THEN 'Light irrigation needed'
-            ELSE                                        'Irrigation needed'
-        END AS irrigation_status
-    FROM weekly_rain
-    ORDER BY city, week_start
-""")
+_HERE      = os.path.dirname(os.path.abspath(__file__))
+_ROOT      = os.path.dirname(_HERE)         # project root (one level up from scripts/)
+CSV_PLANTS = os.path.join(_ROOT, "data", "plants.csv")
 
-# ── Average freeze dates (all-time + rolling windows) ────────────────────────
-con.execute("""
-    CREATE OR REPLACE TABLE avg_freeze_dates AS
-    WITH max_freeze_date AS (
+VERIFY_TABLES = ['six_weeks_weather', 'irrigation_tracker', 'sun_times', 'daily_data',
+                 'avg_freeze_dates', 'planting_gantt', 'plants', 'seasonal_figures']
+
+STATE_TABLE   = "model_state"     # node → fingerprint it was last built from
+LOADS_TABLE   = "model_loads"     # directly loaded table → version of its last load
+CHANGES_TABLE = "model_changes"   # (city, date) rows changed by this run's loads
+MAX_PARALLEL  = 4                 # independent nodes built at once
+
+NODES    = {}   # table name → {"build", "inputs", "sources", "yearly"}, in build order
+LOADERS  = {}   # table name → fn(con, batch) for tables loaded by run_model(loads=...)
+UPDATERS = {}   # table name → fn(con) applying CHANGES_TABLE rows from upstream
+
+
+# ── DAG ──────────────────────────────────────────────────────────────────────
+def node(table, inputs=(), sources=(), yearly=False):
+    """
+    Register `fn(con)` as the builder of `table`.
+    inputs  — upstream tables (must already be registered)
+    sources — callables fingerprinting external inputs, given the build connection
+    yearly  — the SQL depends on YEAR(current_date); rebuild when it rolls over
+    """
+    def register(fn):
+        missing = [i for i in inputs if i not in NODES]
+        if missing:
+            raise ValueError(f"{table}: unknown inputs {missing}")
+        NODES[table] = {"build": fn, "inputs": list(inputs), "sources": list(sources), "yearly": yearly}
+        return fn
+    return register
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def parquet_files(name):
+    """Source: a Parquet dataset (file names, sizes and mtimes)."""
+    return lambda con: store.fingerprint(name)
+
+
+def file_contents(path):
+    """Source: a file's bytes."""
+    def fingerprint(con):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    return fingerprint
+
+
+def value(obj):
+    """Source: an in-code constant (e.g. the city list)."""
+    return lambda con: _digest(obj)
+
+
+def loaded(table):
+    """Source: the version of the last direct load into `table` (see load())."""
+    def fingerprint(con):
+        try:
+            row = con.execute(f"SELECT version FROM {LOADS_TABLE} WHERE tbl = ?", [table]).fetchone()
+        except duckdb.CatalogException:
+            return None
+        return row[0] if row else None
+    return fingerprint
+
+
+def loader(table):
+    """Register `fn(con, batch)` as the direct loader of node `table`."""
+    def register(fn):
+        LOADERS[table] = fn
+        return fn
+    return register
+
+
+def updater(table):
+    """
+    Register `fn(con)` as the incremental update of node `table`: it rewrites
+    the rows affected by the (city, date) keys in CHANGES_TABLE. Used instead
+    of the build when every rebuilt input of the node was loaded or updated.
+    """
+    def register(fn):
+        UPDATERS[table] = fn
+        return fn
+    return register
+
+
+def fingerprints(con):
+    """
+    Fingerprint of every node (a change upstream changes everything
+    downstream), and of its own code and sources alone: while that "own"
+    fingerprint holds, an update can replace the build.
+    """
+    fps, own = {}, {}
+    for table, spec in NODES.items():
+        code    = inspect.getsource(spec["build"])
+        sources = [source(con) for source in spec["sources"]]
+        year    = date.today().year if spec["yearly"] else None
+        fps[table] = _digest(code, sources, year, [fps[i] for i in spec["inputs"]])
+        own[table] = _digest(code, sources, year,
+                             inspect.getsource(UPDATERS[table]) if table in UPDATERS else None)
+    return fps, own
+
+
+def stored_fingerprints(con):
+    """(fingerprint, own fingerprint) recorded in `con` for tables that still exist."""
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            node        VARCHAR PRIMARY KEY,
+            fingerprint VARCHAR,
+            built_at    TIMESTAMP
+        )
+    """)
+    con.execute(f"ALTER TABLE {STATE_TABLE} ADD COLUMN IF NOT EXISTS own_fingerprint VARCHAR")
+    rows = con.execute(f"""
+        SELECT s.node, s.fingerprint, s.own_fingerprint
+        FROM {STATE_TABLE} s
+        JOIN information_schema.tables t ON t.table_name = s.node
+    """).fetchall()
+    return {node: (fp, own) for node, fp, own in rows}
+
+
+def _record(con, table, fp, own):
+    con.execute(f"""
+        INSERT OR REPLACE INTO {STATE_TABLE} (node, fingerprint, own_fingerprint, built_at)
+        VALUES (?, ?, ?, now())
+    """, [table, fp, own])
+
+
+def _build_node(con, table, update=False):
+    # Own cursor per node so independent nodes run on separate threads;
+    # statements over SLOW_QUERY_MS are logged with their profile
+    cur   = slowlog.SlowQueryCursor(con.cursor(), "model", profile=True)
+    start = time.perf_counter()
+    try:
+        if update:
+            UPDATERS[table](cur)
+        else:
+            NODES[table]["build"](cur)
+    finally:
+        cur.close()
+    return time.perf_counter() - start
+
+
+def _upsert(con, table, schema, batch, delta=None):
+    """
+    Upsert `batch` (a registered view) into `table` by (city, date). Only rows
+    that are new or differ from the stored ones are written, and their keys go
+    to CHANGES_TABLE. With `delta`, the replaced and new versions of those rows
+    are also written there, signed -1 and +1, for running aggregates.
+    """
+    cols  = ", ".join(schema)
+    casts = ", ".join(f"CAST({col} AS {typ}) AS {col}" for col, typ in schema.items())
+    sets  = ", ".join(f"{col} = s.{col}" for col in schema if col not in ("city", "date"))
+    # EXCEPT compares whole rows, NULLs included; only the batch's keys are read
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE upsert_rows AS
+        WITH b AS (SELECT {casts} FROM {batch})
+        SELECT * FROM b
+        EXCEPT
+        SELECT {cols} FROM {table} SEMI JOIN b USING (city, date)
+    """)
+    if delta:
+        con.execute(f"INSERT INTO {delta} SELECT -1, {cols} FROM {table} SEMI JOIN upsert_rows USING (city, date)")
+        con.execute(f"INSERT INTO {delta} SELECT 1, {cols} FROM upsert_rows")
+    con.execute(f"INSERT INTO {CHANGES_TABLE} SELECT city, date FROM upsert_rows")
+    con.execute(f"""
+        MERGE INTO {table} AS t
+        USING upsert_rows AS s
+        ON t.city = s.city AND t.date = s.date
+        WHEN MATCHED THEN UPDATE SET {sets}
+        WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({", ".join(f"s.{col}" for col in schema)})
+    """)
+    con.execute("DROP TABLE upsert_rows")
+
+
+# ── Raw forecast weather (loaded by ingest_forecast.py) ──────────────────────
+# One row per (city, date), growing: each refresh upserts its 30 past + 7
+# forecast days, so observed days stay after they leave the API window
+RAW_WEATHER_SCHEMA = store.DATASETS["forecast_vintages"]["columns"]
+
+
+@node("raw_weather", sources=[loaded("raw_weather")])
+def build_raw_weather(con):
+    # The forecast ingest loads this table directly (load_raw_weather); a
+    # build only creates it. A new one (a --full build) is seeded with the
+    # latest value of each (city, date) from, in order of precedence: the
+    # live generation's raw_weather (the table of record: it holds every
+    # upserted batch, archived or not), the archived vintages (latest issue
+    # first) and the pre-vintage archive
+    cols = ", ".join(f"{col} {typ}" for col, typ in RAW_WEATHER_SCHEMA.items())
+    con.execute(f"CREATE TABLE IF NOT EXISTS raw_weather ({cols})")
+    if con.execute("SELECT COUNT(*) FROM raw_weather").fetchone()[0]:
+        return
+    names    = ", ".join(RAW_WEATHER_SCHEMA)
+    live     = generations.current_path()
+    attached = os.path.exists(live)
+    if attached:
+        con.execute(f"ATTACH {store.sql_path(live)} AS live_generation (READ_ONLY)")
+    try:
+        seeds = []
+        if attached and con.execute("""
+            SELECT COUNT(*) FROM duckdb_tables()
+            WHERE database_name = 'live_generation' AND table_name = 'raw_weather'
+        """).fetchone()[0]:
+            seeds.append(f"SELECT {names}, 0 AS seed, NULL::DATE AS issue_date FROM live_generation.raw_weather")
+        if store.exists("forecast_vintages"):
+            seeds.append(f"SELECT {names}, 1 AS seed, issue_date FROM {store.scan('forecast_vintages')}")
+        if store.exists("forecast"):
+            seeds.append(f"SELECT {names}, 2 AS seed, NULL::DATE AS issue_date FROM {store.scan('forecast')}")
+        if seeds:
+            con.execute(f"""
+                INSERT INTO raw_weather
+                SELECT {names}
+                FROM ({" UNION ALL ".join(seeds)})
+                QUALIFY ROW_NUMBER() OVER (
+                    PARTITION BY city, date ORDER BY seed, issue_date DESC
+                ) = 1
+            """)
+    finally:
+        if attached:
+            con.execute("DETACH live_generation")
+
+
+@loader("raw_weather")
+def load_raw_weather(con, batch):
+    """Upsert `batch` by (city, date) (see _upsert)."""
+    build_raw_weather(con)
+    con.register("forecast_batch", batch)
+    try:
+        _upsert(con, "raw_weather", RAW_WEATHER_SCHEMA, "forecast_batch")
+    finally:
+        con.unregister("forecast_batch")
+
+
+# ── Historical air + soil temps (typed Parquet, by city and year) ────────────
+# Built from the Parquet store; ingest_historical.py loads its daily deltas
+# directly, and the replaced/new rows (HISTORICAL_DELTA) feed the running
+# climatology aggregates below
+HISTORICAL_SCHEMA = {**store.DATASETS["historical"]["columns"], "city": "VARCHAR"}
+HISTORICAL_DELTA  = "temp_soil_historical_delta"
+
+
+@node("temp_soil_historical", sources=[parquet_files("historical"), loaded("temp_soil_historical")])
+def build_temp_soil_historical(con):
+    con.execute(f"""
+        CREATE OR REPLACE TABLE temp_soil_historical AS
+        SELECT date, temp_min, temp_max, soil_temp_0_7cm, soil_temp_7_to_28cm, city
+        FROM {store.scan("historical")}
+    """)
+
+
+@loader("temp_soil_historical")
+def load_temp_soil_historical(con, batch):
+    """Upsert `batch` by (city, date), keeping the signed row changes in HISTORICAL_DELTA."""
+    cols = ", ".join(f"{col} {typ}" for col, typ in HISTORICAL_SCHEMA.items())
+    con.execute(f"CREATE TABLE IF NOT EXISTS {HISTORICAL_DELTA} (sign INTEGER, {cols})")
+    con.execute(f"DELETE FROM {HISTORICAL_DELTA}")
+    con.register("historical_batch", batch)
+    try:
+        _upsert(con, "temp_soil_historical", HISTORICAL_SCHEMA, "historical_batch", delta=HISTORICAL_DELTA)
+    finally:
+        con.unregister("historical_batch")
+
+
+# ── Climatology cube (prefix sums per city, day of year and year) ────────────
+# For every year y on a dense grid, the running sum and count of each
+# variable over the years up to y. The normal for a day over any year range
+# [a, b] is two row lookups, (cum[b] - cum[a-1]) / (n[b] - n[a-1]); the
+# all-time normal is the last year's row. A load adds each new row's value
+# (and subtracts a replaced one's) to its day from its year onward, so an
+# appended day touches one row.
+CLIMATE_COLUMNS = ["temp_min", "temp_max", "soil_temp_0_7cm", "soil_temp_7_to_28cm"]
+
+
+@node("climate_cube", inputs=["temp_soil_historical"], sources=[value(CLIMATE_COLUMNS)])
+def build_climate_cube(con):
+    sums = ", ".join(f"SUM({c}) AS sum_{c}, COUNT({c}) AS n_{c}" for c in CLIMATE_COLUMNS)
+    cums = ", ".join(f"SUM(COALESCE(y.sum_{c}, 0)) OVER w AS cum_sum_{c}, "
+                     f"SUM(COALESCE(y.n_{c}, 0)) OVER w AS cum_n_{c}" for c in CLIMATE_COLUMNS)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE climate_cube AS
+        WITH yearly AS (
+            SELECT city, DAYOFYEAR(date) AS doy, YEAR(date) AS year, {sums}
+            FROM temp_soil_historical
+            GROUP BY city, DAYOFYEAR(date), YEAR(date)
+        ),
+        grid AS (
+            SELECT city, UNNEST(range(1, 367)) AS doy, first_year, last_year
+            FROM (SELECT city, MIN(year) AS first_year, MAX(year) AS last_year
+                  FROM yearly GROUP BY city)
+        ),
+        cells AS (
+            SELECT city, doy, UNNEST(range(first_year, last_year + 1)) AS year FROM grid
+        )
+        SELECT c.city, c.doy, CAST(c.year AS INTEGER) AS year, {cums}
+        FROM cells c
+        LEFT JOIN yearly y ON y.city = c.city AND y.doy = c.doy AND y.year = c.year
+        WINDOW w AS (PARTITION BY c.city, c.doy ORDER BY c.year)
+        ORDER BY c.city, c.year, c.doy
+    """)
+
+
+@updater("climate_cube")
+def update_climate_cube(con):
+    # Deltas are later days or replaced ones, so the grid only grows forward:
+    # a city's first day of a new year adds that year's rows, carrying the
+    # previous year's sums, before the changes are added in
+    cols = ", ".join(f"cum_sum_{c}, cum_n_{c}" for c in CLIMATE_COLUMNS)
+    con.execute(f"""
+        INSERT INTO climate_cube
+        SELECT c.city, c.doy, CAST(y.year AS INTEGER) AS year, {cols}
+        FROM climate_cube c
+        JOIN (SELECT city, MAX(year) AS last_year FROM climate_cube GROUP BY city) l
+          ON l.city = c.city AND c.year = l.last_year
+        JOIN (SELECT city, MAX(YEAR(date)) AS new_year FROM {HISTORICAL_DELTA} GROUP BY city) d
+          ON d.city = c.city AND d.new_year > l.last_year
+        CROSS JOIN LATERAL (SELECT UNNEST(range(l.last_year + 1, d.new_year + 1)) AS year) y
+    """)
+    sums = ", ".join(f"SUM(sign * {c}) AS sum_{c}, SUM(CASE WHEN {c} IS NOT NULL THEN sign ELSE 0 END) AS n_{c}"
+                     for c in CLIMATE_COLUMNS)
+    adds = ", ".join(f"SUM(COALESCE(d.sum_{c}, 0)) AS sum_{c}, SUM(d.n_{c}) AS n_{c}" for c in CLIMATE_COLUMNS)
+    sets = ", ".join(f"cum_sum_{c} = c.cum_sum_{c} + a.sum_{c}, cum_n_{c} = c.cum_n_{c} + a.n_{c}"
+                     for c in CLIMATE_COLUMNS)
+    con.execute(f"""
+        UPDATE climate_cube AS c SET {sets}
+        FROM (
+            SELECT c.city, c.doy, c.year, {adds}
+            FROM climate_cube c
+            JOIN (
+                SELECT city, DAYOFYEAR(date) AS doy, YEAR(date) AS year, {sums}
+                FROM {HISTORICAL_DELTA}
+                GROUP BY city, DAYOFYEAR(date), YEAR(date)
+            ) d ON d.city = c.city AND d.doy = c.doy AND c.year >= d.year
+            GROUP BY c.city, c.doy, c.year
+        ) a
+        WHERE c.city = a.city AND c.doy = a.doy AND c.year = a.year
+    """)
+
+
+# ── Freeze extremes per city and year ────────────────────────────────────────
+@node("freeze_by_year", inputs=["temp_soil_historical"])
+def build_freeze_by_year(con):
+    # Last spring freeze (Jan–Jun) and first fall freeze (Jul–Dec), ≤ 32°F
+    con.execute("""
+        CREATE OR REPLACE TABLE freeze_by_year AS
         SELECT
             city,
             YEAR(date) AS year,
-            MAX(date)  AS last_freeze
+            MAX(date) FILTER (WHERE MONTH(date) <= 6 AND temp_min <= 32) AS last_freeze,
+            MIN(date) FILTER (WHERE MONTH(date) > 6  AND temp_min <= 32) AS first_freeze
         FROM temp_soil_historical
-        WHERE MONTH(date) <= 6
-          AND temp_min <= 32
         GROUP BY city, YEAR(date)
-    ),
-    min_freeze_date AS (
+    """)
+
+
+@updater("freeze_by_year")
+def update_freeze_by_year(con):
+    # Years that only gained days fold the new freezes into their extremes.
+    # An extreme can't be un-merged, so years with replaced days are
+    # recomputed from their own rows instead.
+    replaced = f"SELECT DISTINCT city, YEAR(date) AS year FROM {HISTORICAL_DELTA} WHERE sign < 0"
+    con.execute(f"""
+        DELETE FROM freeze_by_year USING ({replaced}) r
+        WHERE freeze_by_year.city = r.city AND freeze_by_year.year = r.year
+    """)
+    con.execute(f"""
+        INSERT INTO freeze_by_year BY NAME
+        SELECT
+            h.city,
+            YEAR(h.date) AS year,
+            MAX(h.date) FILTER (WHERE MONTH(h.date) <= 6 AND h.temp_min <= 32) AS last_freeze,
+            MIN(h.date) FILTER (WHERE MONTH(h.date) > 6  AND h.temp_min <= 32) AS first_freeze
+        FROM temp_soil_historical h
+        JOIN ({replaced}) r ON r.city = h.city AND r.year = YEAR(h.date)
+        GROUP BY h.city, YEAR(h.date)
+    """)
+    con.execute(f"""
+        MERGE INTO freeze_by_year AS t
+        USING (
+            SELECT
+                city,
+                YEAR(date) AS year,
+                MAX(date) FILTER (WHERE MONTH(date) <= 6 AND temp_min <= 32) AS last_freeze,
+                MIN(date) FILTER (WHERE MONTH(date) > 6  AND temp_min <= 32) AS first_freeze
+            FROM {HISTORICAL_DELTA} d
+            ANTI JOIN ({replaced}) r ON r.city = d.city AND r.year = YEAR(d.date)
+            WHERE sign > 0
+            GROUP BY city, YEAR(date)
+        ) AS d
+        ON t.city = d.city AND t.year = d.year
+        WHEN MATCHED THEN UPDATE SET
+            last_freeze  = GREATEST(t.last_freeze, d.last_freeze),
+            first_freeze = LEAST(t.first_freeze, d.first_freeze)
+        WHEN NOT MATCHED THEN INSERT (city, year, last_freeze, first_freeze)
+            VALUES (d.city, d.year, d.last_freeze, d.first_freeze)
+    """)
+
+
+# ── Sun times ────────────────────────────────────────────────────────────────
+@node("sun_times", sources=[value(CITIES), file_contents(solar.__file__)], yearly=True)
+def build_sun_times(con):
+    # Computed locally for the current year (solar.py, NOAA algorithm) as
+    # HH:MM:SS strings; cast to proper DATE and TIME types for joins and the app
+    con.register("sun_df", solar.sun_times())
+    con.execute("""
+        CREATE OR REPLACE TABLE sun_times AS
         SELECT
             city,
-            YEAR(date) AS year,
-            MIN(date)  AS first_freeze
-        FROM temp_soil_historical
-        WHERE MONTH(date) > 6
-          AND temp_min <= 32
-        GROUP BY city, YEAR(date)
-    ),
-    freeze_by_year AS (
+            date::DATE               AS date,
+            sunrise::TIME            AS sunrise,
+            sunset::TIME             AS sunset,
+            morning_twilight::TIME   AS morning_twilight,
+            evening_twilight::TIME   AS evening_twilight,
+            solar_noon::TIME         AS solar_noon,
+            day_length::TIME         AS day_length
+        FROM sun_df
+    """)
+    con.unregister("sun_df")
+
+
+# ── Plants ───────────────────────────────────────────────────────────────────
+@node("plants", sources=[file_contents(CSV_PLANTS)])
+def build_plants(con):
+    con.execute(f"""
+        CREATE OR REPLACE TABLE plants AS
+        SELECT * FROM read_csv_auto({store.sql_path(CSV_PLANTS)})
+    """)
+
+
+# ── 6-week weather (forecast + recent history) ───────────────────────────────
+@node("six_weeks_weather", inputs=["raw_weather"])
+def build_six_weeks_weather(con):
+    con.execute("""
+        CREATE OR REPLACE TABLE six_weeks_weather AS
         SELECT
-            mx.city, mx.year,
-            mx.last_freeze, mn.first_freeze
-        FROM max_freeze_date mx
-        JOIN min_freeze_date mn
-          ON mx.city = mn.city AND mx.year = mn.year
-    )
-    SELECT
-        city,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(ROUND(AVG(DAYOFYEAR(last_freeze))) - 1 AS INTEGER)
-            AS avg_last_freeze_all_time,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(ROUND(AVG(CASE WHEN year >= YEAR(current_date) - 10
-                                  THEN DAYOFYEAR(last_freeze) END)) - 1 AS INTEGER)
-            AS avg_last_freeze_ten_years,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(ROUND(AVG(CASE WHEN year >= YEAR(current_date) - 5
-                                  THEN DAYOFYEAR(last_freeze) END)) - 1 AS INTEGER)
-            AS avg_last_freeze_five_years,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(ROUND(AVG(DAYOFYEAR(first_freeze))) - 1 AS INTEGER)
-            AS avg_first_freeze_all_time,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(ROUND(AVG(CASE WHEN year >= YEAR(current_date) - 10
-                                  THEN DAYOFYEAR(first_freeze) END)) - 1 AS INTEGER)
-            AS avg_first_freeze_ten_years,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(ROUND(AVG(CASE WHEN year >= YEAR(current_date) - 5
-                                  THEN DAYOFYEAR(first_freeze) END)) - 1 AS INTEGER)
-            AS avg_first_freeze_five_years
-    FROM freeze_by_year
-    GROUP BY city
-    ORDER BY city
-""")
-
-# ── Daily historical averages (avg air + soil temp per calendar day) ──────────
-# Subtract 1 from DAYOFYEAR so Jan 1 (day 1) stays as Jan 1, not Jan 2
-con.execute("""
-    CREATE OR REPLACE TABLE avg_temp_daily AS
-    SELECT
-        city,
-        MAKE_DATE(YEAR(current_date), 1, 1)
-            + CAST(DAYOFYEAR(date) - 1 AS INTEGER) AS date,
-        AVG(temp_min)            AS avg_min_temp,
-        AVG(temp_max)            AS avg_max_temp,
-        AVG(soil_temp_0_7cm)     AS avg_shallow_soil_temp,
-        AVG(soil_temp_7_to_28cm) AS avg_deep_soil_temp
-    FROM temp_soil_historical
-    GROUP BY city,
-             MAKE_DATE(YEAR(current_date), 1, 1)
-                 + CAST(DAYOFYEAR(date) - 1 AS INTEGER)
-    ORDER BY city, date
-""")
-
-# ── Daily data: join sun times with historical temp averages ──────────────────
-con.execute("""
-    CREATE OR REPLACE TABLE daily_data AS
-    SELECT
-        tsh.date,
-        tsh.city,
-        sun.morning_twilight,
-        sun.sunrise,
-        sun.solar_noon,
-        sun.sunset,
-        sun.evening_twilight,
-        sun.day_length,
-        tsh.avg_min_temp,
-        tsh.avg_max_temp,
-        tsh.avg_shallow_soil_temp,
-        tsh.avg_deep_soil_temp
-    FROM sun_times AS sun
-    JOIN avg_temp_daily AS tsh
-      ON tsh.date = sun.date
-     AND tsh.city = sun.city
-""")
-
-# ── Planting gantt ────────────────────────────────────────────────────────────
-con.execute("""
-    CREATE OR REPLACE TABLE planting_gantt AS
-    WITH group_params AS (
+            city,
+            date,
+            ROUND((temp_max + temp_min) / 2, 1) AS temp_avg,
+            temp_max,
+            temp_min,
+            precipitation
+        FROM raw_weather
+    """)
+
+
+@updater("six_weeks_weather")
+def update_six_weeks_weather(con):
+    con.execute(f"""
+        DELETE FROM six_weeks_weather USING {CHANGES_TABLE} c
+        WHERE six_weeks_weather.city = c.city AND six_weeks_weather.date = c.date
+    """)
+    con.execute(f"""
+        INSERT INTO six_weeks_weather BY NAME
         SELECT
-            growing_season,
-            harvest_type,
-            AVG(weeks_indoor_before_transplant) AS avg_weeks_indoor,
-            AVG(days_to_maturity)               AS avg_days_to_maturity,
-            AVG(max_viable_temp_f)              AS avg_max_viable_temp,
-            AVG(min_viable_temp_f)              AS avg_min_viable_temp
-        FROM plants
-        GROUP BY growing_season, harvest_type
-    ),
-    freeze_dates AS (
-        SELECT city, avg_last_freeze_all_time FROM avg_freeze_dates
-    ),
-    soil_start AS (
+            city,
+            date,
+            ROUND((temp_max + temp_min) / 2, 1) AS temp_avg,
+            temp_max,
+            temp_min,
+            precipitation
+        FROM raw_weather
+        SEMI JOIN {CHANGES_TABLE} c USING (city, date)
+    """)
+
+
+# ── Irrigation tracker ───────────────────────────────────────────────────────
+@node("irrigation_tracker", inputs=["six_weeks_weather"])
+def build_irrigation_tracker(con):
+    con.execute("""
+        CREATE OR REPLACE TABLE irrigation_tracker AS
+        WITH weekly_rain AS (
+            SELECT
+                city,
+                DATE_TRUNC('week', date::DATE) AS week_start,
+                ROUND(SUM(precipitation), 3)   AS total_rainfall,
+                1.0                             AS rainfall_needed
+            FROM six_weeks_weather
+            GROUP BY city, DATE_TRUNC('week', date::DATE)
+        )
+        SELECT
+            city,
+            week_start,
+            total_rainfall,
+            rainfall_needed,
+            ROUND(total_rainfall - rainfall_needed, 3) AS surplus_deficit,
+            CASE
+                WHEN total_rainfall >= rainfall_needed THEN 'No irrigation needed'
+                WHEN total_rainfall >= 0.5             THEN 'Light irrigation needed'
+                ELSE                                        'Irrigation needed'
+            END AS irrigation_status
+        FROM weekly_rain
+        ORDER BY city, week_start
+    """)
+
+
+@updater("irrigation_tracker")
+def update_irrigation_tracker(con):
+    # Recompute the whole weeks that contain a changed day
+    weeks = f"SELECT DISTINCT city, DATE_TRUNC('week', date::DATE) AS week_start FROM {CHANGES_TABLE}"
+    con.execute(f"""
+        DELETE FROM irrigation_tracker USING ({weeks}) w
+        WHERE irrigation_tracker.city = w.city AND irrigation_tracker.week_start = w.week_start
+    """)
+    con.execute(f"""
+        INSERT INTO irrigation_tracker BY NAME
+        WITH weekly_rain AS (
+            SELECT
+                s.city,
+                DATE_TRUNC('week', s.date::DATE) AS week_start,
+                ROUND(SUM(s.precipitation), 3)   AS total_rainfall,
+                1.0                               AS rainfall_needed
+            FROM six_weeks_weather s
+            JOIN ({weeks}) w
+              ON w.city = s.city AND w.week_start = DATE_TRUNC('week', s.date::DATE)
+            GROUP BY s.city, DATE_TRUNC('week', s.date::DATE)
+        )
+        SELECT
+            city,
+            week_start,
+            total_rainfall,
+            rainfall_needed,
+            ROUND(total_rainfall - rainfall_needed, 3) AS surplus_deficit,
+            CASE
+                WHEN total_rainfall >= rainfall_needed THEN 'No irrigation needed'
+                WHEN total_rainfall >= 0.5             THEN 'Light irrigation needed'
+                ELSE                                        'Irrigation needed'
+            END AS irrigation_status
+        FROM weekly_rain
+    """)
+
+
+# ── Freeze cube (prefix sums per city and year) ──────────────────────────────
+# Running sums of the last/first freeze day of year, and a count, over the
+# years up to each year that had both; a range [a, b] is two lookups
+@node("freeze_cube", inputs=["freeze_by_year"])
+def build_freeze_cube(con):
+    con.execute("""
+        CREATE OR REPLACE TABLE freeze_cube AS
+        WITH grid AS (
+            SELECT city, UNNEST(range(MIN(year), MAX(year) + 1)) AS year
+            FROM freeze_by_year
+            GROUP BY city
+        ),
+        both_freezes AS (
+            SELECT city, year, DAYOFYEAR(last_freeze) AS last_doy, DAYOFYEAR(first_freeze) AS first_doy
+            FROM freeze_by_year
+            WHERE last_freeze IS NOT NULL AND first_freeze IS NOT NULL
+        )
+        SELECT
+            g.city,
+            CAST(g.year AS INTEGER)                          AS year,
+            SUM(COALESCE(f.last_doy, 0)) OVER w              AS cum_last_doy,
+            SUM(COALESCE(f.first_doy, 0)) OVER w             AS cum_first_doy,
+            SUM(CAST(f.city IS NOT NULL AS INTEGER)) OVER w  AS cum_years
+        FROM grid g
+        LEFT JOIN both_freezes f ON f.city = g.city AND f.year = g.year
+        WINDOW w AS (PARTITION BY g.city ORDER BY g.year)
+        ORDER BY g.city, g.year
+    """)
+
+
+# ── Average freeze dates (all-time + rolling windows) ────────────────────────
+@node("avg_freeze_dates", inputs=["freeze_cube"], yearly=True)
+def build_avg_freeze_dates(con):
+    # Each window [from_year, last year] is a difference of two freeze_cube
+    # rows; the row before a city's first year is all zeros
+    con.execute("""
+        CREATE OR REPLACE TABLE avg_freeze_dates AS
+        WITH bounds AS (
+            SELECT city, MIN(year) AS first_year, MAX(year) AS last_year
+            FROM freeze_cube
+            GROUP BY city
+        ),
+        windows AS (
+            SELECT city, last_year, 'all_time' AS span, first_year AS from_year FROM bounds
+            UNION ALL
+            SELECT city, last_year, 'ten_years', YEAR(current_date) - 10 FROM bounds
+            UNION ALL
+            SELECT city, last_year, 'five_years', YEAR(current_date) - 5 FROM bounds
+        ),
+        averages AS (
+            SELECT
+                w.city,
+                w.span,
+                hi.cum_years AS total_years,
+                (hi.cum_last_doy - COALESCE(lo.cum_last_doy, 0))
+                    / NULLIF(hi.cum_years - COALESCE(lo.cum_years, 0), 0)  AS last_doy,
+                (hi.cum_first_doy - COALESCE(lo.cum_first_doy, 0))
+                    / NULLIF(hi.cum_years - COALESCE(lo.cum_years, 0), 0)  AS first_doy
+            FROM windows w
+            JOIN freeze_cube hi
+              ON hi.city = w.city AND hi.year = w.last_year
+            LEFT JOIN freeze_cube lo
+              ON lo.city = w.city AND lo.year = LEAST(w.from_year, w.last_year + 1) - 1
+        )
+        SELECT
+            city,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND(MAX(last_doy) FILTER (WHERE span = 'all_time')) - 1 AS INTEGER)
+                AS avg_last_freeze_all_time,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND(MAX(last_doy) FILTER (WHERE span = 'ten_years')) - 1 AS INTEGER)
+                AS avg_last_freeze_ten_years,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND(MAX(last_doy) FILTER (WHERE span = 'five_years')) - 1 AS INTEGER)
+                AS avg_last_freeze_five_years,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND(MAX(first_doy) FILTER (WHERE span = 'all_time')) - 1 AS INTEGER)
+                AS avg_first_freeze_all_time,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND(MAX(first_doy) FILTER (WHERE span = 'ten_years')) - 1 AS INTEGER)
+                AS avg_first_freeze_ten_years,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(ROUND(MAX(first_doy) FILTER (WHERE span = 'five_years')) - 1 AS INTEGER)
+                AS avg_first_freeze_five_years
+        FROM averages
+        GROUP BY city
+        HAVING MAX(total_years) > 0
+        ORDER BY city
+    """)
+
+
+# ── Daily historical averages (avg air + soil temp per calendar day) ─────────
+@node("avg_temp_daily", inputs=["climate_cube"], yearly=True)
+def build_avg_temp_daily(con):
+    # All-time normals: each city's last cube year. Subtract 1 from the day of
+    # year so Jan 1 (day 1) stays as Jan 1, not Jan 2
+    con.execute("""
+        CREATE OR REPLACE TABLE avg_temp_daily AS
+        SELECT
+            c.city,
+            MAKE_DATE(YEAR(current_date), 1, 1)
+                + CAST(c.doy - 1 AS INTEGER)                                     AS date,
+            c.cum_sum_temp_min / NULLIF(c.cum_n_temp_min, 0)                       AS avg_min_temp,
+            c.cum_sum_temp_max / NULLIF(c.cum_n_temp_max, 0)                       AS avg_max_temp,
+            c.cum_sum_soil_temp_0_7cm / NULLIF(c.cum_n_soil_temp_0_7cm, 0)         AS avg_shallow_soil_temp,
+            c.cum_sum_soil_temp_7_to_28cm / NULLIF(c.cum_n_soil_temp_7_to_28cm, 0) AS avg_deep_soil_temp
+        FROM climate_cube c
+        JOIN (SELECT city, MAX(year) AS last_year FROM climate_cube GROUP BY city) l
+          ON l.city = c.city AND c.year = l.last_year
+        ORDER BY c.city, date
+    """)
+
+
+# ── Daily data: join sun times with historical temp averages ─────────────────
+@node("daily_data", inputs=["sun_times", "avg_temp_daily"])
+def build_daily_data(con):
+    con.execute("""
+        CREATE OR REPLACE TABLE daily_data AS
         SELECT
-            d.city,
-            g.growing_season,
-            g.harvest_type,
-            g.avg_weeks_indoor,
-            g.avg_days_to_maturity,
-            g.avg_max_viable_temp,
-            MIN(d.date) AS outdoor_start
-        FROM group_params g
-        CROSS JOIN freeze_dates f
-        JOIN daily_data d ON d.city = f.city
-        WHERE d.date > f.avg_last_freeze_all_time
-          AND d.avg_shallow_soil_temp > g.avg_min_viable_temp
-        GROUP BY
-            d.city, g.growing_season, g.harvest_type,
-            g.avg_weeks_indoor, g.avg_days_to_maturity, g.avg_max_viable_temp
-    ),
-    temp_bounds AS (
+            tsh.date,
+            tsh.city,
+            sun.morning_twilight,
+            sun.sunrise,
+            sun.solar_noon,
+            sun.sunset,
+            sun.evening_twilight,
+            sun.day_length,
+            tsh.avg_min_temp,
+            tsh.avg_max_temp,
+            tsh.avg_shallow_soil_temp,
+            tsh.avg_deep_soil_temp
+        FROM sun_times AS sun
+        JOIN avg_temp_daily AS tsh
+          ON tsh.date = sun.date
+         AND tsh.city = sun.city
+    """)
+
+
+# ── Planting gantt ───────────────────────────────────────────────────────────
+@node("planting_gantt", inputs=["plants", "avg_freeze_dates", "daily_data"])
+def build_planting_gantt(con):
+    con.execute("""
+        CREATE OR REPLACE TABLE planting_gantt AS
+        WITH group_params AS (
+            SELECT
+                growing_season,
+                harvest_type,
+                AVG(weeks_indoor_before_transplant) AS avg_weeks_indoor,
+                AVG(days_to_maturity)               AS avg_days_to_maturity,
+                AVG(max_viable_temp_f)              AS avg_max_viable_temp,
+                AVG(min_viable_temp_f)              AS avg_min_viable_temp
+            FROM plants
+            GROUP BY growing_season, harvest_type
+        ),
+        freeze_dates AS (
+            SELECT city, avg_last_freeze_all_time FROM avg_freeze_dates
+        ),
+        soil_start AS (
+            SELECT
+                d.city,
+                g.growing_season,
+                g.harvest_type,
+                g.avg_weeks_indoor,
+                g.avg_days_to_maturity,
+                g.avg_max_viable_temp,
+                MIN(d.date) AS outdoor_start
+            FROM group_params g
+            CROSS JOIN freeze_dates f
+            JOIN daily_data d ON d.city = f.city
+            WHERE d.date > f.avg_last_freeze_all_time
+              AND d.avg_shallow_soil_temp > g.avg_min_viable_temp
+            GROUP BY
+                d.city, g.growing_season, g.harvest_type,
+                g.avg_weeks_indoor, g.avg_days_to_maturity, g.avg_max_viable_temp
+        ),
+        temp_bounds AS (
+            SELECT
+                s.city,
+                s.growing_season,
+                s.harvest_type,
+                s.outdoor_start,
+                s.avg_days_to_maturity,
+                s.avg_weeks_indoor,
+                s.outdoor_start
+                    - CAST(ROUND(s.avg_weeks_indoor * 7) AS INTEGER) AS planting_start,
+                MIN(CASE
+                    WHEN d.date >= s.outdoor_start
+                     AND d.avg_max_temp > s.avg_max_viable_temp
+                    THEN d.date
+                END) AS temp_limit_date
+            FROM soil_start s
+            JOIN daily_data d ON d.city = s.city
+            GROUP BY
+                s.city, s.growing_season, s.harvest_type,
+                s.outdoor_start, s.avg_days_to_maturity,
+                s.avg_weeks_indoor, s.avg_max_viable_temp
+        )
         SELECT
-            s.city,
-            s.growing_season,
-            s.harvest_type,
-            s.outdoor_start,
-            s.avg_days_to_maturity,
-            s.avg_weeks_indoor,
-            s.outdoor_start
-                - CAST(ROUND(s.avg_weeks_indoor * 7) AS INTEGER) AS planting_start,
-            MIN(CASE
-                WHEN d.date >= s.outdoor_start
-                 AND d.avg_max_temp > s.avg_max_viable_temp
-                THEN d.date
-            END) AS temp_limit_date
-        FROM soil_start s
-        JOIN daily_data d ON d.city = s.city
-        GROUP BY
-            s.city, s.growing_season, s.harvest_type,
-            s.outdoor_start, s.avg_days_to_maturity,
-            s.avg_weeks_indoor, s.avg_max_viable_temp
-    )
-    SELECT
-        city,
-        growing_season,
-        harvest_type,
-        planting_start,
-        outdoor_start,
-        LEAST(
-            outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER),
-            COALESCE(temp_limit_date,
-                     outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER))
-        ) AS planting_end,
-        LEAST(
-            outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER),
-            COALESCE(temp_limit_date,
-                     outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER))
-        ) - planting_start AS planting_range
-    FROM temp_bounds
-    ORDER BY city, growing_season, harvest_type
-""")
-
-con.close()
-
-# ── Verify ────────────────────────────────────────────────────────────────────
-con2 = duckdb.connect(DB_PATH, read_only=True)
-for table in ['six_weeks_weather', 'irrigation_tracker', 'sun_times', 'daily_data',
-              'avg_freeze_dates', 'planting_gantt', 'plants']:
-    n = con2.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
-    print(f"  {table}: {n} rows")
-con2.close()
-print("model.py complete")
+            city,
+            growing_season,
+            harvest_type,
+            planting_start,
+            outdoor_start,
+            LEAST(
+                outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER),
+                COALESCE(temp_limit_date,
+                         outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER))
+            ) AS planting_end,
+            LEAST(
+                outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER),
+                COALESCE(temp_limit_date,
+                         outdoor_start + CAST(ROUND(avg_days_to_maturity) AS INTEGER))
+            ) - planting_start AS planting_range
+        FROM temp_bounds
+        ORDER BY city, growing_season, harvest_type
+    """)
+
+
+# ── Seasonal chart figures (pre-rendered per city) ───────────────────────────
+@node("seasonal_figures", inputs=["sun_times", "daily_data", "avg_freeze_dates"],
+      sources=[file_contents(charts.__file__)])
+def build_seasonal_figures(con):
+    """Pre-render each city's seasonal chart; the app only adds the 'today' marker."""
+    rows = []
+    for (city,) in con.execute("SELECT DISTINCT city FROM sun_times ORDER BY city").fetchall():
+        sun = charts.columns(con.execute("""
+            SELECT
+                date,
+                EPOCH(sunrise) / 3600          AS sunrise,
+                EPOCH(sunset) / 3600           AS sunset,
+                EPOCH(morning_twilight) / 3600 AS morning_twilight,
+                EPOCH(evening_twilight) / 3600 AS evening_twilight
+            FROM sun_times
+            WHERE city = ?
+            ORDER BY date
+        """, [city]))
+        soil = charts.columns(con.execute("""
+            SELECT date, avg_shallow_soil_temp, avg_min_temp, avg_max_temp
+            FROM daily_data
+            WHERE city = ?
+            ORDER BY date
+        """, [city]))
+        freeze = con.execute("""
+            SELECT avg_last_freeze_all_time FROM avg_freeze_dates WHERE city = ?
+        """, [city]).fetchone()
+        if charts.n_rows(sun):
+            rows.append((city, seasonal_figure(sun, soil, freeze).to_json()))
+
+    con.execute("CREATE OR REPLACE TABLE seasonal_figures (city VARCHAR, figure_json VARCHAR)")
+    if rows:
+        con.executemany("INSERT INTO seasonal_figures VALUES (?, ?)", rows)
+
+
+def load(con, loads):
+    """
+    Write {table: batch} through each table's loader, all in one transaction,
+    and record the batches' versions (content digests). The loaded tables
+    are marked built; their downstream nodes go stale, and the rows the
+    loads changed are left in CHANGES_TABLE for their updaters.
+    """
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LOADS_TABLE} (
+            tbl       VARCHAR PRIMARY KEY,
+            version   VARCHAR,
+            loaded_at TIMESTAMP,
+            n_rows    BIGINT
+        )
+    """)
+    con.execute(f"CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (city VARCHAR, date DATE)")
+    stored_fingerprints(con)   # creates the state table in a new file
+    con.begin()
+    try:
+        con.execute(f"DELETE FROM {CHANGES_TABLE}")
+        for table, batch in loads.items():
+            LOADERS[table](con, batch)
+            version = hashlib.sha256(pd.util.hash_pandas_object(batch, index=False).to_numpy().tobytes())
+            con.execute(f"INSERT OR REPLACE INTO {LOADS_TABLE} VALUES (?, ?, now(), ?)",
+                        [table, version.hexdigest(), len(batch)])
+        fps, own = fingerprints(con)
+        for table in loads:
+            _record(con, table, fps[table], own[table])
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    changed = con.execute(f"SELECT COUNT(*) FROM {CHANGES_TABLE}").fetchone()[0]
+    for table, batch in loads.items():
+        print(f"  loaded {table} ({len(batch)} rows, {changed} new or changed)")
+
+
+def build_tables(con, force=False, loaded=()):
+    """
+    Build the stale nodes (every node with force=True, except the `loaded`
+    ones), wave by wave: each wave is the stale nodes whose stale inputs are
+    done, built in parallel. A node is updated instead when it has an
+    updater, its own fingerprint is unchanged and every input rebuilt in
+    this run was loaded or updated. Returns the tables rebuilt or updated.
+    """
+    fps, own = fingerprints(con)
+    stored   = stored_fingerprints(con)
+    pending  = [t for t in NODES
+                if (force and t not in loaded) or stored.get(t, (None, None))[0] != fps[t]]
+    built    = []
+    updated  = set(loaded)   # tables whose changes are all in CHANGES_TABLE
+
+    def can_update(table):
+        rebuilt = [i for i in NODES[table]["inputs"] if i in built or i in loaded]
+        return (not force and table in UPDATERS and stored.get(table, (None, None))[1] == own[table]
+                and rebuilt and all(i in updated for i in rebuilt))
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL) as pool:
+        while pending:
+            wave  = [t for t in pending if not set(NODES[t]["inputs"]) & set(pending)]
+            modes = [can_update(t) for t in wave]
+            for table, update, secs in zip(wave, modes,
+                                           pool.map(lambda t, u: _build_node(con, t, u), wave, modes)):
+                _record(con, table, fps[table], own[table])
+                print(f"  {'updated' if update else 'built'} {table} ({secs:.2f}s)")
+                if update:
+                    updated.add(table)
+            built  += wave
+            pending = [t for t in pending if t not in wave]
+
+    return built
+
+
+def validate(con, tables=VERIFY_TABLES):
+    """Row-count check before publishing: every table must exist and be non-empty."""
+    counts = {}
+    for table in tables:
+        n = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"  {table}: {n} rows")
+        counts[table] = n
+    empty = [table for table, n in counts.items() if n == 0]
+    if empty:
+        raise ValueError(f"empty tables after build: {', '.join(empty)}")
+    return counts
+
+
+def up_to_date(table):
+    """
+    True if the live generation's `table` was built from the current code and
+    sources. Ingests check this before writing a source, to know whether a
+    direct load of just their new rows will leave the table complete.
+    """
+    path = generations.current_path()
+    if not os.path.exists(path):
+        return False
+    con = duckdb.connect(path, read_only=True)
+    try:
+        row = con.execute(f"SELECT fingerprint FROM {STATE_TABLE} WHERE node = ?", [table]).fetchone()
+        return row is not None and row[0] == fingerprints(con)[0][table]
+    except duckdb.CatalogException:
+        return False
+    finally:
+        con.close()
+
+
+def run_model(full=False, loads=None):
+    """
+    Bring the model up to date in a new generation and publish it.
+    Incremental runs start from a copy of the live database and rebuild only
+    stale nodes; full=True builds every table into an empty file. `loads`
+    ({table: DataFrame}) are written first, through the tables' loaders.
+    Returns the published path, or None when nothing was stale.
+    """
+    loads = loads or {}
+    # Seed the Parquet store from the old CSV intermediates on first run
+    store.import_legacy_csv("forecast")
+    store.import_legacy_csv("historical")
+
+    # Build into a new generation file; the live one is never written to
+    with generations.build_lock():
+        path = generations.new_path() if full else generations.clone_current()
+        con  = duckdb.connect(path)
+        try:
+            if loads:
+                load(con, loads)
+            built = build_tables(con, force=full, loaded=loads)
+            if built:
+                validate(con)
+        except Exception:
+            con.close()
+            generations.discard(path)
+            raise
+        con.close()
+        if not built:
+            generations.discard(path)
+            print("model.py: all tables up to date")
+            return None
+        generations.publish(path)
+
+    print(f"model.py complete → {os.path.basename(path)} ({len(built)} tables rebuilt)")
+    for sql, count, total, _ in slowlog.slowest(3):
+        print(f"  {total:6.2f}s  ×{count:<3} {sql[:90]}")
+    return path
+
+
+if __name__ == "__main__":
+    run_model(full="--full" in sys.argv[1:])
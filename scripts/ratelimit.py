@@ -0,0 +1,131 @@
+# ratelimit.py
+# Token-bucket rate limiter per API host
+# Quota state is kept on disk (data/ratelimit.json) so back-to-back runs and
+# separate processes share one budget. Buckets refill continuously, so idle
+# time banks up to `burst` requests that can go out at once.
+
+import os
+import json
+import time
+import fcntl
+import threading
+from email.utils import parsedate_to_datetime
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE      = os.path.dirname(os.path.abspath(__file__))
+_ROOT      = os.path.dirname(_HERE)
+STATE_PATH = os.path.join(_ROOT, "data", "ratelimit.json")
+
+# ── Limits per host ──────────────────────────────────────────────────────────
+# rate  — tokens added per second
+# burst — bucket capacity (max tokens banked while idle)
+# Open-Meteo's free tier allows 600 calls/minute and weights large requests
+# as several calls (see open_meteo_cost).
+RATE_LIMITS = {
+    "api.open-meteo.com":         {"rate": 600 / 60, "burst": 600},
+    "archive-api.open-meteo.com": {"rate": 600 / 60, "burst": 600},
+}
+
+MAX_RETRY_AFTER = 15 * 60  # never honor a Retry-After longer than this
+
+_lock = threading.Lock()
+
+
+# ── Request cost ─────────────────────────────────────────────────────────────
+def open_meteo_cost(n_days, n_vars, n_locations=1):
+    """Open-Meteo counts >14 days or >10 variables per location as extra calls."""
+    return n_locations * max(1.0, n_days / 14) * max(1.0, n_vars / 10)
+
+
+def parse_retry_after(value, default):
+    """Retry-After header (seconds or HTTP date) → seconds to wait."""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+# ── Persisted state ──────────────────────────────────────────────────────────
+def _locked_state(fn):
+    """Run fn(state) under both the thread lock and an exclusive file lock."""
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with _lock, open(STATE_PATH, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            raw = f.read()
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            result = fn(state)
+            f.seek(0)
+            f.truncate()
+            json.dump(state, f)
+            f.flush()   # before unlocking, or the next reader sees a torn file
+            return result
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _refill(bucket, limits, now):
+    elapsed = max(0.0, now - bucket["updated"])
+    bucket["tokens"]  = min(limits["burst"], bucket["tokens"] + elapsed * limits["rate"])
+    bucket["updated"] = now
+
+
+def _bucket(state, host, now):
+    limits = RATE_LIMITS[host]
+    bucket = state.setdefault(host, {
+        "tokens": limits["burst"], "updated": now, "blocked_until": 0.0,
+    })
+    _refill(bucket, limits, now)
+    return bucket, limits
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+def acquire(host, cost=1.0):
+    """
+    Block until `host` has quota for a request of `cost` tokens, then spend it.
+    A request never costs more than a full bucket: a full-archive backfill
+    drains the bucket, spacing backfills one refill (~60 s) apart.
+    """
+    if host not in RATE_LIMITS:
+        return
+
+    def take(state):
+        now = time.time()
+        bucket, limits = _bucket(state, host, now)
+        if bucket["blocked_until"] > now:
+            return bucket["blocked_until"] - now
+        needed = min(cost, limits["burst"])
+        if bucket["tokens"] >= needed:
+            bucket["tokens"] -= needed
+            return 0.0
+        return (needed - bucket["tokens"]) / limits["rate"]
+
+    while True:
+        wait = _locked_state(take)
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+
+def penalize(host, seconds):
+    """Server said 429: empty the bucket and block the host for `seconds`."""
+    if host not in RATE_LIMITS:
+        return
+
+    def block(state):
+        now = time.time()
+        bucket, _ = _bucket(state, host, now)
+        bucket["tokens"] = 0.0
+        bucket["blocked_until"] = max(bucket["blocked_until"], now + seconds)
+
+    _locked_state(block)
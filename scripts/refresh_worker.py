@@ -0,0 +1,163 @@
+# refresh_worker.py
+# Standalone daily refresh: forecast ingest + incremental model build
+# Runs as its own process (Procfile `worker:`), so the ingest never competes
+# with web requests for a worker's GIL, and web workers can scale freely.
+# Any number of copies may run against the same data/ directory: the one
+# holding the leader lock refreshes, the others wait to take over. A finished
+# refresh publishes a new database generation (see generations.py), which web
+# workers switch to on their next request.
+#
+#   python scripts/refresh_worker.py          leader loop, daily at 6am Pacific
+#   python scripts/refresh_worker.py --once   one refresh now (cron / one-off)
+#
+# The outcome of every run is written to data/refresh_status.json, which the
+# dashboard reports on /metrics.
+
+import os
+import sys
+import json
+import time
+import fcntl
+import signal
+import socket
+import logging
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import generations
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE       = os.path.dirname(os.path.abspath(__file__))
+_ROOT       = os.path.dirname(_HERE)
+DATA_DIR    = os.path.join(_ROOT, "data")
+LEADER_PATH = os.path.join(DATA_DIR, "refresh.leader.lock")
+STATUS_PATH = os.path.join(DATA_DIR, "refresh_status.json")
+
+TIMEZONE       = "America/Los_Angeles"
+REFRESH_HOUR   = 6        # local time
+LEADER_RETRY_S = 30       # how often a standby tries to take over
+STALE_AFTER_S  = 24 * 3600
+
+
+# ── Status file ──────────────────────────────────────────────────────────────
+def read_status(path=STATUS_PATH):
+    """Last written refresh status, or {} if there has been no run yet."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_status(**fields):
+    status = {**read_status(), **fields}
+    tmp = STATUS_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp, STATUS_PATH)
+    return status
+
+
+# ── Leader election ──────────────────────────────────────────────────────────
+def acquire_leadership():
+    """
+    Try to become the refresh leader. Returns the open lock file (keep it
+    open for as long as you lead), or None if another process leads. The
+    OS drops the lock when the holder exits, however it exits.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    f = open(LEADER_PATH, "a+")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    f.seek(0)
+    f.truncate()
+    f.write(f"{socket.gethostname()} {os.getpid()}\n")
+    f.flush()
+    return f
+
+
+def wait_for_leadership():
+    lock = acquire_leadership()
+    if lock is None:
+        logging.info("Another refresh worker is leader — standing by")
+    while lock is None:
+        time.sleep(LEADER_RETRY_S)
+        lock = acquire_leadership()
+    logging.info(f"Refresh leader (pid {os.getpid()})")
+    return lock
+
+
+# ── Refresh ──────────────────────────────────────────────────────────────────
+def refresh():
+    """One forecast ingest + model build; records the outcome. True on success."""
+    from scripts.ingest_forecast import run_forecast_ingest
+
+    started = time.time()
+    runs    = read_status().get("runs", 0) + 1
+    _write_status(state="running", started=started, pid=os.getpid(),
+                  host=socket.gethostname(), runs=runs)
+    try:
+        path = run_forecast_ingest()
+    except Exception as e:
+        logging.exception("Refresh failed")
+        finished = time.time()
+        _write_status(state="idle", last_outcome="failed", error=str(e),
+                      finished=finished, duration_s=finished - started,
+                      failures=read_status().get("failures", 0) + 1)
+        return False
+
+    finished = time.time()
+    _write_status(state="idle", last_outcome="ok", error=None,
+                  finished=finished, duration_s=finished - started, last_success=finished,
+                  generation=generations.current_generation(), published=bool(path))
+    logging.info(f"Refresh complete in {finished - started:.1f}s")
+    return True
+
+
+def _stale():
+    """True if there has been no successful refresh in the last day."""
+    return time.time() - read_status().get("last_success", 0) > STALE_AFTER_S
+
+
+def _exit(signum, frame):
+    # SIGTERM (dyno restart, deploy) → normal exit, so the lock is released
+    sys.exit(0)
+
+
+def main(argv):
+    signal.signal(signal.SIGTERM, _exit)
+
+    if "--once" in argv:
+        lock = acquire_leadership()
+        if lock is None:
+            logging.info("Another refresh worker is leader — skipping")
+            return 0
+        with lock:
+            return 0 if refresh() else 1
+
+    import pytz
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    # The lock is held for as long as this process runs the schedule
+    with wait_for_leadership():
+        # Catch up after downtime (e.g. a restart across 6am) before scheduling
+        if _stale():
+            refresh()
+
+        scheduler = BlockingScheduler(timezone=pytz.timezone(TIMEZONE))
+        scheduler.add_job(refresh, "cron", hour=REFRESH_HOUR, minute=0,
+                          coalesce=True, misfire_grace_time=3600)
+        logging.info(f"Refresh scheduled daily at {REFRESH_HOUR}:00 {TIMEZONE}")
+        scheduler.start()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,142 @@
+# slowlog.py
+# Slow-query capture for DuckDB, shared by model.py and the dashboard
+# Wrap a cursor in SlowQueryCursor and every statement is timed. Statements
+# slower than SLOW_QUERY_MS are written, with their parameters and an
+# operator-level profile, to data/logs/slow_queries.log (rotating):
+#   profile=True   profiling stays on for the cursor and the profile of the
+#                  slow statement itself is logged (model builds: writes
+#                  can't be rerun, and the profiling cost is noise there)
+#   profile=False  fast path is just a timer; a slow read-only statement is
+#                  rerun under EXPLAIN ANALYZE on a background thread (app)
+#
+#   SLOW_QUERY_MS=50 python scripts/model.py --full
+
+import os
+import re
+import time
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE    = os.path.dirname(os.path.abspath(__file__))
+_ROOT    = os.path.dirname(_HERE)
+LOG_PATH = os.path.join(_ROOT, "data", "logs", "slow_queries.log")
+
+SLOW_QUERY_MS    = float(os.environ.get("SLOW_QUERY_MS", "250"))
+LOG_MAX_BYTES    = 5 * 1024 * 1024
+LOG_BACKUPS      = 5
+PROFILE_INTERVAL = 300   # seconds between reruns of the same slow statement
+
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH|FROM|VALUES)\b", re.IGNORECASE)
+
+_lock     = threading.Lock()
+_logger   = None
+_profiled = {}   # statement → time of its last EXPLAIN ANALYZE rerun
+
+stats = {}   # statement → [count, total seconds, max seconds]
+
+
+# ── Log ──────────────────────────────────────────────────────────────────────
+def _log():
+    """Dedicated rotating logger, created on first slow statement."""
+    global _logger
+    with _lock:
+        if _logger is None:
+            os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+            handler = RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            _logger = logging.getLogger("slow_queries")
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            _logger.addHandler(handler)
+        return _logger
+
+
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+def _write(source, sql, params, seconds, profile):
+    _log().info(
+        f"[{source}] {seconds * 1000:.1f} ms\n"
+        f"SQL: {_normalize(sql)}\n"
+        f"params: {params!r}\n"
+        f"{profile}\n"
+    )
+
+
+def _record(sql, seconds):
+    key = _normalize(sql)
+    with _lock:
+        entry = stats.get(key)
+        if entry is None:
+            stats[key] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2]  = max(entry[2], seconds)
+
+
+def slowest(n=5):
+    """The n statements with the most total time: [(sql, count, total_s, max_s)]."""
+    with _lock:
+        rows = [(sql, *entry) for sql, entry in stats.items()]
+    return sorted(rows, key=lambda r: r[2], reverse=True)[:n]
+
+
+def _explain_analyze(cursor, source, sql, params, seconds):
+    """Rerun a read-only statement under EXPLAIN ANALYZE and log the plan."""
+    try:
+        rows = cursor.execute(f"EXPLAIN ANALYZE {sql}", params).fetchall()
+        plan = "\n".join(row[1] for row in rows)
+    except Exception as e:
+        plan = f"(EXPLAIN ANALYZE failed: {e})"
+    finally:
+        cursor.close()
+    _write(source, sql, params, seconds, plan)
+
+
+# ── Cursor wrapper ───────────────────────────────────────────────────────────
+class SlowQueryCursor:
+    """DuckDB cursor proxy that times execute() and captures slow statements."""
+
+    def __init__(self, cursor, source, profile=False, threshold_ms=None):
+        self._cursor    = cursor
+        self._source    = source
+        self._profile   = profile
+        self._threshold = (SLOW_QUERY_MS if threshold_ms is None else threshold_ms) / 1000
+        if profile:
+            cursor.execute("SET enable_profiling = 'no_output'")
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        self._cursor.execute(sql, params)
+        seconds = time.perf_counter() - start
+        _record(sql, seconds)
+        if seconds >= self._threshold:
+            self._capture(sql, params, seconds)
+        return self
+
+    def _capture(self, sql, params, seconds):
+        if self._profile:
+            _write(self._source, sql, params, seconds,
+                   self._cursor.get_profiling_information(format="query_tree"))
+        elif _READ_ONLY.match(sql):
+            key = _normalize(sql)
+            now = time.monotonic()
+            with _lock:
+                if now - _profiled.get(key, -PROFILE_INTERVAL) < PROFILE_INTERVAL:
+                    return
+                _profiled[key] = now
+            # Separate cursor: this one still holds the caller's result
+            threading.Thread(
+                target=_explain_analyze,
+                args=(self._cursor.cursor(), self._source, sql, params, seconds),
+                daemon=True,
+            ).start()
+        else:
+            _write(self._source, sql, params, seconds, "(not profiled: statement is not read-only)")
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
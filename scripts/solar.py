@@ -0,0 +1,180 @@
+# solar.py
+# Sunrise, sunset, twilight, solar noon and day length computed locally
+# NOAA solar position algorithm (the one behind NOAA's solar calculator
+# spreadsheet), vectorized with NumPy over every date × location at once.
+# Replaces the sunrisesunset.io API: the values are deterministic given
+# latitude, longitude and date, so any year range is available instantly.
+#
+#   python scripts/solar.py --check   compare against data/sun_times.csv
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from datetime import date
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.fetch import CITIES
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE    = os.path.dirname(os.path.abspath(__file__))
+_ROOT    = os.path.dirname(_HERE)
+CSV_PATH = os.path.join(_ROOT, "data", "sun_times.csv")
+
+TIMEZONE = "America/Los_Angeles"
+
+# Sun-center zenith angles (degrees) for each event
+ZENITH_SUNRISE  = 90.833   # upper limb on the horizon, with refraction
+ZENITH_NAUTICAL = 102.0    # sun 12° below the horizon
+
+TIME_COLS = ["morning_twilight", "sunrise", "solar_noon", "sunset", "evening_twilight"]
+
+_UNIX_EPOCH_JD = 2440587.5
+
+
+# ── NOAA solar geometry ──────────────────────────────────────────────────────
+def _declination_eqtime(jd):
+    """Solar declination (radians) and equation of time (minutes) at Julian day `jd`."""
+    t = (jd - 2451545.0) / 36525.0   # Julian centuries since J2000.0
+
+    mean_long = np.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    ecc       = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = np.radians(
+        np.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+        + np.sin(3 * mean_anom) * 0.000289
+    )
+    omega    = np.radians(125.04 - 1934.136 * t)
+    app_long = mean_long + center - np.radians(0.00569 + 0.00478 * np.sin(omega))
+
+    obliq = np.radians(
+        23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+        + 0.00256 * np.cos(omega)
+    )
+    decl = np.arcsin(np.sin(obliq) * np.sin(app_long))
+
+    y = np.tan(obliq / 2) ** 2
+    eqtime = 4 * np.degrees(
+        y * np.sin(2 * mean_long)
+        - 2 * ecc * np.sin(mean_anom)
+        + 4 * ecc * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long)
+        - 1.25 * ecc * ecc * np.sin(2 * mean_anom)
+    )
+    return decl, eqtime
+
+
+def _hour_angle(lat, decl, zenith):
+    """Hour angle (degrees) at which the sun reaches `zenith`; NaN if it never does."""
+    cos_ha = (np.cos(np.radians(zenith)) / (np.cos(lat) * np.cos(decl))
+              - np.tan(lat) * np.tan(decl))
+    with np.errstate(invalid="ignore"):
+        return np.degrees(np.arccos(cos_ha))
+
+
+def _event_utc(jd0, lat, lon, zenith, sign):
+    """
+    Minutes after 0h UTC of a rising (sign=-1) or setting (sign=+1) event,
+    evaluated twice: once at solar noon, then refined at the event itself.
+    """
+    minutes = 720 - 4 * lon
+    for _ in range(2):
+        decl, eqtime = _declination_eqtime(jd0 + minutes / 1440)
+        noon    = 720 - 4 * lon - eqtime
+        minutes = noon + sign * 4 * _hour_angle(lat, decl, zenith)
+    return minutes
+
+
+def _solar_noon_utc(jd0, lon):
+    minutes = 720 - 4 * lon
+    for _ in range(2):
+        _, eqtime = _declination_eqtime(jd0 + minutes / 1440)
+        minutes = 720 - 4 * lon - eqtime
+    return minutes
+
+
+# ── Formatting ───────────────────────────────────────────────────────────────
+def _clock(minutes, pad_hours=True):
+    """Minutes → 'HH:MM:SS' strings (None where the event doesn't happen)."""
+    valid = np.isfinite(minutes)
+    secs  = np.rint(np.where(valid, minutes, 0) * 60).astype(np.int64) % 86400
+    h, rem = np.divmod(secs, 3600)
+    m, s   = np.divmod(rem, 60)
+    hours  = h.astype(str)
+    if pad_hours:
+        hours = np.char.zfill(hours, 2)
+    text = (np.char.add(np.char.add(np.char.add(np.char.add(
+        hours, ":"), np.char.zfill(m.astype(str), 2)), ":"), np.char.zfill(s.astype(str), 2)))
+    return np.where(valid, text.astype(object), None)
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+def sun_times(locations=CITIES, start=None, end=None, tz=TIMEZONE):
+    """
+    Daily sun times for every location between `start` and `end` (inclusive;
+    default: the current calendar year), in local clock time for `tz`.
+    `locations` is {name: {"latitude", "longitude"}} like CITIES.
+    Returns the sun_times.csv layout: date, morning_twilight, sunrise,
+    solar_noon, sunset, evening_twilight, day_length, city.
+    """
+    year  = date.today().year
+    dates = pd.date_range(start or date(year, 1, 1), end or date(year, 12, 31), freq="D")
+    names = list(locations)
+
+    # Grid: one row per location, one column per date
+    lat = np.radians([locations[n]["latitude"] for n in names])[:, None]
+    lon = np.array([locations[n]["longitude"] for n in names], dtype=float)[:, None]
+    days = (dates - pd.Timestamp("1970-01-01")).days.to_numpy()
+    jd0  = (days + _UNIX_EPOCH_JD)[None, :].astype(float)
+
+    # Local UTC offset per date, taken at noon so DST switch days use the
+    # offset in force during daylight
+    noon   = (dates + pd.Timedelta(hours=12)).tz_localize(tz)
+    offset = (noon.tz_localize(None) - noon.tz_convert("UTC").tz_localize(None))
+    offset = (offset.total_seconds().to_numpy() / 60)[None, :]
+
+    events = {
+        "morning_twilight": _event_utc(jd0, lat, lon, ZENITH_NAUTICAL, -1),
+        "sunrise":          _event_utc(jd0, lat, lon, ZENITH_SUNRISE, -1),
+        "solar_noon":       _solar_noon_utc(jd0, lon) + 0 * lat,
+        "sunset":           _event_utc(jd0, lat, lon, ZENITH_SUNRISE, +1),
+        "evening_twilight": _event_utc(jd0, lat, lon, ZENITH_NAUTICAL, +1),
+    }
+    day_length = events["sunset"] - events["sunrise"]
+
+    df = pd.DataFrame({
+        "date": np.tile(dates.strftime("%Y-%m-%d").to_numpy(), len(names)),
+        **{col: _clock((events[col] + offset).ravel()) for col in TIME_COLS},
+        "day_length": _clock(day_length.ravel(), pad_hours=False),
+        "city": np.repeat(names, len(dates)),
+    })
+    return df
+
+
+def check(csv_path=CSV_PATH):
+    """Max / mean absolute difference (seconds) per column vs a sun_times CSV."""
+    ref = pd.read_csv(csv_path, dtype=str)
+    ref_dates = pd.to_datetime(ref["date"])
+    ours = sun_times(
+        {c: CITIES[c] for c in ref["city"].unique() if c in CITIES},
+        ref_dates.min().date(), ref_dates.max().date(),
+    )
+    both = ref.merge(ours, on=["city", "date"], suffixes=("_ref", ""))
+
+    rows = []
+    for col in TIME_COLS + ["day_length"]:
+        diff = (pd.to_timedelta(both[col]) - pd.to_timedelta(both[f"{col}_ref"])).dt.total_seconds().abs()
+        rows.append({"column": col, "max_s": diff.max(), "mean_s": round(diff.mean(), 1)})
+    return pd.DataFrame(rows), len(both)
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        report, n = check()
+        print(f"Compared {n} city-days against {CSV_PATH}")
+        print(report.to_string(index=False))
+    else:
+        print(sun_times().head(10).to_string(index=False))
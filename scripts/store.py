@@ -0,0 +1,286 @@
+# store.py
+# Typed, partitioned Parquet store for the ingest intermediates
+#   data/parquet/historical/city=<city>/year=<yyyy>/part-*.parquet
+#   data/parquet/forecast/city=<city>/part-*.parquet              (pre-vintage archive)
+#   data/parquet/forecast_vintages/issue_date=<yyyy-mm-dd>/part-*.parquet
+# Written by the ingest scripts, read directly by model.py. Each forecast run
+# adds one vintage (issue date); older vintages are never rewritten. Writes
+# and model builds serialize on the build lock (see Swaps below).
+
+import os
+import json
+import shutil
+import uuid
+import hashlib
+import duckdb
+from contextlib import contextmanager
+from scripts import generations
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE       = os.path.dirname(os.path.abspath(__file__))
+_ROOT       = os.path.dirname(_HERE)
+DATA_DIR    = os.path.join(_ROOT, "data")
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
+# Small appends (daily deltas) add a file per partition; compact past this
+MAX_FILES_PER_PARTITION = 8
+
+# ── Datasets ─────────────────────────────────────────────────────────────────
+DATASETS = {
+    "historical": {
+        "columns": {
+            "date":                "DATE",
+            "temp_min":            "DOUBLE",
+            "temp_max":            "DOUBLE",
+            "soil_temp_0_7cm":     "DOUBLE",
+            "soil_temp_7_to_28cm": "DOUBLE",
+        },
+        "partitions": {"city": "VARCHAR", "year": "INTEGER"},
+        "legacy_csv": os.path.join(DATA_DIR, "temp_soil_historical.csv"),
+    },
+    "forecast": {
+        "columns": {
+            "date":          "DATE",
+            "temp_max":      "DOUBLE",
+            "temp_min":      "DOUBLE",
+            "precipitation": "DOUBLE",
+        },
+        "partitions": {"city": "VARCHAR"},
+        "legacy_csv": os.path.join(DATA_DIR, "weather_raw.csv"),
+    },
+    "forecast_vintages": {
+        "columns": {
+            "date":          "DATE",
+            "temp_max":      "DOUBLE",
+            "temp_min":      "DOUBLE",
+            "precipitation": "DOUBLE",
+            "city":          "VARCHAR",
+        },
+        "partitions": {"issue_date": "DATE"},
+    },
+}
+
+
+def dataset_dir(name):
+    return os.path.join(PARQUET_DIR, name)
+
+
+def exists(name):
+    """True if the dataset has at least one Parquet file."""
+    for _, _, files in os.walk(dataset_dir(name)):
+        if any(f.endswith(".parquet") for f in files):
+            return True
+    return False
+
+
+def fingerprint(name):
+    """Change detector for a dataset: path, size and mtime of every Parquet file."""
+    root    = dataset_dir(name)
+    entries = []
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            if f.endswith(".parquet"):
+                path = os.path.join(dirpath, f)
+                st   = os.stat(path)
+                entries.append(f"{os.path.relpath(path, root)}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+
+def sql_path(path):
+    """`path` as a SQL string literal, for table functions and COPY targets."""
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def scan(name):
+    """SQL table expression reading the dataset with typed hive partitions."""
+    spec  = DATASETS[name]
+    glob  = os.path.join(dataset_dir(name), "**", "*.parquet")
+    types = ", ".join(f"'{col}': {typ}" for col, typ in spec["partitions"].items())
+    return f"read_parquet({sql_path(glob)}, hive_partitioning = true, hive_types = {{{types}}})"
+
+
+# ── Swaps ────────────────────────────────────────────────────────────────────
+# Every write stages its new files beside the dataset, then swaps them in
+# under the build lock (generations.build_lock), which model builds also hold
+# while they read the store. A swap first moves the new files into their
+# partitions and only then removes the files they replace, so a partition
+# never lacks data. The plan is journaled before anything moves; a swap cut
+# short by a crash is finished by the next write (_recover), so the window
+# where a partition holds both old and new files never outlives it.
+def _swap(moves, removals):
+    """Move staged files to their targets, then remove `removals` (paths under PARQUET_DIR)."""
+    journal = os.path.join(PARQUET_DIR, f".swap-{uuid.uuid4().hex}.json")
+    with open(journal + ".tmp", "w") as f:
+        json.dump({
+            "moves":    [[os.path.relpath(src, PARQUET_DIR), os.path.relpath(dst, PARQUET_DIR)]
+                         for src, dst in moves],
+            "removals": [os.path.relpath(p, PARQUET_DIR) for p in removals],
+        }, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(journal + ".tmp", journal)
+    _finish(journal)
+
+
+def _finish(journal):
+    """Carry out a journaled swap; every step can safely run twice."""
+    with open(journal) as f:
+        plan = json.load(f)
+    for src, dst in plan["moves"]:
+        src, dst = os.path.join(PARQUET_DIR, src), os.path.join(PARQUET_DIR, dst)
+        if os.path.exists(src):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(src, dst)
+    for path in plan["removals"]:
+        path = os.path.join(PARQUET_DIR, path)
+        if os.path.exists(path):
+            os.remove(path)
+        parent = os.path.dirname(path)
+        if os.path.isdir(parent) and not os.listdir(parent):
+            os.rmdir(parent)   # e.g. a year a backfill no longer covers
+    os.remove(journal)
+
+
+def _recover():
+    """Finish swaps a crash interrupted, then drop abandoned staging output."""
+    if not os.path.isdir(PARQUET_DIR):
+        return
+    for entry in sorted(os.listdir(PARQUET_DIR)):
+        if entry.startswith(".swap-") and entry.endswith(".json"):
+            _finish(os.path.join(PARQUET_DIR, entry))
+    for entry in os.listdir(PARQUET_DIR):
+        if entry.startswith((".staging-", ".swap-")):
+            path = os.path.join(PARQUET_DIR, entry)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    for dirpath, _, files in os.walk(PARQUET_DIR):
+        for f in files:
+            if f.startswith(".compact-"):
+                os.remove(os.path.join(dirpath, f))
+
+
+@contextmanager
+def _writing():
+    """Hold the build lock for a store write, after finishing any interrupted one."""
+    with generations.build_lock():
+        _recover()
+        yield
+
+
+def _parquet_files(root):
+    return [os.path.join(dirpath, f)
+            for dirpath, _, files in os.walk(root) for f in files if f.endswith(".parquet")]
+
+
+# ── Writes ───────────────────────────────────────────────────────────────────
+def _select(name, source):
+    """Cast `source` to the dataset schema and add the partition columns."""
+    spec = DATASETS[name]
+    cols = [f"CAST({col} AS {typ}) AS {col}" for col, typ in spec["columns"].items()]
+    for col, typ in spec["partitions"].items():
+        if col == "year":   # derived from the date
+            cols.append("CAST(YEAR(CAST(date AS DATE)) AS INTEGER) AS year")
+        else:
+            cols.append(f"CAST({col} AS {typ}) AS {col}")
+    return f"SELECT {', '.join(cols)} FROM {source}"
+
+
+def _stage(con, name, source):
+    """Write `source` as a partitioned tree outside the dataset; returns its path."""
+    staging    = os.path.join(PARQUET_DIR, f".staging-{name}-{uuid.uuid4().hex}")
+    partitions = ", ".join(DATASETS[name]["partitions"])
+    os.makedirs(PARQUET_DIR, exist_ok=True)
+    con.execute(f"""
+        COPY ({_select(name, source)}) TO {sql_path(staging)} (
+            FORMAT parquet,
+            PARTITION_BY ({partitions}),
+            FILENAME_PATTERN 'part-{{uuid}}'
+        )
+    """)
+    return staging
+
+
+def _write(con, name, source, replace):
+    """
+    Stage `source`, then swap its files in. With `replace`, the files already
+    in each top-level partition it covers are removed in the same swap.
+    """
+    root     = dataset_dir(name)
+    staging  = _stage(con, name, source)
+    moves    = [(f, os.path.join(root, os.path.relpath(f, staging))) for f in _parquet_files(staging)]
+    removals = []
+    if replace:
+        for entry in os.listdir(staging):
+            removals += _parquet_files(os.path.join(root, entry))
+    # If the swap fails, the staged files stay for _recover to move in
+    _swap(moves, removals)
+    shutil.rmtree(staging)
+
+
+def replace_partitions(name, df):
+    """
+    Replace every top-level partition present in `df` (the cities for
+    historical and forecast, the issue date for vintages). `df` is a
+    DataFrame or a dict of NumPy columns.
+    """
+    con = duckdb.connect()
+    try:
+        con.register("batch", df)
+        with _writing():
+            _write(con, name, "batch", replace=True)
+    finally:
+        con.close()
+
+
+def append(name, df):
+    """Append `df` as new files, then compact partitions that got too many."""
+    con = duckdb.connect()
+    try:
+        con.register("batch", df)
+        with _writing():
+            _write(con, name, "batch", replace=False)
+            _compact(con, name)
+    finally:
+        con.close()
+
+
+def compact(name):
+    """Rewrite leaf partitions holding more than MAX_FILES_PER_PARTITION files."""
+    con = duckdb.connect()
+    try:
+        with _writing():
+            _compact(con, name)
+    finally:
+        con.close()
+
+
+def _compact(con, name):
+    # The merged file and the removal of its parts are one swap
+    for dirpath, dirnames, files in os.walk(dataset_dir(name)):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        parts = [os.path.join(dirpath, f) for f in files if f.endswith(".parquet")]
+        if len(parts) <= MAX_FILES_PER_PARTITION:
+            continue
+        tmp = os.path.join(dirpath, f".compact-{uuid.uuid4().hex}")
+        con.execute(f"""
+            COPY (SELECT * FROM read_parquet({sql_path(os.path.join(dirpath, "*.parquet"))},
+                                             hive_partitioning = false)
+                  ORDER BY date)
+            TO {sql_path(tmp)} (FORMAT parquet)
+        """)
+        _swap([(tmp, os.path.join(dirpath, f"part-{uuid.uuid4()}.parquet"))], parts)
+
+
+def import_legacy_csv(name):
+    """One-time migration: seed an empty dataset from its old CSV intermediate."""
+    csv_path = DATASETS[name]["legacy_csv"]
+    if exists(name) or not os.path.exists(csv_path):
+        return False
+    con = duckdb.connect()
+    try:
+        with _writing():
+            if exists(name):   # another process migrated it while we waited
+                return False
+            _write(con, name, f"read_csv_auto({sql_path(csv_path)})", replace=True)
+    finally:
+        con.close()
+    return True
@@ -0,0 +1,253 @@
+# synthetic.py
+# Realistic synthetic data for scale-testing the pipeline and dashboard
+# Writes files in the same shapes as the real intermediates:
+#   locations.csv              city, latitude, longitude
+#   temp_soil_historical.csv   daily air + soil temps, N years per location
+#   weather_raw.csv            30 days past + 7 days forecast per location
+#   sun_times.csv              one calendar year per location (solar.py)
+#   plants.csv                 the real catalog plus jittered cultivars
+# Weather is simulated per location from a simple climate model: latitude
+# and distance from the coast set the seasonal mean, amplitude and diurnal
+# range; daily anomalies are persistent (AR(1)) so cold snaps and freezes
+# come in spells; soil temps lag the air through exponential smoothing;
+# precipitation is a wet/dry Markov chain, wetter in winter and on the coast.
+# Output is streamed in chunks of locations, so memory stays bounded no
+# matter how many GB are written.
+#
+#   python scripts/synthetic.py --locations 2000 --years 86 --plants 20000
+
+import os
+import sys
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+# Add project root to path so 'scripts' is importable when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.fetch import CITIES
+from scripts import solar
+
+# ── Paths (always relative to this file) ─────────────────────────────────────
+_HERE      = os.path.dirname(os.path.abspath(__file__))
+_ROOT      = os.path.dirname(_HERE)
+OUT_DIR    = os.path.join(_ROOT, "data", "synthetic")
+CSV_PLANTS = os.path.join(_ROOT, "data", "plants.csv")
+
+ROWS_PER_CHUNK = 1_000_000   # rows simulated + written at once (memory bound)
+FORECAST_PAST  = 30
+FORECAST_AHEAD = 7
+ARCHIVE_LAG    = 5           # the archive trails real time by a few days
+COAST_LON      = -124.2      # Oregon coastline, roughly
+CASCADES_LON   = -122.0      # crest of the Cascades, roughly
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+# ── Locations ────────────────────────────────────────────────────────────────
+def make_locations(n, rng):
+    """The real cities first, then random points across Oregon."""
+    names = list(CITIES)[:n]
+    lats  = [CITIES[c]["latitude"] for c in names]
+    lons  = [CITIES[c]["longitude"] for c in names]
+    extra = n - len(names)
+    names += [f"Site {i:05d}" for i in range(len(names) + 1, n + 1)]
+    lats  += list(np.round(rng.uniform(42.0, 46.2, extra), 4))
+    lons  += list(np.round(rng.uniform(-124.3, -116.6, extra), 4))
+    return pd.DataFrame({"city": names, "latitude": lats, "longitude": lons})
+
+
+def climate(locations, rng):
+    """Per-location climate parameters (°F / inches), arrays of len(locations)."""
+    lat    = locations["latitude"].to_numpy()
+    lon    = locations["longitude"].to_numpy()
+    marine = np.exp(-np.clip(lon - COAST_LON, 0, None) / 0.5)   # ocean influence, fades fast
+    east   = np.clip((lon - CASCADES_LON) / 1.0, 0, 1)            # high desert, east of the Cascades
+    n      = len(locations)
+    return {
+        "mean":  54.5 - 0.8 * (lat - 44) - 3 * marine - 8 * east + rng.normal(0, 1, n),
+        "amp":   14 - 8 * marine + 3 * east + rng.normal(0, 0.7, n),   # half the Jul–Jan swing
+        "dtr":   18 - 8 * marine + 12 * east + rng.normal(0, 1.5, n),  # diurnal range
+        "wet":   0.5 + 0.25 * marine - 0.3 * east,                     # winter wet-day chance
+        "rain":  0.35 + 0.3 * marine - 0.15 * east,                    # mean wet-day amount
+        "trend": 0.02,                                                 # warming °F / year
+    }
+
+
+# ── Weather simulation ───────────────────────────────────────────────────────
+def simulate(params, dates, rng):
+    """
+    Daily weather for every location × date: arrays shaped (n_loc, n_days)
+    for temp_max, temp_min, soil_temp_0_7cm, soil_temp_7_to_28cm, precipitation.
+    """
+    n_loc, n_days = len(params["mean"]), len(dates)
+    doy    = dates.dayofyear.to_numpy()
+    years  = (dates.year - 2000).to_numpy()
+    season = -np.cos(2 * np.pi * (doy - 20) / 365.25)          # -1 mid-Jan, +1 mid-Jul
+
+    # Seasonal normals + a year-to-year offset + warming trend
+    year_ids   = dates.year.to_numpy() - dates.year.min()
+    year_shift = rng.normal(0, 1.2, (n_loc, year_ids.max() + 1))[:, year_ids]
+    normal = (params["mean"][:, None] + params["amp"][:, None] * season
+              + year_shift + params["trend"] * years)
+    dtr    = params["dtr"][:, None] * (1 + 0.15 * season)        # wider swings in summer
+    p_wet  = np.clip(params["wet"][:, None] * (1 - 0.75 * (season + 1) / 2), 0.03, 0.9)
+    amount = params["rain"][:, None] * (1 - 0.4 * (season + 1) / 2)
+
+    eps   = rng.standard_normal((n_days, n_loc))
+    u_wet = rng.random((n_days, n_loc))
+    gamma = rng.gamma(0.8, 1 / 0.8, (n_days, n_loc))
+
+    anom   = np.empty((n_loc, n_days))
+    soil0  = np.empty((n_loc, n_days))
+    soil7  = np.empty((n_loc, n_days))
+    wet    = np.empty((n_loc, n_days), dtype=bool)
+    a      = np.zeros(n_loc)
+    s0     = normal[:, 0].copy()
+    s7     = normal[:, 0].copy()
+    was_wet = np.zeros(n_loc, dtype=bool)
+    phi, sd = 0.75, 5.0
+    for t in range(n_days):
+        a = phi * a + np.sqrt(1 - phi * phi) * sd * eps[t]
+        air = normal[:, t] + a
+        s0 += (air - s0) / 4       # shallow soil: ~4-day lag
+        s7 += (air - s7) / 18      # deep soil: ~18-day lag, damped
+        # Wet days cluster: a wet day makes the next one likelier
+        p  = np.where(was_wet, np.minimum(p_wet[:, t] + 0.25, 0.95), p_wet[:, t] * 0.8)
+        was_wet = u_wet[t] < p
+        anom[:, t], soil0[:, t], soil7[:, t], wet[:, t] = a, s0, s7, was_wet
+
+    air_mean = normal + anom
+    half_dtr = dtr / 2 * (1 - 0.3 * wet)                         # cloudy days swing less
+    return {
+        "temp_max":            air_mean + half_dtr,
+        "temp_min":            air_mean - half_dtr,
+        # Insulated ground rarely drops far below freezing
+        "soil_temp_0_7cm":     np.maximum(soil0 + 2, 30 + 0.2 * (soil0 - 30)),
+        "soil_temp_7_to_28cm": np.maximum(soil7 + 1.5, 33 + 0.1 * (soil7 - 33)),
+        "precipitation":       np.where(wet, amount * gamma.T, 0.0),
+    }
+
+
+# ── Writers ──────────────────────────────────────────────────────────────────
+def _write(df, path, first):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def _chunks(locations, n_days):
+    per_chunk = max(1, ROWS_PER_CHUNK // n_days)
+    for start in range(0, len(locations), per_chunk):
+        yield start == 0, locations.iloc[start:start + per_chunk]
+
+
+def _frame(chunk, dates, columns, values, decimals):
+    n_days = len(dates)
+    data = {"date": np.tile(dates.strftime("%Y-%m-%d").to_numpy(), len(chunk))}
+    for col in columns:
+        data[col] = np.round(values[col], decimals.get(col, 1)).ravel()
+    data["city"] = np.repeat(chunk["city"].to_numpy(), n_days)
+    return pd.DataFrame(data)
+
+
+def write_weather(locations, params, dates, path, columns, rng, warmup=0):
+    """Simulate and stream one weather file; `warmup` leading days are dropped."""
+    n_days = len(dates) - warmup
+    rows   = 0
+    for first, chunk in _chunks(locations, len(dates)):
+        idx    = chunk.index.to_numpy()
+        values = simulate({k: v[idx] if np.ndim(v) else v for k, v in params.items()}, dates, rng)
+        values = {k: v[:, warmup:] for k, v in values.items()}
+        df     = _frame(chunk, dates[warmup:], columns, values, {"precipitation": 3})
+        _write(df, path, first)
+        rows += len(df)
+        logging.info(f"{os.path.basename(path)}: {rows:,} rows "
+                     f"({min(idx[-1] + 1, len(locations))}/{len(locations)} locations)")
+    return rows, n_days
+
+
+def write_sun(locations, year, path):
+    rows = 0
+    for first, chunk in _chunks(locations, 366):
+        coords = {
+            row.city: {"latitude": row.latitude, "longitude": row.longitude}
+            for row in chunk.itertuples()
+        }
+        df = solar.sun_times(coords, date(year, 1, 1), date(year, 12, 31))
+        _write(df, path, first)
+        rows += len(df)
+    logging.info(f"{os.path.basename(path)}: {rows:,} rows")
+
+
+def write_plants(n_plants, path, rng, chunk_size=10_000):
+    """The real catalog first, then cultivars of it with jittered thresholds."""
+    base = pd.read_csv(CSV_PLANTS)
+    _write(base.head(n_plants), path, True)
+    written = min(n_plants, len(base))
+
+    while written < n_plants:
+        n  = min(chunk_size, n_plants - written)
+        df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+        ids = np.arange(written + 1, written + n + 1)
+        df["plant_id"]    = ids
+        df["common_name"] = df["common_name"] + " Cv. " + pd.Series(ids).map("{:05d}".format)
+
+        # Shift the whole temperature window together so it stays ordered
+        shift = np.round(rng.normal(0, 2.5, n)).astype(int)
+        for col in ("min_viable_temp_f", "ideal_temp_min_f", "ideal_temp_max_f", "max_viable_temp_f"):
+            df[col] = df[col] + shift
+        df["days_to_maturity"] = np.maximum(
+            20, np.round(df["days_to_maturity"] * rng.lognormal(0, 0.12, n))
+        ).astype(int)
+        indoor = ~df["direct_sow"].astype(bool)
+        df.loc[indoor, "weeks_indoor_before_transplant"] = np.clip(
+            df.loc[indoor, "weeks_indoor_before_transplant"] + rng.integers(-1, 2, indoor.sum()), 1, None
+        )
+
+        _write(df, path, False)
+        written += n
+    logging.info(f"{os.path.basename(path)}: {written:,} rows")
+
+
+# ── Main ─────────────────────────────────────────────────────────────────────
+def generate(out_dir=OUT_DIR, n_locations=1000, years=86, n_plants=20_000, seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    rng       = np.random.default_rng(seed)
+    today     = date.today()
+    locations = make_locations(n_locations, rng)
+    params    = climate(locations, rng)
+    locations.to_csv(os.path.join(out_dir, "locations.csv"), index=False)
+
+    historical = pd.date_range(date(today.year - years, 1, 1), today - timedelta(days=ARCHIVE_LAG))
+    write_weather(
+        locations, params, historical, os.path.join(out_dir, "temp_soil_historical.csv"),
+        ["temp_min", "temp_max", "soil_temp_0_7cm", "soil_temp_7_to_28cm"], rng,
+    )
+
+    # Start 60 days early so soil and anomaly state has settled
+    warmup   = 60
+    forecast = pd.date_range(today - timedelta(days=FORECAST_PAST + warmup),
+                             today + timedelta(days=FORECAST_AHEAD - 1))
+    write_weather(
+        locations, params, forecast, os.path.join(out_dir, "weather_raw.csv"),
+        ["temp_max", "temp_min", "precipitation"], rng, warmup=warmup,
+    )
+
+    write_sun(locations, today.year, os.path.join(out_dir, "sun_times.csv"))
+    write_plants(n_plants, os.path.join(out_dir, "plants.csv"), rng)
+    logging.info(f"Synthetic dataset written → {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for scale testing")
+    parser.add_argument("--out",       default=OUT_DIR)
+    parser.add_argument("--locations", type=int, default=1000)
+    parser.add_argument("--years",     type=int, default=86)
+    parser.add_argument("--plants",    type=int, default=20_000)
+    parser.add_argument("--seed",      type=int, default=0)
+    args = parser.parse_args()
+    generate(args.out, args.locations, args.years, args.plants, args.seed)
@@ -1,10 +1,14 @@
+import os
+import sys
 import duckdb
-import pandas as pd
 
-con = duckdb.connect('data/weather.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.generations import current_path
+
+con = duckdb.connect(current_path(), read_only=True)
 
 result = con.execute("""
     SELECT * FROM plants
 """).df()
 
-print(result)
\ No newline at end of file
+print(result)
@@ -0,0 +1,31 @@
+# conftest.py
+# Shared fixtures: every test gets its own data/ directory, so builds,
+# generations and Parquet stores never touch the checkout's data.
+import os
+import sys
+import pytest
+
+# Add project root to path so 'scripts' and 'dashboard' are importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import store, generations, slowlog, ratelimit, refresh_worker
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point generations, the Parquet store, rate limits, the refresh worker and
+    the slow log at tmp_path."""
+    monkeypatch.setattr(generations, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(generations, "POINTER_PATH", str(tmp_path / "weather.current"))
+    monkeypatch.setattr(generations, "LOCK_PATH", str(tmp_path / "weather.build.lock"))
+    monkeypatch.setattr(generations, "LEGACY_DB_PATH", str(tmp_path / "weather.db"))
+    monkeypatch.setattr(store, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(store, "PARQUET_DIR", str(tmp_path / "parquet"))
+    for name, spec in store.DATASETS.items():
+        if "legacy_csv" in spec:
+            monkeypatch.setitem(spec, "legacy_csv", str(tmp_path / f"{name}.csv"))
+    monkeypatch.setattr(ratelimit, "STATE_PATH", str(tmp_path / "ratelimit.json"))
+    monkeypatch.setattr(refresh_worker, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(refresh_worker, "LEADER_PATH", str(tmp_path / "refresh.leader.lock"))
+    monkeypatch.setattr(refresh_worker, "STATUS_PATH", str(tmp_path / "refresh_status.json"))
+    monkeypatch.setattr(slowlog, "LOG_PATH", str(tmp_path / "logs" / "slow_queries.log"))
+    return tmp_path
@@ -0,0 +1,402 @@
+# legacy_figures.py
+# The dashboard's figure code as it was before charts.py (row-by-row
+# iterrows / add_annotation / px.timeline), with the queries it ran. Kept
+# only as the reference test_charts.py checks the column-wise builders
+# against; don't use it in the app.
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from datetime import datetime
+from dash import html
+from dashboard.charts import COLORS, GANTT_COLORS, CHART_LAYOUT
+
+
+# ── Temp + Precip + Irrigation ───────────────────────────────────────────────
+def temp_precip(con, city):
+    irr = con.execute("""
+        SELECT week_start, total_rainfall, irrigation_status
+        FROM irrigation_tracker
+        WHERE city = ?
+        ORDER BY week_start DESC LIMIT 5
+    """, [city]).df()
+    temps = con.execute("""
+        SELECT
+            DATE_TRUNC('week', date) AS week_start,
+            AVG(temp_max) AS avg_high,
+            AVG(temp_min) AS avg_low,
+            SUM(precipitation) AS total_precip
+        FROM six_weeks_weather
+        WHERE city = ? AND date >= CURRENT_DATE - 30 AND date < CURRENT_DATE
+        GROUP BY week_start
+        ORDER BY week_start
+    """, [city]).df()
+
+    if temps.empty:
+        return {}
+
+    temps["week_start"] = pd.to_datetime(temps["week_start"])
+    temps["avg_high"]   = temps["avg_high"].round(1)
+    temps["avg_low"]    = temps["avg_low"].round(1)
+    temps["total_precip"] = temps["total_precip"].round(2)
+
+    # Merge irrigation status
+    if not irr.empty:
+        irr["week_start"] = pd.to_datetime(irr["week_start"])
+        temps = temps.merge(irr[["week_start", "total_rainfall", "irrigation_status"]],
+                            on="week_start", how="left")
+        temps["total_precip"] = temps["total_rainfall"].combine_first(temps["total_precip"])
+        temps["irrigation_status"] = temps["irrigation_status"].fillna("Unknown")
+    else:
+        temps["irrigation_status"] = temps["total_precip"].apply(
+            lambda x: "No irrigation needed" if x >= 0.5 else "Irrigation needed"
+        )
+
+    week_labels = temps["week_start"].dt.strftime("%b %d")
+
+    fig = make_subplots(
+        rows=2, cols=1,
+        row_heights=[0.60, 0.40],
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=("", ""),
+    )
+
+    fig.add_trace(go.Scatter(
+        x=week_labels, y=temps["avg_high"],
+        mode="lines+markers+text",
+        name="Avg High",
+        line=dict(color=COLORS["terracotta"], width=2),
+        marker=dict(color=COLORS["terracotta"], size=9),
+        text=[f"{v:.0f}°" for v in temps["avg_high"]],
+        textposition="top center",
+        textfont=dict(color=COLORS["terracotta"], size=11, family="DM Mono"),
+    ), row=1, col=1)
+
+    fig.add_trace(go.Scatter(
+        x=week_labels, y=temps["avg_low"],
+        mode="lines+markers+text",
+        name="Avg Low",
+        line=dict(color=COLORS["slate"], width=2),
+        marker=dict(color=COLORS["slate"], size=9),
+        text=[f"{v:.0f}°" for v in temps["avg_low"]],
+        textposition="bottom center",
+        textfont=dict(color=COLORS["slate"], size=11, family="DM Mono"),
+    ), row=1, col=1)
+
+    fig.add_trace(go.Bar(
+        x=week_labels,
+        y=temps["total_precip"],
+        name="Weekly Precip (in)",
+        marker_color=COLORS["slate"],
+        marker_opacity=0.8,
+        texttemplate="%{y:.1f}\"",
+        textposition="inside",
+        insidetextanchor="middle",
+        textfont=dict(size=10, family="DM Mono", color="white"),
+        constraintext="none",
+    ), row=2, col=1)
+
+    for i, (_, row) in enumerate(temps.iterrows()):
+        s = str(row["irrigation_status"]).lower()
+        is_needed = "needed" in s and "no" not in s
+        fig.add_annotation(
+            x=week_labels.iloc[i],
+            y=-0.25,
+            yref="y2",
+            text="Needed" if is_needed else "OK ✓",
+            showarrow=False,
+            font=dict(
+                size=9, family="Lato",
+                color=COLORS["terracotta"] if is_needed else COLORS["forest"],
+            ),
+            bgcolor="#fff3ee" if is_needed else "#eef6ee",
+            borderpad=2,
+        )
+
+    fig.update_layout(**CHART_LAYOUT)
+    fig.update_layout(
+        height=300,
+        showlegend=True,
+        legend=dict(orientation="h", y=1.05, x=0, font=dict(size=10)),
+        margin=dict(l=10, r=10, t=20, b=50),
+        bargap=0.3,
+    )
+    fig.update_yaxes(title_text="°F", row=1, col=1, gridcolor="#f0e8d8", zeroline=False)
+    fig.update_yaxes(
+        title_text="in", row=2, col=1,
+        gridcolor="#f0e8d8", zeroline=False, rangemode="tozero",
+        range=[0, temps["total_precip"].max() * 1.5] if temps["total_precip"].max() > 0 else [0, 1],
+    )
+    fig.update_xaxes(showgrid=False)
+    return fig
+
+
+# ── 10-day forecast ──────────────────────────────────────────────────────────
+def forecast(con, city):
+    df = con.execute("""
+        SELECT date, temp_max, temp_min, precipitation
+        FROM six_weeks_weather
+        WHERE city = ? AND date >= CURRENT_DATE
+        ORDER BY date
+        LIMIT 10
+    """, [city]).df()
+
+    if df.empty:
+        return {}
+
+    df["date_str"]     = pd.to_datetime(df["date"]).dt.strftime("%b %d")
+    df["temp_max"]     = df["temp_max"].round(0)
+    df["temp_min"]     = df["temp_min"].round(0)
+    df["precipitation"]= df["precipitation"].fillna(0).round(2)
+
+    y_min = df["temp_min"].min()
+    y_max = df["temp_max"].max()
+
+    fig = go.Figure()
+
+    for i in range(len(df)):
+        if i % 2 == 0:
+            fig.add_vrect(
+                x0=i - 0.5, x1=i + 0.5,
+                fillcolor="#f8f4ec", opacity=0.6, line_width=0,
+                layer="below",
+            )
+
+    fig.add_trace(go.Scatter(
+        x=df["date_str"], y=df["temp_max"],
+        mode="lines", showlegend=False,
+        line=dict(color=COLORS["terracotta"], width=1, dash="dot"),
+        opacity=0.35,
+    ))
+    fig.add_trace(go.Scatter(
+        x=df["date_str"], y=df["temp_min"],
+        mode="lines", showlegend=False,
+        line=dict(color=COLORS["slate"], width=1, dash="dot"),
+        opacity=0.35,
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df["date_str"], y=df["temp_max"],
+        mode="text", name="High",
+        text=[f"{int(v)}°" for v in df["temp_max"]],
+        textposition="top center",
+        textfont=dict(color=COLORS["terracotta"], size=14, family="DM Mono"),
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df["date_str"], y=df["temp_min"],
+        mode="text", name="Low",
+        text=[f"{int(v)}°" for v in df["temp_min"]],
+        textposition="bottom center",
+        textfont=dict(color=COLORS["slate"], size=14, family="DM Mono"),
+    ))
+
+    for _, row in df.iterrows():
+        p = row["precipitation"]
+        label = f"🌧 {p:.2f}\"" if p > 0.01 else "☁ —"
+        color = COLORS["slate"] if p > 0.01 else COLORS["muted"]
+        fig.add_annotation(
+            x=row["date_str"],
+            y=y_min - 5,
+            text=label, showarrow=False,
+            font=dict(size=9, color=color, family="Lato"),
+        )
+
+    fig.update_layout(**CHART_LAYOUT)
+    fig.update_layout(
+        height=190,
+        showlegend=True,
+        legend=dict(orientation="h", y=1.1, x=0, font=dict(size=10)),
+        margin=dict(l=10, r=10, t=20, b=40),
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(
+            showgrid=True, gridcolor="#f0e8d8", zeroline=False,
+            range=[y_min - 10, y_max + 10],
+            tickfont=dict(size=9),
+        ),
+    )
+    return fig
+
+
+# ── Plant cards ──────────────────────────────────────────────────────────────
+def plant_cards(con, city, selected_plants):
+    forecast = con.execute("""
+        SELECT date, temp_max, temp_min FROM six_weeks_weather
+        WHERE city = ? AND date >= CURRENT_DATE AND date < CURRENT_DATE + 7
+        ORDER BY date
+    """, [city]).df()
+    ph = ",".join(["?"] * len(selected_plants))
+    plants = con.execute(f"""
+        SELECT common_name, plant_family, min_viable_temp_f, max_viable_temp_f,
+               attracts_bees, attracts_butterflies, attracts_hummingbirds,
+               CASE WHEN direct_sow THEN 'Direct Sow'
+                    ELSE CAST(weeks_indoor_before_transplant AS VARCHAR) || ' wks indoor'
+               END AS sow_method
+        FROM plants WHERE common_name IN ({ph})
+    """, list(selected_plants)).df()
+
+    if forecast.empty:
+        return [html.P("No forecast data.", style={"color": COLORS["muted"]})]
+
+    cards = []
+    for _, plant in plants.sort_values("common_name").iterrows():
+        viable_days = forecast[
+            (forecast["temp_max"] >= plant["min_viable_temp_f"]) &
+            (forecast["temp_max"] <= plant["max_viable_temp_f"])
+        ].shape[0]
+        good = viable_days >= 4
+        cards.append(html.Div([
+            html.Span(plant["common_name"], className="plant-card-name"),
+            html.Span(plant["plant_family"], className="plant-card-family"),
+            html.Span(plant["sow_method"], className="plant-card-sow"),
+            html.Span(
+                f"{viable_days}/7 ✓" if good else f"{viable_days}/7 ✗",
+                className="plant-card-viable-good" if good else "plant-card-viable-bad",
+            ),
+            html.Span(
+                " ".join(filter(None, [
+                    "🐝" if plant.get("attracts_bees") else "",
+                    "🦋" if plant.get("attracts_butterflies") else "",
+                    "🌺" if plant.get("attracts_hummingbirds") else "",
+                ])),
+                style={"fontSize": "0.7rem", "display": "block", "marginTop": "2px"},
+            ),
+        ], className="plant-card"))
+    return cards
+
+
+# ── Gantt ────────────────────────────────────────────────────────────────────
+def _today_marker(fig):
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    fig.add_shape(
+        type="line", xref="x", yref="paper",
+        x0=today_str, x1=today_str, y0=0, y1=1,
+        line=dict(color=COLORS["terracotta"], width=1.5, dash="dash"),
+        opacity=0.8,
+    )
+    fig.add_annotation(
+        x=today_str, xref="x", yref="paper", y=1.02,
+        text="Today", showarrow=False,
+        font=dict(size=9, color=COLORS["terracotta"]),
+        xanchor="center",
+    )
+
+
+def empty_gantt():
+    year = datetime.now().year
+    fig = go.Figure(go.Scatter(
+        x=[f"{year}-01-01", f"{year}-12-31"],
+        y=[0, 0],
+        mode="markers",
+        marker=dict(opacity=0),
+        showlegend=False,
+        hoverinfo="skip",
+    ))
+    fig.update_layout(**CHART_LAYOUT)
+    fig.update_layout(
+        height=120,
+        xaxis=dict(
+            range=[f"{year}-01-01", f"{year}-12-31"],
+            tickformat="%b",
+            dtick="M1",
+            ticklabelmode="period",
+            showgrid=True,
+            gridcolor="#f0e8d8",
+            zeroline=False,
+        ),
+        yaxis=dict(visible=False, range=[-1, 1]),
+        annotations=[dict(
+            text="Select plants from the sidebar to see planting windows",
+            xref="paper", yref="paper", x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=12, color=COLORS["muted"], family="Lato"),
+        )],
+    )
+    _today_marker(fig)
+    return fig
+
+
+def gantt(con, city, selected_plants):
+    ph = ",".join(["?"] * len(selected_plants))
+    df = con.execute(f"""
+        SELECT p.common_name, p.growing_season,
+               pg.planting_start, pg.outdoor_start, pg.planting_end,
+               p.attracts_bees, p.attracts_butterflies, p.attracts_hummingbirds
+        FROM plants p
+        JOIN planting_gantt pg
+          ON p.growing_season = pg.growing_season
+         AND p.harvest_type   = pg.harvest_type
+        WHERE pg.city = ? AND p.common_name IN ({ph})
+        ORDER BY p.growing_season, p.common_name
+    """, [city] + list(selected_plants)).df()
+
+    if df.empty:
+        return {}
+
+    for col in ["planting_start", "outdoor_start", "planting_end"]:
+        df[col] = pd.to_datetime(df[col])
+
+    rows = []
+    pollinator_labels = {}
+    for _, row in df.iterrows():
+        if row["planting_start"] < row["outdoor_start"]:
+            rows.append({
+                "Task": row["common_name"], "Season": row["growing_season"],
+                "Start": row["planting_start"], "Finish": row["outdoor_start"],
+                "Segment": "Indoor start",
+            })
+        rows.append({
+            "Task": row["common_name"], "Season": row["growing_season"],
+            "Start": row["outdoor_start"], "Finish": row["planting_end"],
+            "Segment": "Outdoor",
+        })
+        icons = "".join(filter(None, [
+            "🐝" if row.get("attracts_bees") else "",
+            "🦋" if row.get("attracts_butterflies") else "",
+            "🌺" if row.get("attracts_hummingbirds") else "",
+        ]))
+        if icons:
+            pollinator_labels[row["common_name"]] = {"icons": icons}
+
+    tdf = pd.DataFrame(rows)
+    fig = px.timeline(
+        tdf, x_start="Start", x_end="Finish", y="Task",
+        color="Season", color_discrete_map=GANTT_COLORS,
+        pattern_shape="Segment",
+        pattern_shape_map={"Indoor start": "/", "Outdoor": ""},
+        labels={"Task": ""},
+    )
+    fig.update_yaxes(autorange="reversed")
+
+    year = datetime.now().year
+    fig.update_xaxes(
+        range=[f"{year}-01-01", f"{year}-12-31"],
+        tickformat="%b",
+        dtick="M1",
+        ticklabelmode="period",
+        showgrid=True,
+        gridcolor="#f0e8d8",
+        zeroline=False,
+    )
+
+    for plant_name, info in pollinator_labels.items():
+        fig.add_annotation(
+            x=0, xref="paper",
+            y=plant_name, yref="y",
+            text=info["icons"],
+            showarrow=False,
+            font=dict(size=11),
+            xanchor="right",
+            yanchor="middle",
+            xshift=-90,
+        )
+
+    _today_marker(fig)
+
+    fig.update_layout(**CHART_LAYOUT)
+    fig.update_layout(
+        height=max(160, len(selected_plants) * 46),
+        margin=dict(l=120, r=10, t=30, b=20),
+    )
+    return fig
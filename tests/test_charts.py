@@ -0,0 +1,101 @@
+# test_charts.py
+# The column-wise figure builders (charts.py) must draw exactly what the old
+# row-by-row callback code drew (legacy_figures.py) from the same database.
+import json
+import base64
+import duckdb
+import numpy as np
+import pytest
+import plotly.io as pio
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+from scripts import bench_app
+from dashboard import db
+from tests import legacy_figures as legacy
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    """Synthetic database built by the real model SQL; the app reads it."""
+    path = str(tmp_path_factory.mktemp("charts") / "weather.db")
+    cities, plants = bench_app.build_database(path, n_cities=3, years=3, n_plants=60, seed=1)
+    db.use_database(path)
+    con = duckdb.connect(path, read_only=True)
+    yield con, cities, sorted(plants)
+    con.close()
+    db.use_database(None)
+
+
+def _leaf(value):
+    # Same value, whatever its encoding: typed arrays (plotly's "bdata"),
+    # ints vs floats, and dates with or without a midnight time
+    if isinstance(value, dict) and "bdata" in value and "dtype" in value:
+        return [_leaf(v) for v in np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"]).tolist()]
+    if isinstance(value, dict):
+        return {k: _leaf(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_leaf(v) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str) and len(value) >= 10 and value[4] == "-" and value[7] == "-":
+        return value.replace("T00:00:00", "").replace(" 00:00:00", "")
+    return value
+
+
+def _merge(base, over):
+    out = dict(base)
+    for k, v in over.items():
+        out[k] = _merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+
+def plain(fig):
+    """
+    Figure JSON as drawn: the template's layout merged under the figure's own
+    (old figures applied CHART_LAYOUT per call, new ones get it from the
+    "garden" template; both share plotly's trace defaults).
+    """
+    if not fig:
+        return fig
+    d = json.loads(pio.to_json(go.Figure(fig)))
+    template = d["layout"].pop("template", {})
+    return _leaf({"data": d["data"], "layout": _merge(template.get("layout", {}), d["layout"])})
+
+
+def test_temp_precip(database):
+    from dashboard import app
+    con, cities, _ = database
+    for city in cities:
+        assert plain(app.update_temp_precip(city)) == plain(legacy.temp_precip(con, city))
+
+
+def test_forecast(database):
+    from dashboard import app
+    con, cities, _ = database
+    for city in cities:
+        assert plain(app.update_forecast_chart(city)) == plain(legacy.forecast(con, city))
+
+
+@pytest.mark.parametrize("n_plants", [1, 12, 60])
+def test_gantt(database, n_plants):
+    from dashboard import app
+    con, cities, plants = database
+    for i, city in enumerate(cities):
+        selected = plants[i:i + n_plants]
+        assert plain(app.update_gantt(city, selected)) == plain(legacy.gantt(con, city, selected))
+
+
+def test_empty_gantt(database):
+    from dashboard import app
+    _, cities, _ = database
+    assert plain(app.update_gantt(cities[0], [])) == plain(legacy.empty_gantt())
+
+
+def test_plant_cards(database):
+    from dashboard import app
+    con, cities, plants = database
+    for i, city in enumerate(cities):
+        selected = plants[i:i + 12]
+        new = json.loads(json.dumps(app.update_plant_cards(city, selected), cls=PlotlyJSONEncoder))
+        old = json.loads(json.dumps(legacy.plant_cards(con, city, selected), cls=PlotlyJSONEncoder))
+        assert new == old
@@ -0,0 +1,50 @@
+# test_db.py
+# Database override for benchmarks (db.use_database) with no live database,
+# and a database file replaced in place under the same path.
+import os
+import duckdb
+import pytest
+from dashboard import db
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    """A running watcher (as after a first query) without a poll thread."""
+    monkeypatch.setattr(db, "_watching", True)
+    monkeypatch.setattr(db, "_key", None)
+    monkeypatch.setattr(db, "_override", None)
+
+
+def test_override_resets_without_live_database(data_dir, watcher):
+    path = str(data_dir / "bench.db")
+    duckdb.connect(path).close()
+
+    db.use_database(path)
+    assert db.get_cursor().execute("SELECT 42").fetchone() == (42,)
+
+    db.use_database(None)   # nothing built in data_dir: must not raise
+    assert db._key is None
+    with pytest.raises(FileNotFoundError):
+        db.get_cursor()
+
+    # Once a database exists, the next query picks it up
+    duckdb.connect(str(data_dir / "weather.db")).close()
+    assert db.generation()[0] == str(data_dir / "weather.db")
+
+
+def _write(path, value):
+    con = duckdb.connect(path)
+    con.execute(f"CREATE TABLE t AS SELECT {value} AS x")
+    con.close()
+
+
+def test_file_replaced_in_place_is_reread(data_dir, watcher):
+    live = str(data_dir / "weather.db")
+    _write(live, 1)
+    assert db.get_cursor().execute("SELECT x FROM t").fetchone() == (1,)
+
+    # A new file renamed over the same path (legacy layout or an override)
+    _write(str(data_dir / "next.db"), 2)
+    os.replace(data_dir / "next.db", live)
+    db._key = db._file_key()   # what the watcher does on its next tick
+    assert db.get_cursor().execute("SELECT x FROM t").fetchone() == (2,)
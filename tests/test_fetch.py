@@ -0,0 +1,170 @@
+# test_fetch.py
+# Multi-location requests: responses are split back into cities, and a batch
+# that fails is retried one city at a time, batched or streamed.
+import json
+import numpy as np
+import pytest
+import requests
+from scripts import fetch
+from scripts.fetch import CITIES
+
+DAYS = ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+def _location(city, i):
+    return {
+        "latitude":  CITIES[city]["latitude"],
+        "longitude": CITIES[city]["longitude"],
+        "location_id": i,
+        "daily": {"time": DAYS, "temperature_2m_max": [float(i), 1.5, None]},
+    }
+
+
+class Response:
+    def __init__(self, body, status_code=200, cut=None):
+        self.text        = json.dumps(body)[:cut]
+        self.status_code = status_code
+        self.headers     = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        data = self.text.encode()
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class Session:
+    """
+    Open-Meteo stand-in: a list for several locations (in reverse, so only
+    location_id tells them apart), a bare object for one.
+    Requests including a `failing` city get a 500; ones including a
+    `truncated` city break off after their first location.
+    """
+
+    def __init__(self, failing=(), truncated=()):
+        self.failing   = set(failing)
+        self.truncated = set(truncated)
+        self.requests  = []
+
+    def get(self, url, params, timeout, stream=False):
+        by_lat = {str(c["latitude"]): city for city, c in CITIES.items()}
+        cities = [by_lat[lat] for lat in str(params["latitude"]).split(",")]
+        self.requests.append(cities)
+        if self.failing & set(cities):
+            return Response({"error": True, "reason": "boom"}, status_code=500)
+        if len(cities) == 1:
+            return Response(_location(cities[0], 0))
+        body = [_location(city, i) for i, city in enumerate(cities)][::-1]
+        if self.truncated & set(cities):
+            return Response(body, cut=len(json.dumps(body[:1])) + 20)
+        return Response(body)
+
+
+@pytest.fixture
+def session(data_dir, monkeypatch):
+    def install(**kwargs):
+        stub = Session(**kwargs)
+        monkeypatch.setattr(fetch, "get_session", lambda: stub)
+        return stub
+    return install
+
+
+def _params():
+    return {city: {**c, "daily": "temperature_2m_max", "start_date": DAYS[0], "end_date": DAYS[-1]}
+            for city, c in CITIES.items()}
+
+
+def _assert_own(results):
+    # Each city got its own location back, not a neighbour's
+    for city, payload in results.items():
+        assert payload["latitude"] == CITIES[city]["latitude"], city
+
+
+# ── split_batch ──────────────────────────────────────────────────────────────
+def test_split_batch_uses_location_id():
+    cities  = ["Portland", "Eugene", "Bend"]
+    payload = [_location("Bend", 2), _location("Portland", 0), _location("Eugene", 1)]
+    _assert_own(fetch.split_batch(cities, payload))
+
+
+def test_split_batch_single_location_object():
+    assert fetch.split_batch(["Bend"], _location("Bend", 0)) == {"Bend": _location("Bend", 0)}
+
+
+def test_split_batch_wrong_count():
+    with pytest.raises(ValueError):
+        fetch.split_batch(["Portland", "Eugene"], [_location("Portland", 0)])
+    with pytest.raises(ValueError):
+        fetch.split_batch(["Portland", "Eugene"], _location("Portland", 0))
+
+
+# ── fetch_batched ────────────────────────────────────────────────────────────
+def test_batched_splits_locations(session):
+    stub = session()
+    # 6 cities in batches of 5: one list response, one single-location object
+    results, errors = fetch.fetch_batched("archive", _params(), batch_size=5)
+    assert errors == {}
+    assert sorted(results) == sorted(CITIES)
+    _assert_own(results)
+    assert sorted(len(r) for r in stub.requests) == [1, 5]
+
+
+def test_batched_failure_falls_back_per_city(session):
+    stub = session(failing=["Medford"])
+    results, errors = fetch.fetch_batched("archive", _params(), batch_size=3)
+    assert sorted(results) == sorted(set(CITIES) - {"Medford"})
+    _assert_own(results)
+    assert list(errors) == ["Medford"] and errors["Medford"].startswith("request failed")
+    # Both batches, then the failed batch's three cities one at a time
+    assert sorted(len(r) for r in stub.requests) == [1, 1, 1, 3, 3]
+
+
+# ── fetch_streamed ───────────────────────────────────────────────────────────
+def _stream(batch_size):
+    got = {}
+    delivered, errors = fetch.fetch_streamed("archive", _params(), got.__setitem__, batch_size=batch_size)
+    assert delivered == set(got)
+    return got, errors
+
+
+def test_streamed_splits_locations(session):
+    session()
+    got, errors = _stream(batch_size=5)
+    assert errors == {}
+    assert sorted(got) == sorted(CITIES)
+    _assert_own(got)
+    np.testing.assert_array_equal(got["Portland"]["daily"]["temperature_2m_max"], [0.0, 1.5, np.nan])
+
+
+def test_streamed_failure_falls_back_per_city(session):
+    stub = session(failing=["Medford"])
+    got, errors = _stream(batch_size=3)
+    assert sorted(got) == sorted(set(CITIES) - {"Medford"})
+    _assert_own(got)
+    assert list(errors) == ["Medford"]
+    assert sorted(len(r) for r in stub.requests) == [1, 1, 1, 3, 3]
+
+
+def test_streamed_break_off_retries_only_undelivered(session):
+    stub = session(truncated=["Eugene"])
+    got, errors = _stream(batch_size=3)
+    assert errors == {}
+    assert sorted(got) == sorted(CITIES)
+    _assert_own(got)
+    # Medford (listed first) came through before the cut; the others are retried
+    assert sorted(r for r in stub.requests if len(r) == 1) == [["Eugene"], ["Portland"]]
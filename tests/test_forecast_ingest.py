@@ -0,0 +1,67 @@
+# test_forecast_ingest.py
+# raw_weather is the table of record for forecast days: a --full rebuild
+# must keep every day earlier ingests upserted, archived or not.
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date, timedelta
+from scripts import store, generations, ingest_forecast
+from scripts.fetch import CITIES
+from scripts.model import run_model
+
+
+def _historical(years=3):
+    """A few years of seasonal history (with spring and fall freezes) per city."""
+    days = pd.date_range(date(date.today().year - years, 1, 1), date.today() - timedelta(days=2))
+    season = -np.cos(2 * np.pi * (days.dayofyear - 20) / 365.25)
+    return pd.concat([
+        pd.DataFrame({
+            "date":                days,
+            "temp_min":            40 + 14 * season,
+            "temp_max":            60 + 18 * season,
+            "soil_temp_0_7cm":     50 + 14 * season,
+            "soil_temp_7_to_28cm": 50 + 10 * season,
+            "city":                city,
+        })
+        for city in CITIES
+    ], ignore_index=True)
+
+
+def _fake_fetch(start, n_days):
+    """fetch_batched stand-in returning n_days of forecast-shaped data from start."""
+    def fetch_batched(kind, params):
+        days = [(start + timedelta(days=k)).isoformat() for k in range(n_days)]
+        daily = {
+            "time":               days,
+            "temperature_2m_max": [70.0] * n_days,
+            "temperature_2m_min": [50.0] * n_days,
+            "precipitation_sum":  [0.1] * n_days,
+        }
+        return {city: {"daily": daily} for city in params}, {}
+    return fetch_batched
+
+
+def _raw_weather():
+    con = duckdb.connect(generations.current_path(), read_only=True)
+    try:
+        return con.execute("SELECT * FROM raw_weather ORDER BY city, date").df()
+    finally:
+        con.close()
+
+
+@pytest.mark.parametrize("archive", [True, False])
+def test_full_rebuild_keeps_ingested_days(data_dir, monkeypatch, archive):
+    store.replace_partitions("historical", _historical())
+
+    # Two ingests whose windows don't overlap (the second a month later); the
+    # first builds the model from scratch
+    today = date.today()
+    for start in (today - timedelta(days=67), today - timedelta(days=30)):
+        monkeypatch.setattr(ingest_forecast, "fetch_batched", _fake_fetch(start, 37))
+        ingest_forecast.run_forecast_ingest(archive=archive)
+    before = _raw_weather()
+    assert len(before) == 2 * 37 * len(CITIES)
+
+    run_model(full=True)
+    pd.testing.assert_frame_equal(_raw_weather(), before)
@@ -0,0 +1,106 @@
+# test_normals.py
+# Normals over a year range come from two cube rows (climate_cube,
+# freeze_cube); they must equal a direct aggregate over temp_soil_historical.
+import duckdb
+import numpy as np
+import pytest
+from datetime import date
+from scripts import bench_app, model
+from dashboard import app, db
+
+YEARS = 6
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    """Synthetic history; the second city is missing its first and a middle year."""
+    path = str(tmp_path_factory.mktemp("normals") / "weather.db")
+    cities, _ = bench_app.build_database(path, n_cities=3, years=YEARS, n_plants=10, seed=2)
+    first = date.today().year - YEARS
+    con = duckdb.connect(path)
+    con.execute("DELETE FROM temp_soil_historical WHERE city = ? AND YEAR(date) IN (?, ?)",
+                [cities[1], first, first + 2])
+    for table in ("climate_cube", "freeze_by_year", "freeze_cube"):
+        model.NODES[table]["build"](con)
+    con.close()
+    db.use_database(path)
+    con = duckdb.connect(path, read_only=True)
+    yield con, cities, first
+    con.close()
+    db.use_database(None)
+
+
+def _ranges(first):
+    last = date.today().year
+    return [
+        (first, last),              # all time
+        (first, first + 3),         # lo equal to the first year
+        (first + 1, last - 1),
+        (first + 2, first + 2),     # a single year (missing for the second city)
+        (last, last),               # the current, partial year
+        (first - 5, first + 1),     # starting before any data
+    ]
+
+
+def _direct_normals(con, city, lo, hi):
+    """{day of year: (soil, min, max)} averaged straight from the history."""
+    rows = con.execute("""
+        SELECT DAYOFYEAR(date), AVG(soil_temp_0_7cm), AVG(temp_min), AVG(temp_max)
+        FROM temp_soil_historical
+        WHERE city = ? AND YEAR(date) BETWEEN ? AND ?
+          AND DAYOFYEAR(date) <= DAYOFYEAR(MAKE_DATE(YEAR(current_date), 12, 31))
+        GROUP BY 1
+    """, [city, lo, hi]).fetchall()
+    return {r[0]: r[1:] for r in rows}
+
+
+def test_range_normals_match_direct_aggregate(database):
+    con, cities, first = database
+    for city in cities:
+        for lo, hi in _ranges(first):
+            cols     = app.query_normals(city, lo, hi)
+            expected = _direct_normals(con, city, lo, hi)
+            got = {
+                int(d.astype("datetime64[D]").item().timetuple().tm_yday): (s, mn, mx)
+                for d, s, mn, mx in zip(cols["date"], cols["avg_shallow_soil_temp"],
+                                        cols["avg_min_temp"], cols["avg_max_temp"])
+                if not np.isnan(mn)
+            }
+            assert got.keys() == expected.keys(), (city, lo, hi)
+            for doy, values in expected.items():
+                assert got[doy] == pytest.approx(values), (city, lo, hi, doy)
+
+
+def test_range_freeze_matches_direct_aggregate(database):
+    con, cities, first = database
+    found = 0
+    for city in cities:
+        for lo, hi in _ranges(first):
+            # Straight from the days: each year's last spring freeze, over
+            # the years that also had a fall one
+            avg = con.execute("""
+                SELECT AVG(DAYOFYEAR(last_freeze)) FROM (
+                    SELECT
+                        MAX(date) FILTER (WHERE MONTH(date) <= 6 AND temp_min <= 32) AS last_freeze,
+                        MIN(date) FILTER (WHERE MONTH(date) > 6  AND temp_min <= 32) AS first_freeze
+                    FROM temp_soil_historical
+                    WHERE city = ? AND YEAR(date) BETWEEN ? AND ?
+                    GROUP BY YEAR(date)
+                )
+                WHERE last_freeze IS NOT NULL AND first_freeze IS NOT NULL
+            """, [city, lo, hi]).fetchone()[0]
+            row = app.query_freeze_range(city, lo, hi)
+            if avg is None:
+                assert row is None, (city, lo, hi)
+                continue
+            # ROUND() in DuckDB takes halves away from zero, not to even
+            expected = date(date.today().year, 1, 1).toordinal() + int(avg + 0.5) - 1
+            assert row[0].toordinal() == expected, (city, lo, hi)
+            found += 1
+    assert found
+
+
+def test_year_bounds_follow_the_city(database):
+    _, cities, first = database
+    assert app.query_year_bounds() == (first, date.today().year)
+    assert app.query_year_bounds(cities[1]) == (first + 1, date.today().year)
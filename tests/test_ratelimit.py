@@ -0,0 +1,119 @@
+# test_ratelimit.py
+# Token buckets shared through data/ratelimit.json: processes sharing the
+# state file share one budget, and a Retry-After holds back the next request.
+import multiprocessing
+import pytest
+from scripts import ratelimit, fetch
+
+HOST = "api.open-meteo.com"
+
+
+class Clock:
+    """Stand-in for the time module: sleeping advances the clock."""
+
+    def __init__(self):
+        self.now    = 1_000_000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers     = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Session:
+    """Answers 429 with the given Retry-After once, then 200; logs when."""
+
+    def __init__(self, clock, retry_after):
+        self.clock     = clock
+        self.responses = [Response(429, {"Retry-After": retry_after}), Response(200)]
+        self.times     = []
+
+    def get(self, url, **kwargs):
+        self.times.append(self.clock.now)
+        return self.responses.pop(0)
+
+
+class OutOfTokens(Exception):
+    pass
+
+
+def _spend(start, results):
+    # Child process: take tokens until one would have to wait
+    def sleep(seconds):
+        raise OutOfTokens
+    ratelimit.time.sleep = sleep
+    start.wait()
+    spent = 0
+    try:
+        while True:
+            ratelimit.acquire(HOST)
+            spent += 1
+    except OutOfTokens:
+        results.put(spent)
+
+
+@pytest.fixture
+def small_bucket(data_dir, monkeypatch):
+    # Five tokens, refilling about once a day: nothing comes back mid-test
+    monkeypatch.setitem(ratelimit.RATE_LIMITS, HOST, {"rate": 1 / 86400, "burst": 5})
+
+
+@pytest.fixture
+def clock(data_dir, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    monkeypatch.setitem(ratelimit.RATE_LIMITS, HOST, {"rate": 1.0, "burst": 5})
+    return clock
+
+
+def test_processes_sharing_state_stay_within_capacity(small_bucket):
+    ctx     = multiprocessing.get_context("fork")
+    start   = ctx.Event()
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_spend, args=(start, results)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    start.set()
+    spent = [results.get(timeout=30) for _ in workers]
+    for w in workers:
+        w.join(timeout=30)
+    assert sum(spent) == 5
+
+
+def test_retry_after_delays_next_acquire(clock):
+    ratelimit.acquire(HOST)
+    assert clock.sleeps == []
+
+    # A 429 with Retry-After: 30 blocks the host, even with tokens left
+    ratelimit.penalize(HOST, ratelimit.parse_retry_after("30", default=2))
+    started = clock.now
+    ratelimit.acquire(HOST)
+    assert clock.now - started >= 30
+
+
+def test_429_retry_waits_for_retry_after(clock):
+    session = Session(clock, "45")
+    response = fetch._get(session, "forecast", {"latitude": 45.5, "longitude": -122.7, "daily": "temperature_2m_max"})
+    assert response.status_code == 200
+    assert session.times[1] - session.times[0] >= 45
+
+
+def test_retry_after_http_date(clock):
+    assert ratelimit.parse_retry_after("Mon, 12 Jan 1970 13:46:40 GMT", default=2) == 0.0
+    assert ratelimit.parse_retry_after("garbage", default=2) == 2
+    assert ratelimit.parse_retry_after("86400", default=2) == ratelimit.MAX_RETRY_AFTER
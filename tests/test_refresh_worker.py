@@ -0,0 +1,60 @@
+# test_refresh_worker.py
+# Leader election: one refresh worker holds the leader lock at a time, and a
+# standby takes over once the holder lets go, however it exits.
+import os
+import signal
+import multiprocessing
+from scripts import refresh_worker
+
+
+def _lead(ready, done):
+    # Child process: lead until told to stop
+    lock = refresh_worker.acquire_leadership()
+    ready.put(lock is not None)
+    done.wait()
+
+
+def test_second_acquire_fails_until_first_releases(data_dir):
+    first = refresh_worker.acquire_leadership()
+    assert first is not None
+    assert refresh_worker.acquire_leadership() is None
+    first.close()
+    second = refresh_worker.acquire_leadership()
+    assert second is not None
+    second.close()
+
+
+def test_leader_in_another_process(data_dir):
+    ctx   = multiprocessing.get_context("fork")
+    ready = ctx.Queue()
+    done  = ctx.Event()
+    child = ctx.Process(target=_lead, args=(ready, done))
+    child.start()
+    try:
+        assert ready.get(timeout=30)
+        assert refresh_worker.acquire_leadership() is None
+        with open(data_dir / "refresh.leader.lock") as f:
+            assert f.read().split()[1] == str(child.pid)
+    finally:
+        # Killed, not released: the OS drops the lock with the process
+        os.kill(child.pid, signal.SIGKILL)
+        child.join(timeout=30)
+    lock = refresh_worker.acquire_leadership()
+    assert lock is not None
+    lock.close()
+
+
+def test_standby_takes_over(data_dir, monkeypatch):
+    leader = refresh_worker.acquire_leadership()
+    sleeps = []
+
+    def sleep(seconds):
+        # The leader steps down while the standby waits its second turn
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            leader.close()
+
+    monkeypatch.setattr(refresh_worker.time, "sleep", sleep)
+    lock = refresh_worker.wait_for_leadership()
+    assert sleeps == [refresh_worker.LEADER_RETRY_S] * 2
+    lock.close()
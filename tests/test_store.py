@@ -0,0 +1,97 @@
+# test_store.py
+# Parquet store writes: partition swaps, compaction, crash recovery, locking.
+import os
+import duckdb
+import pandas as pd
+import pytest
+from contextlib import contextmanager
+from scripts import store, generations
+
+
+def _days(city, start, n, temp=50.0):
+    dates = pd.date_range(start, periods=n)
+    return pd.DataFrame({
+        "date": dates, "temp_min": temp, "temp_max": temp + 20,
+        "soil_temp_0_7cm": temp, "soil_temp_7_to_28cm": temp, "city": city,
+    })
+
+
+def _read(name="historical"):
+    return duckdb.sql(f"SELECT * FROM {store.scan(name)} ORDER BY city, date").df()
+
+
+def test_replace_partitions_swaps_whole_cities(data_dir):
+    store.replace_partitions("historical", pd.concat([_days("Bend", "2020-12-30", 5),
+                                                      _days("Eugene", "2021-01-01", 3)]))
+    store.replace_partitions("historical", _days("Bend", "2021-06-01", 2, temp=60.0))
+    rows = _read()
+    assert len(rows[rows.city == "Eugene"]) == 3
+    bend = rows[rows.city == "Bend"]
+    assert list(bend.temp_min) == [60.0, 60.0]
+    # The year the backfill no longer covers is gone, directory and all
+    assert not os.path.exists(os.path.join(store.dataset_dir("historical"), "city=Bend", "year=2020"))
+
+
+def test_append_compacts_without_duplicates(data_dir):
+    for k in range(store.MAX_FILES_PER_PARTITION + 1):
+        store.append("historical", _days("Bend", pd.Timestamp("2021-01-01") + pd.Timedelta(days=k), 1))
+    partition = os.path.join(store.dataset_dir("historical"), "city=Bend", "year=2021")
+    assert len([f for f in os.listdir(partition) if f.endswith(".parquet")]) == 1
+    assert len(_read()) == store.MAX_FILES_PER_PARTITION + 1
+
+
+def test_interrupted_swap_is_finished_by_next_write(data_dir, monkeypatch):
+    store.replace_partitions("historical", _days("Bend", "2021-01-01", 3))
+
+    # The process dies after journaling the next swap, before anything moved
+    def crash(journal):
+        raise KeyboardInterrupt
+
+    finish = store._finish
+    monkeypatch.setattr(store, "_finish", crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.replace_partitions("historical", _days("Bend", "2021-02-01", 4))
+    monkeypatch.setattr(store, "_finish", finish)
+    assert len(_read()) == 3   # old data still whole
+    assert [e for e in os.listdir(store.PARQUET_DIR) if e.startswith(".swap-")]
+
+    store.append("historical", _days("Eugene", "2021-01-01", 1))
+    rows = _read()
+    assert len(rows[rows.city == "Bend"]) == 4
+    assert str(rows[rows.city == "Bend"].date.min().date()) == "2021-02-01"
+    assert not [e for e in os.listdir(store.PARQUET_DIR) if e.startswith(".")]
+
+
+def test_writes_hold_the_build_lock(data_dir, monkeypatch):
+    held = []
+    real = generations.build_lock
+
+    @contextmanager
+    def recording_lock():
+        with real():
+            held.append(True)
+            yield
+            held.append(False)
+
+    monkeypatch.setattr(generations, "build_lock", recording_lock)
+    store.replace_partitions("historical", _days("Bend", "2021-01-01", 1))
+    store.append("historical", _days("Bend", "2021-01-02", 1))
+    store.compact("historical")
+    assert held == [True, False] * 3
+
+
+def test_paths_with_quotes(tmp_path, monkeypatch):
+    root = tmp_path / "o'brien"
+    monkeypatch.setattr(store, "PARQUET_DIR", str(root / "parquet"))
+    monkeypatch.setattr(generations, "LOCK_PATH", str(root / "weather.build.lock"))
+    monkeypatch.setattr(generations, "DATA_DIR", str(root))
+    csv_path = root / "historical.csv"
+    os.makedirs(root)
+    _days("Bend", "2021-01-01", 2).to_csv(csv_path, index=False)
+    monkeypatch.setitem(store.DATASETS["historical"], "legacy_csv", str(csv_path))
+
+    assert store.import_legacy_csv("historical")
+    for k in range(store.MAX_FILES_PER_PARTITION):
+        store.append("historical", _days("Bend", pd.Timestamp("2021-02-01") + pd.Timedelta(days=k), 1))
+    assert len(_read()) == 2 + store.MAX_FILES_PER_PARTITION
+    assert store.sql_path("it's") == "'it''s'"